@@ -8,8 +8,10 @@ from tests.server.api.v1.utils import ServerTestCase
 
 from waterbutler.auth.osf import settings
 from waterbutler.core.auth import AuthType
+from waterbutler.auth.osf import handler as handler_module
 from waterbutler.auth.osf.handler import OsfAuthHandler
-from waterbutler.core.exceptions import (UnsupportedHTTPMethodError,
+from waterbutler.core.exceptions import (AuthError,
+                                            UnsupportedHTTPMethodError,
                                             UnsupportedActionError)
 
 
@@ -187,3 +189,82 @@ class TestActionMapping:
         request.headers = {settings.MFR_ACTION_HEADER: 'bad-action'}
         with pytest.raises(UnsupportedActionError):
             await handler.get('test', 'test', request)
+
+
+class TestAuthCache:
+
+    @pytest.fixture
+    def auth_cache(self, monkeypatch):
+        monkeypatch.setattr(settings, 'AUTH_CACHE_TTL', 60)
+        auth_cache = handler_module.auth_cache
+        auth_cache.clear()
+        yield auth_cache
+        auth_cache.clear()
+
+    def make_request(self, authorization='Bearer token', query_args=None):
+        request = mock.Mock()
+        request.method = 'get'
+        request.uri = '/v1/resources/test/providers/test/file'
+        request.headers = {'Authorization': authorization}
+        request.query_arguments = query_args or {}
+        request.cookies = {}
+        return request
+
+    def make_handler(self, side_effect=None):
+        handler = OsfAuthHandler()
+        handler.build_payload = mock.Mock()
+        handler.make_request = utils.MockCoroutine(
+            side_effect=side_effect,
+            return_value={'auth': {'token': 'secret'}, 'callback_url': 'dummy'}
+        )
+        return handler
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_default(self):
+        handler = self.make_handler()
+
+        await handler.get('test', 'test', self.make_request(), path='/file')
+        await handler.get('test', 'test', self.make_request(), path='/file')
+
+        assert handler.make_request.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_hits_skip_the_osf(self, auth_cache):
+        handler = self.make_handler()
+
+        first = await handler.get('test', 'test', self.make_request(), path='/file')
+        first['auth']['token'] = 'mutated'
+        second = await handler.get('test', 'test', self.make_request(), path='/other')
+
+        assert handler.make_request.call_count == 1
+        assert second == {'auth': {'token': 'secret', 'callback_url': 'dummy'},
+                          'callback_url': 'dummy'}
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('other_args', [
+        {'resource': 'other'},
+        {'provider': 'other'},
+        {'request': {'authorization': 'Bearer other'}},
+        {'request': {'query_args': {'view_only': [b'abc']}}},
+        {'request': {'query_args': {'cookie': [b'abc']}}},
+        {'request': {'query_args': {'meta': [b'']}}},
+    ])
+    async def test_keyed_by_request(self, auth_cache, other_args):
+        handler = self.make_handler()
+
+        await handler.get('test', 'test', self.make_request(), path='/file')
+        await handler.get(other_args.get('resource', 'test'), other_args.get('provider', 'test'),
+                          self.make_request(**other_args.get('request', {})), path='/file')
+
+        assert handler.make_request.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_errors_are_not_cached(self, auth_cache):
+        handler = self.make_handler(side_effect=AuthError('nope', code=403))
+
+        for _ in range(2):
+            with pytest.raises(AuthError):
+                await handler.get('test', 'test', self.make_request(), path='/file')
+
+        assert handler.make_request.call_count == 2
+        assert len(auth_cache) == 0
@@ -1,4 +1,7 @@
+import io
 import os
+import asyncio
+import hashlib
 
 import pytest
 
@@ -133,3 +136,102 @@ class TestPartialFileStreamReader:
             assert data == b''
             at_eof = reader.at_eof()
             assert at_eof
+
+
+class TestFileStreamReaderBlocks:
+
+    @pytest.fixture
+    def big_file(self, tmpdir):
+        path = tmpdir.join('big.bin')
+        path.write_binary(bytes(range(256)) * 20000)
+        return str(path)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('chunk_size', [1000, 65536, 10 ** 7])
+    async def test_reads_whole_file(self, big_file, chunk_size, monkeypatch):
+        monkeypatch.setattr(streams.settings, 'FILE_READ_AHEAD_SIZE', 100000)
+        with open(big_file, 'rb') as fp:
+            fp.seek(100)
+            reader = streams.FileStreamReader(fp)
+
+            data = b''
+            chunk = await reader.read(chunk_size)
+            while chunk:
+                assert len(chunk) == min(chunk_size, reader.size - len(data))
+                data += chunk
+                chunk = await reader.read(chunk_size)
+
+            assert data == bytes(range(256)) * 20000
+            assert reader.at_eof()
+            assert fp.tell() == 100  # positional reads leave the file pointer alone
+
+    @pytest.mark.asyncio
+    async def test_reads_rest_after_partial_read(self, big_file, monkeypatch):
+        monkeypatch.setattr(streams.settings, 'FILE_READ_AHEAD_SIZE', 100000)
+        with open(big_file, 'rb') as fp:
+            reader = streams.FileStreamReader(fp)
+
+            assert await reader.read(10) == bytes(range(10))
+            rest = await reader.read()
+
+            assert rest == (bytes(range(256)) * 20000)[10:]
+            assert await reader.read() == b''
+
+    @pytest.mark.asyncio
+    async def test_partial_range(self, big_file, monkeypatch):
+        monkeypatch.setattr(streams.settings, 'FILE_READ_AHEAD_SIZE', 1000)
+        with open(big_file, 'rb') as fp:
+            reader = streams.PartialFileStreamReader(fp, (300, 4299))
+
+            data = b''
+            chunk = await reader.read(700)
+            while chunk:
+                data += chunk
+                chunk = await reader.read(700)
+
+            assert data == (bytes(range(256)) * 20000)[300:4300]
+
+    @pytest.mark.asyncio
+    async def test_unflushed_writes_are_read(self, tmpdir):
+        with open(str(tmpdir.join('spool.bin')), 'w+b') as fp:
+            fp.write(b'spooled')
+            reader = streams.FileStreamReader(fp)
+
+            assert await reader.read() == b'spooled'
+
+    @pytest.mark.asyncio
+    async def test_close_waits_for_block_in_flight(self, big_file, monkeypatch):
+        monkeypatch.setattr(streams.settings, 'FILE_READ_AHEAD_SIZE', 1000)
+        fp = open(big_file, 'rb')
+        reader = streams.FileStreamReader(fp)
+        await reader.read(1000)
+        in_flight = reader._in_flight
+        assert in_flight is not None
+
+        reader.close()
+        assert not fp.closed or in_flight.done()
+
+        await asyncio.wait([in_flight])
+        await asyncio.sleep(0)
+        assert fp.closed
+        assert reader.at_eof()
+
+    @pytest.mark.asyncio
+    async def test_local_range(self, big_file):
+        with open(big_file, 'rb') as fp:
+            assert streams.FileStreamReader(fp).local_range() == (fp.fileno(), 0, 5120000)
+            assert streams.PartialFileStreamReader(fp, (10, 19)).local_range() == \
+                (fp.fileno(), 10, 10)
+            assert streams.PartialFileStreamReader(fp, (5119990, 5200000)).local_range() == \
+                (fp.fileno(), 5119990, 10)
+
+            reader = streams.FileStreamReader(fp)
+            await reader.read(10)
+            assert reader.local_range() is None
+
+            reader = streams.FileStreamReader(fp)
+            reader.add_writer('md5', streams.HashStreamWriter(hashlib.md5))
+            assert reader.local_range() is None
+
+    def test_local_range_without_fd(self):
+        assert streams.FileStreamReader(io.BytesIO(b'data')).local_range() is None
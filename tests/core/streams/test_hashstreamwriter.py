@@ -0,0 +1,90 @@
+import hashlib
+
+import pytest
+
+from waterbutler.core import streams
+from waterbutler.core.streams import settings
+
+
+DATA = b'abcdefghij' * 100000
+
+
+def add_hashers(stream):
+    for name in ('md5', 'sha1', 'sha256'):
+        stream.add_writer(name, streams.HashStreamWriter(getattr(hashlib, name)))
+
+
+class TestHashStreamWriter:
+
+    def test_write(self):
+        writer = streams.HashStreamWriter(hashlib.md5)
+        writer.write(DATA)
+
+        assert writer.hexdigest == hashlib.md5(DATA).hexdigest()
+        assert writer.digest == hashlib.md5(DATA).digest()
+
+    def test_update_in_thread(self):
+        writers = [streams.HashStreamWriter(hashlib.md5), streams.HashStreamWriter(hashlib.sha1)]
+        streams.HashStreamWriter.update_in_thread(writers, DATA)
+        writers[0].write(b'more')
+
+        assert writers[0].hexdigest == hashlib.md5(DATA + b'more').hexdigest()
+        assert writers[1].hexdigest == hashlib.sha1(DATA).hexdigest()
+
+
+class TestStreamHashing:
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('chunk_size', [10, 65536, 300000])
+    async def test_digests_are_complete_at_eof(self, chunk_size):
+        stream = streams.StringStream(DATA)
+        add_hashers(stream)
+
+        read = b''
+        chunk = await stream.read(chunk_size)
+        while chunk:
+            read += chunk
+            chunk = await stream.read(chunk_size)
+
+        assert read == DATA
+        assert stream._hashing is None
+        for name in ('md5', 'sha1', 'sha256'):
+            assert stream.writers[name].hexdigest == getattr(hashlib, name)(DATA).hexdigest()
+
+    @pytest.mark.asyncio
+    async def test_small_chunks_are_hashed_inline(self, monkeypatch):
+        monkeypatch.setattr(settings, 'HASH_OFFLOAD_MIN_SIZE', 11)
+        stream = streams.StringStream(DATA)
+        add_hashers(stream)
+
+        await stream.read(10)
+
+        assert stream._hashing is None
+        assert stream.writers['md5'].hexdigest == hashlib.md5(DATA[:10]).hexdigest()
+
+    @pytest.mark.asyncio
+    async def test_large_chunks_are_hashed_in_thread(self):
+        stream = streams.StringStream(DATA)
+        add_hashers(stream)
+
+        await stream.read(settings.HASH_OFFLOAD_MIN_SIZE)
+
+        assert stream._hashing is not None
+        assert stream.writers['sha1'].hexdigest == \
+            hashlib.sha1(DATA[:settings.HASH_OFFLOAD_MIN_SIZE]).hexdigest()
+
+    @pytest.mark.asyncio
+    async def test_digests_are_complete_after_reading_size(self):
+        stream = streams.StringStream(DATA)
+        add_hashers(stream)
+
+        # Read exactly ``size`` bytes and never make the final empty read, like the multipart
+        # uploaders do
+        read = b''
+        while len(read) < stream.size:
+            read += await stream.read(min(300000, stream.size - len(read)))
+
+        assert read == DATA
+        assert stream._hashing is None
+        for name in ('md5', 'sha1', 'sha256'):
+            assert stream.writers[name].hexdigest == getattr(hashlib, name)(DATA).hexdigest()
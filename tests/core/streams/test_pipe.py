@@ -0,0 +1,257 @@
+import asyncio
+
+import pytest
+
+from waterbutler.core import streams
+
+
+class TestBytePipe:
+
+    @pytest.mark.asyncio
+    async def test_read(self):
+        pipe = streams.BytePipe(100)
+        await pipe.write(b'abc')
+        await pipe.write(b'defg')
+        pipe.write_eof()
+
+        assert await pipe.read(2) == b'ab'
+        assert await pipe.read(3) == b'cde'
+        assert not pipe.at_eof()
+        assert await pipe.read(10) == b'fg'
+        assert pipe.at_eof()
+        assert await pipe.read(10) == b''
+
+    @pytest.mark.asyncio
+    async def test_read_all(self):
+        pipe = streams.BytePipe(100)
+        reader = asyncio.ensure_future(pipe.read())
+        await pipe.write(b'abc')
+        await pipe.write(b'def')
+        await asyncio.sleep(0)
+        assert not reader.done()
+
+        pipe.write_eof()
+
+        assert await reader == b'abcdef'
+
+    @pytest.mark.asyncio
+    async def test_whole_chunks_are_not_copied(self):
+        pipe = streams.BytePipe(100)
+        chunk = b'abcdef' * 10
+        await pipe.write(chunk)
+
+        assert await pipe.readexactly(60) is chunk
+
+    @pytest.mark.asyncio
+    async def test_readexactly_waits_for_data(self):
+        pipe = streams.BytePipe(100)
+        reader = asyncio.ensure_future(pipe.readexactly(5))
+        await pipe.write(b'abc')
+        await asyncio.sleep(0)
+        assert not reader.done()
+
+        await pipe.write(b'def')
+
+        assert await reader == b'abcde'
+
+    @pytest.mark.asyncio
+    async def test_readexactly_incomplete(self):
+        pipe = streams.BytePipe(100)
+        await pipe.write(b'abc')
+        pipe.write_eof()
+
+        with pytest.raises(asyncio.IncompleteReadError) as exc:
+            await pipe.readexactly(5)
+
+        assert exc.value.partial == b'abc'
+
+    @pytest.mark.asyncio
+    async def test_write_waits_at_high_water_mark(self):
+        pipe = streams.BytePipe(4)
+        await pipe.write(b'abc')
+
+        writer = asyncio.ensure_future(pipe.write(b'def'))
+        await asyncio.sleep(0)
+        assert not writer.done()
+
+        assert await pipe.read(3) == b'abc'
+        await asyncio.wait_for(writer, 1)
+        assert pipe.size == 3
+
+    @pytest.mark.asyncio
+    async def test_abort_fails_reader(self):
+        pipe = streams.BytePipe(100)
+        reader = asyncio.ensure_future(pipe.readexactly(5))
+        await pipe.write(b'abc')
+
+        pipe.abort(ConnectionAbortedError())
+
+        with pytest.raises(ConnectionAbortedError):
+            await reader
+        with pytest.raises(ConnectionAbortedError):
+            await pipe.read(1)
+
+    @pytest.mark.asyncio
+    async def test_abort_after_eof_is_ignored(self):
+        pipe = streams.BytePipe(100)
+        await pipe.write(b'abc')
+        pipe.write_eof()
+
+        pipe.abort(ConnectionAbortedError())
+
+        assert await pipe.read(5) == b'abc'
+
+    @pytest.mark.asyncio
+    async def test_close_reader_releases_writer(self):
+        pipe = streams.BytePipe(4)
+        writer = asyncio.ensure_future(pipe.write(b'abcdef'))
+        await asyncio.sleep(0)
+        assert not writer.done()
+
+        pipe.close_reader()
+        await asyncio.wait_for(writer, 1)
+        await pipe.write(b'ghijkl')
+
+        assert pipe.size == 0
+
+    @pytest.mark.asyncio
+    async def test_request_stream_reader(self):
+        request = type('Request', (), {'headers': {'Content-Length': '6'}})()
+        pipe = streams.BytePipe(100)
+        stream = streams.RequestStreamReader(request, pipe)
+        await pipe.write(b'abc')
+        await pipe.write(b'def')
+        pipe.write_eof()
+
+        assert await stream.read(4) == b'abcd'
+        assert await stream.read(4) == b'ef'
+        assert await stream.read(4) == b''
+        assert stream.at_eof()
+
+    @pytest.mark.asyncio
+    async def test_readexactly_past_high_water_mark(self):
+        pipe = streams.BytePipe(4)
+        reader = asyncio.ensure_future(pipe.readexactly(10))
+
+        for chunk in (b'abc', b'def', b'ghi', b'jkl'):
+            await asyncio.wait_for(pipe.write(chunk), 1)
+
+        assert await asyncio.wait_for(reader, 1) == b'abcdefghij'
+
+    @pytest.mark.asyncio
+    async def test_read_all_past_high_water_mark(self):
+        pipe = streams.BytePipe(4)
+        reader = asyncio.ensure_future(pipe.read())
+
+        for chunk in (b'abc', b'def', b'ghi', b'jkl'):
+            await asyncio.wait_for(pipe.write(chunk), 1)
+        pipe.write_eof()
+
+        assert await asyncio.wait_for(reader, 1) == b'abcdefghijkl'
+        assert pipe.at_eof()
+
+    @pytest.mark.asyncio
+    async def test_request_stream_reader_past_high_water_mark(self):
+        body = b'abcdefgh' * 32
+        request = type('Request', (), {'headers': {'Content-Length': str(len(body))}})()
+        pipe = streams.BytePipe(16)
+        stream = streams.RequestStreamReader(request, pipe)
+
+        async def send():
+            for i in range(0, len(body), 8):
+                await pipe.write(body[i:i + 8])
+            pipe.write_eof()
+
+        sender = asyncio.ensure_future(send())
+
+        assert await asyncio.wait_for(stream.read(100), 1) == body[:100]
+        assert await asyncio.wait_for(stream.read(), 1) == body[100:]
+        await asyncio.wait_for(sender, 1)
+
+    @pytest.mark.asyncio
+    async def test_request_stream_reader_read_all_past_high_water_mark(self):
+        body = b'abcdefgh' * 32
+        request = type('Request', (), {'headers': {'Content-Length': str(len(body))}})()
+        pipe = streams.BytePipe(16)
+        stream = streams.RequestStreamReader(request, pipe)
+
+        async def send():
+            for i in range(0, len(body), 8):
+                await pipe.write(body[i:i + 8])
+            pipe.write_eof()
+
+        sender = asyncio.ensure_future(send())
+
+        assert await asyncio.wait_for(stream.read(), 1) == body
+        await asyncio.wait_for(sender, 1)
+
+
+class FailingStream(streams.StringStream):
+
+    async def _read(self, n=-1):
+        data = await super()._read(n)
+        if not data:
+            raise ValueError('upstream went away')
+        return data
+
+
+class TestReadAheadStream:
+
+    @pytest.mark.asyncio
+    async def test_read(self):
+        stream = streams.ReadAheadStream(streams.StringStream(b'abcdefghij'), 4, chunk_size=3)
+
+        data = b''
+        chunk = await stream.read(2)
+        while chunk:
+            data += chunk
+            chunk = await stream.read(2)
+
+        assert data == b'abcdefghij'
+        assert stream.size == 10
+        assert stream.at_eof()
+
+    @pytest.mark.asyncio
+    async def test_reads_ahead_up_to_buffer_size(self):
+        inner = streams.StringStream(b'abcdefghij')
+        stream = streams.ReadAheadStream(inner, 4, chunk_size=2)
+
+        assert await stream.read(1) == b'a'
+        await asyncio.sleep(0.01)
+
+        # 'ab' was read, then 'cd' and 'ef' filled the buffer past its limit of four bytes
+        assert stream._pipe.size == 5
+        assert await inner.read(2) == b'gh'
+
+        stream.close()
+
+    @pytest.mark.asyncio
+    async def test_errors_are_raised_from_read(self):
+        stream = streams.ReadAheadStream(FailingStream(b'abcdef'), 100, chunk_size=4)
+
+        with pytest.raises(ValueError):
+            while await stream.read(2):
+                pass
+
+    @pytest.mark.asyncio
+    async def test_close_stops_read_ahead(self):
+        inner = streams.StringStream(b'abcdefghij')
+        stream = streams.ReadAheadStream(inner, 2, chunk_size=2)
+        await stream.read(1)
+
+        stream.close()
+        await asyncio.sleep(0.01)
+
+        assert stream._filler.cancelled()
+        assert await inner.read(2) == b'cd'
+
+    @pytest.mark.asyncio
+    async def test_close_closes_stream(self):
+        inner = streams.StringStream(b'abcdefghij')
+        closed = []
+        inner.close = lambda: closed.append(True)
+        stream = streams.ReadAheadStream(inner, 2, chunk_size=2)
+
+        stream.close()
+
+        assert closed == [True]
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from waterbutler.core import streams
+from waterbutler.core import exceptions
+
+
+DATA = bytes(range(256)) * 40
+
+
+class RangeSource:
+    """Serves byte ranges of ``DATA``, the first segment slowest."""
+
+    def __init__(self, data=DATA, delay=0.01):
+        self.data = data
+        self.delay = delay
+        self.ranges = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def fetch(self, byte_range):
+        start, end = byte_range
+        self.ranges.append(byte_range)
+        self.in_flight += 1
+        self.max_in_flight = max(self.in_flight, self.max_in_flight)
+        try:
+            await asyncio.sleep(self.delay if start == 0 else 0)
+        finally:
+            self.in_flight -= 1
+        return streams.StringStream(self.data[start:end + 1])
+
+
+async def read_all(stream, chunk_size=1000):
+    data = b''
+    chunk = await stream.read(chunk_size)
+    while chunk:
+        data += chunk
+        chunk = await stream.read(chunk_size)
+    return data
+
+
+class TestSegmentedStream:
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('segment_size', [1, 1000, 4096, 10240, 100000])
+    async def test_reassembles_in_order(self, segment_size):
+        source = RangeSource(delay=0)
+        stream = streams.SegmentedStream(source.fetch, len(DATA), segment_size, 3)
+
+        assert await read_all(stream, 777) == DATA
+        assert stream.size == len(DATA)
+        assert stream.at_eof()
+
+    @pytest.mark.asyncio
+    async def test_segments_are_fetched_concurrently(self):
+        source = RangeSource()
+        stream = streams.SegmentedStream(source.fetch, len(DATA), 1000, 3)
+
+        assert await read_all(stream) == DATA
+        assert source.max_in_flight == 3
+        assert source.ranges[:3] == [(0, 999), (1000, 1999), (2000, 2999)]
+        assert source.ranges[-1] == (10000, 10239)
+
+    @pytest.mark.asyncio
+    async def test_short_segment(self):
+        source = RangeSource(data=DATA[:5000], delay=0)
+        stream = streams.SegmentedStream(source.fetch, len(DATA), 1000, 3)
+
+        with pytest.raises(exceptions.DownloadError):
+            await read_all(stream)
+
+    @pytest.mark.asyncio
+    async def test_ignored_range(self):
+
+        async def fetch(byte_range):
+            return streams.StringStream(DATA)
+
+        stream = streams.SegmentedStream(fetch, len(DATA), 1000, 3)
+
+        with pytest.raises(exceptions.DownloadError):
+            await stream.read(10)
+        assert not stream._pending
+
+    @pytest.mark.asyncio
+    async def test_close_cancels_downloads(self):
+        source = RangeSource(delay=1)
+        stream = streams.SegmentedStream(source.fetch, len(DATA), 1000, 3)
+        reader = asyncio.ensure_future(stream.read(10))
+        await asyncio.sleep(0.01)
+        pending = list(stream._pending)
+
+        stream.close()
+        reader.cancel()
+        await asyncio.sleep(0)
+
+        # the first segment is still downloading, the others were done already
+        assert pending[0].cancelled()
+        assert not stream._pending
@@ -1,10 +1,15 @@
 import io
 import os
+import zlib
+import asyncio
 import zipfile
+from unittest import mock
 
 import pytest
 
 from waterbutler.core import streams
+from waterbutler.core import exceptions
+from waterbutler.core.streams import settings
 from waterbutler.core.utils import AsyncIterator
 
 from tests.utils import temp_files
@@ -164,3 +169,216 @@ class TestZipStreamReader:
                 assert compression_type == zipfile.ZIP_STORED
             else:
                 assert compression_type != zipfile.ZIP_STORED
+
+    @pytest.mark.asyncio
+    async def test_following_entries_are_compressed_ahead(self):
+        contents = [(b'%d' % index) * 2 ** 16 for index in range(5)]
+        files = AsyncIterator(
+            ('file{}.txt'.format(index), streams.StringStream(content))
+            for index, content in enumerate(contents)
+        )
+
+        with mock.patch.object(settings, 'ZIP_COMPRESSION_WORKERS', 3):
+            stream = streams.ZipStreamReader(files)
+            data = await stream.read(1)
+            await asyncio.sleep(0.1)
+
+            # The entry being read and the two after it are compressed in the background
+            assert [file.zinfo.filename for file in stream.upcoming] == ['file1.txt', 'file2.txt']
+            assert all(file.original_size == 2 ** 16 for file in stream.upcoming)
+
+            data += await stream.read()
+
+        zip = zipfile.ZipFile(io.BytesIO(data))
+        assert zip.testzip() is None
+        assert [zip.read(info) for info in zip.infolist()] == contents
+
+    @pytest.mark.asyncio
+    async def test_close_stops_compression(self):
+        files = AsyncIterator(
+            ('file{}.txt'.format(index), streams.StringStream(b'x' * 2 ** 16))
+            for index in range(3)
+        )
+
+        with mock.patch.object(settings, 'ZIP_COMPRESSION_WORKERS', 3):
+            stream = streams.ZipStreamReader(files)
+            await stream.read(1)
+            upcoming = list(stream.upcoming)
+            stream.close()
+            await asyncio.sleep(0)
+
+        assert not stream.upcoming
+        assert all(file.data._filler.done() for file in upcoming)
+
+
+class TestZipCompressionPolicy:
+
+    async def compress_types(self, *entries, **kwargs):
+        stream = streams.ZipStreamReader(AsyncIterator(entries), **kwargs)
+        zip = zipfile.ZipFile(io.BytesIO(await stream.read()))
+        assert zip.testzip() is None
+        return {info.filename: info.compress_type for info in zip.infolist()}
+
+    @pytest.mark.asyncio
+    async def test_compressible_files_are_deflated(self):
+        types = await self.compress_types(('a.txt', streams.StringStream(b'a' * 2 ** 16)))
+        assert types == {'a.txt': zipfile.ZIP_DEFLATED}
+
+    @pytest.mark.asyncio
+    async def test_compressed_content_types_are_stored(self):
+        types = await self.compress_types(
+            ('photo', streams.StringStream(b'a' * 2 ** 16), 'image/jpeg'),
+            ('movie', streams.StringStream(b'a' * 2 ** 16), 'video/mp4; codecs="avc1"'),
+            ('page', streams.StringStream(b'a' * 2 ** 16), 'text/html'),
+        )
+        assert types == {
+            'photo': zipfile.ZIP_STORED,
+            'movie': zipfile.ZIP_STORED,
+            'page': zipfile.ZIP_DEFLATED,
+        }
+
+    @pytest.mark.asyncio
+    async def test_incompressible_samples_are_stored(self):
+        contents = os.urandom(2 ** 17)
+        stream = streams.ZipStreamReader(AsyncIterator([
+            ('random.bin', streams.StringStream(contents)),
+            ('small.bin', streams.StringStream(os.urandom(100))),
+        ]))
+
+        zip = zipfile.ZipFile(io.BytesIO(await stream.read()))
+
+        assert zip.getinfo('random.bin').compress_type == zipfile.ZIP_STORED
+        assert zip.getinfo('small.bin').compress_type == zipfile.ZIP_DEFLATED
+        assert zip.read('random.bin') == contents
+
+    @pytest.mark.asyncio
+    async def test_compression_level_zero_stores_everything(self):
+        types = await self.compress_types(
+            ('a.txt', streams.StringStream(b'a' * 2 ** 16)),
+            ('folder/', streams.EmptyStream()),
+            compression_level=0,
+        )
+        assert types == {'a.txt': zipfile.ZIP_STORED, 'folder/': zipfile.ZIP_STORED}
+
+    @pytest.mark.asyncio
+    async def test_compression_level(self):
+        with mock.patch('zlib.compressobj', wraps=zlib.compressobj) as compressobj:
+            await self.compress_types(
+                ('a.txt', streams.StringStream(b'a' * 2 ** 16)),
+                compression_level=9,
+            )
+
+        assert mock.call(9, zlib.DEFLATED, -15) in compressobj.call_args_list
+
+
+class TestStoredZipArchive:
+
+    @pytest.fixture
+    def contents(self):
+        return [
+            ('a.txt', b'a' * 100),
+            ('folder/', b''),
+            ('folder/b.bin', os.urandom(2 ** 17 + 5)),
+            ('c.txt', b''),
+            ('d.txt', b'[File Content]'),
+        ]
+
+    def archive(self, contents, crcs=None, sizes=None, opened=None, on_crc=None,
+                ranges_ignored=False):
+        def opener(name, data):
+            async def open_stream(range=None):
+                if opened is not None:
+                    opened.append(name if range is None else (name, range))
+                if range is None or ranges_ignored:
+                    return streams.StringStream(data)
+                return streams.PartialFileStreamReader(io.BytesIO(data), range)
+            return open_stream
+
+        crcs, sizes = crcs or {}, sizes or {}
+        return streams.StoredZipArchive([
+            streams.StoredZipEntry(name, sizes.get(name, len(data)), (2020, 2, 29, 12, 30, 10),
+                                   opener(name, data), crc=crcs.get(name))
+            for name, data in contents
+        ], on_crc=on_crc)
+
+    async def read(self, stream):
+        data = b''
+        chunk = await stream.read(1000)
+        while chunk:
+            data += chunk
+            chunk = await stream.read(1000)
+        return data
+
+    @pytest.mark.asyncio
+    async def test_archive(self, contents):
+        computed = []
+        archive = self.archive(contents, on_crc=computed.append)
+
+        data = await self.read(archive.stream())
+
+        assert len(data) == archive.size
+        zip = zipfile.ZipFile(io.BytesIO(data))
+        assert zip.testzip() is None
+        assert [(info.filename, zip.read(info)) for info in zip.infolist()] == contents
+        assert all(info.compress_type == zipfile.ZIP_STORED for info in zip.infolist())
+        assert zip.getinfo('a.txt').date_time == (2020, 2, 29, 12, 30, 10)
+        assert [entry.zinfo.filename for entry in computed] == ['a.txt', 'folder/b.bin', 'd.txt']
+
+    @pytest.mark.asyncio
+    async def test_ranges_only_open_overlapping_files(self, contents):
+        full = await self.read(self.archive(contents).stream())
+        crcs = {name: zlib.crc32(data) for name, data in contents}
+        b_start = full.index(contents[2][1])
+
+        b_size = len(contents[2][1])
+
+        for start, end, expected_opens in [
+            (0, 10, []),
+            (0, 200, ['a.txt']),
+            (b_start + 10, b_start + 20, [('folder/b.bin', (10, 20))]),
+            (b_start + 10, None, [('folder/b.bin', (10, b_size - 1)), 'd.txt']),
+            (len(full) - 30, None, []),
+        ]:
+            for ranges_ignored in (False, True):
+                opened = []
+                stream = self.archive(contents, crcs=crcs, opened=opened,
+                                      ranges_ignored=ranges_ignored).stream(start, end)
+                expected = full[start:None if end is None else end + 1]
+
+                assert stream.size == len(expected)
+                assert await self.read(stream) == expected
+                assert opened == expected_opens
+
+    @pytest.mark.asyncio
+    async def test_files_with_unknown_crcs_are_read_from_their_start(self, contents):
+        full = await self.read(self.archive(contents).stream())
+        b_start = full.index(contents[2][1])
+        opened = []
+
+        stream = self.archive(contents, opened=opened).stream(b_start + 10, b_start + 20)
+
+        assert await self.read(stream) == full[b_start + 10:b_start + 21]
+        assert opened == ['folder/b.bin']
+
+    @pytest.mark.asyncio
+    async def test_unknown_crcs_are_computed_for_the_central_directory(self, contents):
+        full = await self.read(self.archive(contents).stream())
+        opened = []
+
+        stream = self.archive(contents, opened=opened).stream(len(full) - 30)
+
+        assert await self.read(stream) == full[-30:]
+        assert opened == ['a.txt', 'folder/b.bin', 'd.txt']
+
+    @pytest.mark.asyncio
+    async def test_size_mismatch(self, contents):
+        archive = self.archive(contents, sizes={'d.txt': 20})
+
+        with pytest.raises(exceptions.DownloadError):
+            await self.read(archive.stream())
+
+    def test_etag(self, contents):
+        etag = self.archive(contents).etag
+
+        assert self.archive(contents, crcs={'a.txt': 1}).etag == etag
+        assert self.archive(contents, sizes={'d.txt': 20}).etag != etag
@@ -0,0 +1,119 @@
+import io
+import asyncio
+import hashlib
+
+import pytest
+
+from tests.utils import MockCoroutine
+from waterbutler.core import buffers, exceptions, streams
+
+
+class TestByteBudget:
+
+    def test_try_acquire(self):
+        budget = buffers.ByteBudget(10)
+
+        assert budget.try_acquire(4)
+        assert budget.try_acquire(6)
+        assert not budget.try_acquire(1)
+        assert budget.available == 0
+
+        budget.release(4)
+        assert budget.available == 4
+
+    def test_oversized_request_fails(self):
+        budget = buffers.ByteBudget(10)
+
+        assert not budget.try_acquire(25)
+        assert budget.available == 10
+
+
+class TestReadPart:
+
+    @pytest.mark.asyncio
+    async def test_part_in_memory(self):
+        budget = buffers.ByteBudget(100)
+        stream = streams.StringStream(b'abcdefghij')
+
+        part = await buffers.read_part(stream, 6, hash_factory=hashlib.sha1, chunk_size=4,
+                                       budget=budget)
+
+        assert part.in_memory
+        assert part.data == b'abcdef'
+        assert part.size == 6
+        assert part.digest == hashlib.sha1(b'abcdef').digest()
+        assert budget.available == 94
+        assert await stream.read() == b'ghij'
+
+        part.close()
+        assert budget.available == 100
+
+    @pytest.mark.asyncio
+    async def test_part_spooled_past_budget(self):
+        budget = buffers.ByteBudget(5)
+        stream = streams.StringStream(b'abcdefghij')
+
+        part = await buffers.read_part(stream, 10, hash_factory=hashlib.sha1, chunk_size=4,
+                                       budget=budget)
+
+        assert not part.in_memory
+        assert part.data.read() == b'abcdefghij'
+        assert part.digest == hashlib.sha1(b'abcdefghij').digest()
+        # the first chunk was moved to disk along with the rest
+        assert budget.available == 5
+
+        part.close()
+        assert part.data.closed
+        assert budget.available == 5
+
+    @pytest.mark.asyncio
+    async def test_no_digest(self):
+        part = await buffers.read_part(streams.StringStream(b'abc'), 3,
+                                       budget=buffers.ByteBudget(10))
+
+        assert part.digest is None
+
+    @pytest.mark.asyncio
+    async def test_short_stream(self):
+        budget = buffers.ByteBudget(100)
+
+        with pytest.raises(exceptions.UploadError):
+            await buffers.read_part(streams.StringStream(b'abc'), 6, chunk_size=2, budget=budget)
+
+        assert budget.available == 100
+
+
+class TestSendPart:
+
+    @pytest.mark.asyncio
+    async def test_retry_rewinds_file(self, monkeypatch):
+        monkeypatch.setattr(asyncio, 'sleep', MockCoroutine())
+        sent = []
+
+        async def send(data):
+            sent.append(data.read())
+            if len(sent) == 1:
+                raise asyncio.TimeoutError()
+            return 'done'
+
+        assert await buffers.send_part(send, io.BytesIO(b'abc'), 1) == 'done'
+        assert sent == [b'abc', b'abc']
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_retries(self, monkeypatch):
+        monkeypatch.setattr(asyncio, 'sleep', MockCoroutine())
+        send = MockCoroutine(side_effect=exceptions.UploadError('nope'))
+
+        with pytest.raises(exceptions.UploadError):
+            await buffers.send_part(send, b'abc', 2)
+
+        assert send.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_fatal_codes_are_not_retried(self):
+        send = MockCoroutine(side_effect=exceptions.UploadError('gone', code=404))
+
+        with pytest.raises(exceptions.UploadError):
+            await buffers.send_part(send, b'abc', 2)
+
+        assert send.call_count == 1
@@ -0,0 +1,313 @@
+import fnmatch
+from unittest import mock
+
+import pytest
+from redis.exceptions import RedisError
+
+from tests import utils
+from waterbutler.core import cache
+from waterbutler.core.path import WaterButlerPath
+
+
+@pytest.fixture
+def metadata_cache(monkeypatch):
+    metadata_cache = cache.MetadataCache(max_entries=100)
+    monkeypatch.setattr(cache, 'metadata_cache', metadata_cache)
+    return metadata_cache
+
+
+class FakeRedis:
+    """Just enough of a Redis client for :class:`cache.RedisCache`, shared between caches the way
+    separate WaterButler processes share a Redis server."""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def pipeline(self):
+        return self
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+    def expire(self, key, ttl):
+        pass
+
+    def execute(self):
+        pass
+
+    def delete(self, *keys):
+        for key in keys:
+            self.hashes.pop(key, None)
+
+    def scan_iter(self, match):
+        return [key for key in self.hashes if fnmatch.fnmatchcase(key, match)]
+
+
+class CachedProvider(utils.MockProvider1):
+
+    NAME = 'CachedProvider'
+    METADATA_CACHE_TTL = 60
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = 0
+
+    async def metadata(self, path, throw=None, **kwargs):
+        self.calls += 1
+        if throw:
+            raise throw
+        return {'path': str(path), 'calls': self.calls}
+
+
+class OverwritingProvider(CachedProvider):
+    """Reads the metadata of the path it writes to before and after the write, as e.g. S3 does
+    through ``handle_name_conflict``."""
+
+    async def upload(self, stream, path, **kwargs):
+        await self.metadata(path)
+        return (await self.metadata(path)), False
+
+
+class IntraCachedProvider(CachedProvider):
+
+    async def intra_copy(self, dest_provider, src_path, dest_path):
+        return {}, True
+
+
+class TestLRUCache:
+
+    def test_get_set(self):
+        lru = cache.LRUCache(10)
+        lru.set('bucket', 'variant', b'value', 60)
+
+        assert lru.get('bucket', 'variant') == b'value'
+        assert lru.get('bucket', 'other') is None
+        assert lru.get('other', 'variant') is None
+
+    def test_expired_entries_are_dropped(self):
+        lru = cache.LRUCache(10)
+        lru.set('bucket', 'variant', b'value', -1)
+
+        assert lru.get('bucket', 'variant') is None
+        assert len(lru) == 0
+
+    def test_evicts_least_recently_used(self):
+        lru = cache.LRUCache(2)
+        lru.set('a', 'v', b'a', 60)
+        lru.set('b', 'v', b'b', 60)
+        lru.get('a', 'v')
+        lru.set('c', 'v', b'c', 60)
+
+        assert lru.get('a', 'v') == b'a'
+        assert lru.get('b', 'v') is None
+        assert lru.get('c', 'v') == b'c'
+
+    def test_delete_drops_all_variants(self):
+        lru = cache.LRUCache(10)
+        lru.set('bucket', 'one', b'1', 60)
+        lru.set('bucket', 'two', b'2', 60)
+        lru.delete('bucket')
+
+        assert lru.get('bucket', 'one') is None
+        assert lru.get('bucket', 'two') is None
+
+    def test_delete_prefix(self):
+        lru = cache.LRUCache(10)
+        lru.set('scope:/foo/', 'v', b'1', 60)
+        lru.set('scope:/foo/bar.txt', 'v', b'2', 60)
+        lru.set('scope:/food.txt', 'v', b'3', 60)
+        lru.delete_prefix('scope:/foo/')
+
+        assert len(lru) == 1
+        assert lru.get('scope:/food.txt', 'v') == b'3'
+
+
+class TestMetadataCache:
+
+    def test_hits_return_copies(self, metadata_cache):
+        value = {'name': 'foo'}
+        metadata_cache.set('bucket', 'variant', value, 60)
+
+        hit, first = metadata_cache.get('bucket', 'variant')
+        _, second = metadata_cache.get('bucket', 'variant')
+
+        assert hit is True
+        assert first == second == value
+        assert first is not second
+
+    def test_miss(self, metadata_cache):
+        assert metadata_cache.get('bucket', 'variant') == (False, None)
+
+    def test_redis_replaces_local_tier(self):
+        metadata_cache = cache.MetadataCache(max_entries=10, redis=FakeRedis())
+
+        assert isinstance(metadata_cache.tier, cache.RedisCache)
+
+    def test_shared_between_instances(self):
+        redis = FakeRedis()
+        writer = cache.MetadataCache(max_entries=10, redis=redis)
+        reader = cache.MetadataCache(max_entries=10, redis=redis)
+
+        writer.set('scope:/foo/', 'variant', {'name': 'foo'}, 60)
+        assert reader.get('scope:/foo/', 'variant') == (True, {'name': 'foo'})
+
+        writer.invalidate('scope:/foo/')
+        assert reader.get('scope:/foo/', 'variant') == (False, None)
+
+        writer.set('scope:/foo/bar.txt', 'variant', {'name': 'bar.txt'}, 60)
+        reader.get('scope:/foo/bar.txt', 'variant')
+        writer.invalidate(prefixes=['scope:/foo/'])
+        assert reader.get('scope:/foo/bar.txt', 'variant') == (False, None)
+
+    def test_redis_errors_are_misses(self):
+        redis = mock.Mock()
+        redis.hget.side_effect = RedisError()
+        redis.pipeline.side_effect = RedisError()
+        metadata_cache = cache.MetadataCache(max_entries=10, redis=redis)
+
+        metadata_cache.set('bucket', 'variant', {'name': 'foo'}, 60)
+
+        assert metadata_cache.get('bucket', 'variant') == (False, None)
+
+    def test_redis_prefix_is_escaped(self):
+        redis = mock.Mock()
+        redis.scan_iter.return_value = [b'key']
+        metadata_cache = cache.MetadataCache(max_entries=10, redis=redis)
+
+        metadata_cache.invalidate(prefixes=['scope:/[foo]*/'])
+
+        redis.scan_iter.assert_called_once_with(match='scope:/\\[foo\\]\\*/*')
+        redis.delete.assert_called_once_with(b'key')
+
+
+class TestProviderMetadataCache:
+
+    @pytest.mark.asyncio
+    async def test_metadata_is_cached(self, metadata_cache):
+        provider = CachedProvider({}, {'token': 'a'}, {})
+        path = WaterButlerPath('/foo/')
+
+        first = await provider.metadata(path)
+        second = await provider.metadata(path)
+
+        assert first == second
+        assert provider.calls == 1
+        assert provider.provider_metrics.serialize()['metadata_cache'] == {'hits': 1, 'misses': 1}
+
+    @pytest.mark.asyncio
+    async def test_scoped_by_credentials(self, metadata_cache):
+        provider = CachedProvider({}, {'token': 'a'}, {})
+        other = CachedProvider({}, {'token': 'b'}, {})
+        path = WaterButlerPath('/foo/')
+
+        await provider.metadata(path)
+        await other.metadata(path)
+
+        assert other.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_errors_are_not_cached(self, metadata_cache):
+        provider = CachedProvider({}, {'token': 'a'}, {})
+        path = WaterButlerPath('/foo/')
+
+        with pytest.raises(ValueError):
+            await provider.metadata(path, throw=ValueError())
+        with pytest.raises(ValueError):
+            await provider.metadata(path, throw=ValueError())
+
+        assert provider.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_upload_invalidates_path_and_parent(self, metadata_cache):
+        provider = CachedProvider({}, {'token': 'a'}, {})
+        parent, path = WaterButlerPath('/foo/'), WaterButlerPath('/foo/bar.txt')
+        await provider.metadata(parent)
+        await provider.metadata(path)
+
+        await provider.upload(None, path)
+        await provider.metadata(parent)
+        await provider.metadata(path)
+
+        assert provider.calls == 4
+
+    @pytest.mark.asyncio
+    async def test_overwrite_returns_new_metadata(self, metadata_cache):
+        provider = OverwritingProvider({}, {'token': 'a'}, {})
+        path = WaterButlerPath('/foo.txt')
+        before = await provider.metadata(path)
+
+        after, _ = await provider.upload(None, path)
+
+        assert after['calls'] == 3
+        assert after != before
+        assert (await provider.metadata(path))['calls'] == 4
+        assert provider._metadata_writes == 0
+
+    @pytest.mark.asyncio
+    async def test_delete_folder_invalidates_descendants(self, metadata_cache):
+        provider = CachedProvider({}, {'token': 'a'}, {})
+        unrelated = WaterButlerPath('/food.txt')
+        await provider.metadata(WaterButlerPath('/foo/bar/baz.txt'))
+        await provider.metadata(unrelated)
+
+        await provider.delete(WaterButlerPath('/foo/'))
+        await provider.metadata(WaterButlerPath('/foo/bar/baz.txt'))
+        await provider.metadata(unrelated)
+
+        assert provider.calls == 3
+
+    @pytest.mark.asyncio
+    async def test_intra_move_invalidates_both_providers(self, metadata_cache):
+        src = IntraCachedProvider({}, {'token': 'a'}, {})
+        dest = IntraCachedProvider({}, {'token': 'b'}, {})
+        src_path, dest_path = WaterButlerPath('/foo.txt'), WaterButlerPath('/bar.txt')
+        await src.metadata(src_path)
+        await dest.metadata(dest_path)
+
+        await src.intra_move(dest, src_path, dest_path)
+        await src.metadata(src_path)
+        await dest.metadata(dest_path)
+
+        assert src.calls == 2
+        assert dest.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_write_failure_still_invalidates(self, metadata_cache):
+        provider = CachedProvider({}, {'token': 'a'}, {})
+        path = WaterButlerPath('/foo.txt')
+        await provider.metadata(path)
+
+        with pytest.raises(NotImplementedError):
+            await provider.intra_copy(provider, WaterButlerPath('/bar.txt'), path)
+        await provider.metadata(path)
+
+        assert provider.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_write_in_another_process_invalidates(self, monkeypatch):
+        redis = FakeRedis()
+        server_cache = cache.MetadataCache(max_entries=10, redis=redis)
+        worker_cache = cache.MetadataCache(max_entries=10, redis=redis)
+        provider = CachedProvider({}, {'token': 'a'}, {})
+        path = WaterButlerPath('/foo.txt')
+
+        monkeypatch.setattr(cache, 'metadata_cache', server_cache)
+        await provider.metadata(path)
+
+        monkeypatch.setattr(cache, 'metadata_cache', worker_cache)
+        await CachedProvider({}, {'token': 'a'}, {}).upload(None, path)
+
+        monkeypatch.setattr(cache, 'metadata_cache', server_cache)
+        await provider.metadata(path)
+
+        assert provider.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_default(self, metadata_cache):
+        provider = utils.MockProvider1({}, {}, {})
+        await provider.metadata(WaterButlerPath('/foo/'))
+
+        assert len(metadata_cache.tier) == 0
@@ -1,9 +1,18 @@
+import io
+import zlib
+import asyncio
+import zipfile
+
 import pytest
 
 from tests import utils
 from unittest import mock
+from waterbutler import settings
+from waterbutler.core import streams
+from waterbutler.core import cache as wb_cache
 from waterbutler.core import metadata
 from waterbutler.core import exceptions
+from waterbutler.core.path import WaterButlerPath
 
 
 @pytest.fixture
@@ -16,6 +25,48 @@ def provider2():
     return utils.MockProvider2({'user': 'name'}, {'pass': 'phrase'}, {})
 
 
+class TreeItem:
+
+    def __init__(self, name, is_folder=False):
+        self.name = name
+        self.is_folder = is_folder
+
+
+class TreeProvider(utils.MockProvider1):
+    """Serves folder listings from ``tree``, a dict of folder path to list of child names."""
+
+    def __init__(self, tree, delays=None, fail=None):
+        super().__init__({}, {}, {})
+        self.tree = tree
+        self.delays = delays or {}
+        self.fail = fail
+        self.active = 0
+        self.max_active = 0
+        self.uploaded = []
+
+    async def metadata(self, path, **kwargs):
+        await asyncio.sleep(self.delays.get(str(path), 0))
+        return [TreeItem(name.rstrip('/'), name.endswith('/')) for name in self.tree[str(path)]]
+
+    async def create_folder(self, path, **kwargs):
+        return utils.MockFolderMetadata()
+
+    async def delete(self, path, **kwargs):
+        raise exceptions.NotFoundError(str(path))
+
+    async def upload(self, stream, path, **kwargs):
+        self.active += 1
+        self.max_active = max(self.active, self.max_active)
+        try:
+            await asyncio.sleep(self.delays.get(str(path), 0.001))
+            if str(path) == self.fail:
+                raise exceptions.UploadError('nope')
+            self.uploaded.append(str(path))
+            return utils.MockFileMetadata(), True
+        finally:
+            self.active -= 1
+
+
 class TestBaseProvider:
 
     def test_eq(self, provider1, provider2):
@@ -104,6 +155,16 @@ class TestBaseProvider:
         assert str(path) == str(new_path.parent)
         assert new_path.name == 'text_file.txt'
 
+    @pytest.mark.asyncio
+    async def test_revalidate_children_keeps_order(self, provider1):
+        path = await provider1.validate_path('/this/is/a/path/')
+        children = await provider1.revalidate_children(path, [('b.txt', False), ('a', True)])
+
+        assert [child.name for child in children] == ['b.txt', 'a']
+        assert children[0].is_file
+        assert children[1].is_dir
+        assert all(str(child.parent) == str(path) for child in children)
+
 
 class TestHandleNameConflict:
 
@@ -316,6 +377,7 @@ class TestCopy:
             provider1,
             src_path,
             dest_path.child('path', folder=True),
+            can_intra=provider1.can_intra_copy,
         )
 
     @pytest.mark.asyncio
@@ -332,6 +394,55 @@ class TestCopy:
         provider1.download.assert_called_once_with(src_path)
         provider1.upload.assert_called_once_with('Download return', dest_path)
 
+    @pytest.mark.asyncio
+    async def test_copy_segments_large_downloads_in_celery(self, provider1, monkeypatch):
+        monkeypatch.setattr(settings, 'SEGMENTED_DOWNLOAD_THRESHOLD', 100)
+        monkeypatch.setattr(settings, 'SEGMENTED_DOWNLOAD_SEGMENT_SIZE', 40)
+        src_path = await provider1.validate_path('/source/path')
+        dest_path = await provider1.validate_path('/destination/path')
+        data = bytes(range(100))
+        uploaded = []
+
+        async def download(path, range=None, **kwargs):
+            return streams.StringStream(data[range[0]:range[1] + 1])
+
+        async def upload(stream, path, **kwargs):
+            uploaded.append(await stream.read(1000))
+            return 'Upload return'
+
+        provider1.SEGMENTED_DOWNLOADS = True
+        provider1.is_celery_task = True
+        provider1.metadata = utils.MockCoroutine(return_value=utils.MockFileMetadata())
+        provider1.metadata.return_value.size = 100
+        provider1.download = download
+        provider1.upload = upload
+
+        assert await provider1.copy(provider1, src_path, dest_path) == 'Upload return'
+        assert uploaded == [data]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('segmented,celery,size', [
+        (False, True, 100),
+        (True, False, 100),
+        (True, True, 99),
+    ])
+    async def test_copy_does_not_segment(self, provider1, monkeypatch, segmented, celery, size):
+        monkeypatch.setattr(settings, 'SEGMENTED_DOWNLOAD_THRESHOLD', 100)
+        src_path = await provider1.validate_path('/source/path')
+        dest_path = await provider1.validate_path('/destination/path')
+
+        provider1.SEGMENTED_DOWNLOADS = segmented
+        provider1.is_celery_task = celery
+        provider1.metadata = utils.MockCoroutine(return_value=utils.MockFileMetadata())
+        provider1.metadata.return_value.size = size
+        provider1.download = utils.MockCoroutine(return_value='Download return')
+        provider1.upload = utils.MockCoroutine(return_value='Upload return')
+
+        await provider1.copy(provider1, src_path, dest_path)
+
+        provider1.download.assert_called_once_with(src_path)
+        provider1.upload.assert_called_once_with('Download return', dest_path)
+
 
 class TestMove:
     @pytest.mark.asyncio
@@ -435,6 +546,7 @@ class TestMove:
             provider1,
             src_path,
             dest_path.child('path', folder=True),
+            can_intra=provider1.can_intra_move,
         )
 
     @pytest.mark.asyncio
@@ -481,3 +593,222 @@ class TestMove:
         assert 'bytes=10-' == provider1._build_range_header((10, None))
         assert 'bytes=10-100' == provider1._build_range_header((10, 100))
         assert 'bytes=-255' == provider1._build_range_header((None, 255))
+
+
+class TestFolderFileOp:
+
+    @pytest.mark.asyncio
+    async def test_copies_whole_tree(self):
+        src = TreeProvider({
+            '/src/': ['a.txt', 'sub/', 'd.txt'],
+            '/src/sub/': ['b.txt', 'deeper/'],
+            '/src/sub/deeper/': ['c.txt'],
+        })
+        dest = TreeProvider({})
+
+        folder, created = await src._folder_file_op(src.copy, dest, WaterButlerPath('/src/'),
+                                                    WaterButlerPath('/dest/'))
+
+        assert created is True
+        assert sorted(dest.uploaded) == ['/dest/a.txt', '/dest/d.txt', '/dest/sub/b.txt',
+                                         '/dest/sub/deeper/c.txt']
+        assert [child.kind for child in folder.children] == ['file', 'folder', 'file']
+        assert [child.kind for child in folder.children[1].children] == ['file', 'folder']
+        assert len(folder.children[1].children[1].children) == 1
+        assert src.provider_metrics.serialize()['_folder_file_ops']['items_completed'] == 6
+
+    @pytest.mark.asyncio
+    async def test_intra_folders_are_passed_to_func(self):
+        src = TreeProvider({'/src/': ['a.txt', 'sub/']})
+        dest = TreeProvider({})
+        copied = []
+
+        async def replicate(dest_provider, src_path, dest_path, **kwargs):
+            copied.append(str(dest_path))
+            return utils.MockFileMetadata(), True
+
+        await src._folder_file_op(replicate, dest, WaterButlerPath('/src/'),
+                                  WaterButlerPath('/dest/'),
+                                  can_intra=lambda dest_provider, path: path.is_dir)
+
+        assert sorted(copied) == ['/dest/a.txt', '/dest/sub/']
+
+    @pytest.mark.asyncio
+    async def test_subfolders_do_not_block_siblings(self, monkeypatch):
+        monkeypatch.setattr(settings, 'OP_CONCURRENCY', 2)
+        src = TreeProvider({
+            '/src/': ['slow/', 'a.txt', 'b.txt', 'c.txt'],
+            '/src/slow/': ['d.txt'],
+        }, delays={'/src/slow/': 0.05})
+        dest = TreeProvider({})
+
+        await src._folder_file_op(src.copy, dest, WaterButlerPath('/src/'),
+                                  WaterButlerPath('/dest/'))
+
+        assert dest.uploaded[-1] == '/dest/slow/d.txt'
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self, monkeypatch):
+        monkeypatch.setattr(settings, 'OP_CONCURRENCY', 3)
+        src = TreeProvider({'/src/': ['{}.txt'.format(i) for i in range(10)]})
+        dest = TreeProvider({})
+
+        await src._folder_file_op(src.copy, dest, WaterButlerPath('/src/'),
+                                  WaterButlerPath('/dest/'))
+
+        assert len(dest.uploaded) == 10
+        assert dest.max_active == 3
+
+    @pytest.mark.asyncio
+    async def test_first_failure_cancels_other_jobs(self, monkeypatch):
+        monkeypatch.setattr(settings, 'OP_CONCURRENCY', 3)
+        src = TreeProvider({'/src/': ['bad.txt', 'slow1.txt', 'slow2.txt', 'never.txt']})
+        dest = TreeProvider({}, fail='/dest/bad.txt',
+                            delays={'/dest/slow1.txt': 10, '/dest/slow2.txt': 10})
+
+        with pytest.raises(exceptions.UploadError):
+            await asyncio.wait_for(src._folder_file_op(src.copy, dest, WaterButlerPath('/src/'),
+                                                       WaterButlerPath('/dest/')), 1)
+
+        assert dest.active == 0
+        assert dest.uploaded == []
+
+
+class FileTreeProvider(TreeProvider):
+    """A `TreeProvider` whose files have sizes and contents, from ``files``, a dict of file path to
+    contents or to `None` for a file of unknown size.  Folders are only listed recursively if
+    ``recursive`` is set.
+    """
+
+    def __init__(self, tree, files, recursive=False):
+        super().__init__(tree)
+        self.files = files
+        self.recursive = recursive
+        self.listed = []
+
+    async def metadata(self, path, **kwargs):
+        self.listed.append(str(path))
+        return await self._list(path)
+
+    async def folder_tree(self, path, **kwargs):
+        if not self.recursive:
+            return None
+        entries = []
+        for folder in self.tree:
+            if folder.startswith(str(path)):
+                for item in await self._list(WaterButlerPath(folder)):
+                    entries.append((item.path[len(str(path)):], item))
+        return self._nest_folder_tree(entries)
+
+    async def _list(self, path):
+        items = await super().metadata(path)
+        for item in items:
+            item.path = str(path) + item.name + ('/' if item.is_folder else '')
+            if not item.is_folder:
+                contents = self.files[str(path) + item.name]
+                item.size_as_int = None if contents is None else len(contents)
+                item.modified_utc = '2019-08-07T06:05:04+00:00'
+                item.etag = 'etag'
+        return items
+
+    async def download(self, path, **kwargs):
+        return streams.StringStream(self.files[str(path)])
+
+
+class TestStoredZip:
+
+    @pytest.fixture
+    def provider(self):
+        return FileTreeProvider({
+            '/src/': ['a.txt', 'sub/'],
+            '/src/sub/': ['b.txt', 'empty/'],
+            '/src/sub/empty/': [],
+        }, {
+            '/src/a.txt': b'[File A]',
+            '/src/sub/b.txt': b'[File B]',
+        })
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        yield
+        wb_cache.metadata_cache.clear()
+
+    @pytest.mark.asyncio
+    async def test_stored_zip(self, provider):
+        archive = await provider.stored_zip(WaterButlerPath('/src/'))
+
+        data = await archive.stream().read()
+
+        assert len(data) == archive.size
+        zip = zipfile.ZipFile(io.BytesIO(data))
+        assert zip.testzip() is None
+        assert [(info.filename, zip.read(info)) for info in zip.infolist()] == [
+            ('a.txt', b'[File A]'),
+            ('sub/b.txt', b'[File B]'),
+            ('sub/empty/', b''),
+        ]
+        assert zip.getinfo('a.txt').date_time == (2019, 8, 7, 6, 5, 4)
+
+    @pytest.mark.asyncio
+    async def test_stored_zip_unknown_size(self, provider):
+        provider.files['/src/sub/b.txt'] = None
+
+        assert await provider.stored_zip(WaterButlerPath('/src/')) is None
+
+    @pytest.mark.asyncio
+    async def test_stored_zip_caches_crcs(self, provider):
+        archive = await provider.stored_zip(WaterButlerPath('/src/'))
+        assert not any(entry.crc_known for entry in archive.entries if entry.original_size)
+        await archive.stream().read()
+
+        archive = await provider.stored_zip(WaterButlerPath('/src/'))
+
+        assert [entry.zinfo.CRC for entry in archive.entries] == [
+            zlib.crc32(b'[File A]'), zlib.crc32(b'[File B]'), 0,
+        ]
+        assert all(entry.crc_known for entry in archive.entries)
+
+    @pytest.mark.asyncio
+    async def test_stored_zip_uses_folder_tree(self, provider):
+        provider.recursive = True
+
+        archive = await provider.stored_zip(WaterButlerPath('/src/'))
+
+        assert [entry.zinfo.filename for entry in archive.entries] == [
+            'a.txt', 'sub/b.txt', 'sub/empty/',
+        ]
+        assert provider.listed == ['/src/']
+
+    @pytest.mark.asyncio
+    async def test_zip_uses_folder_tree(self, provider):
+        provider.recursive = True
+
+        stream = await provider.zip(WaterButlerPath('/src/'))
+
+        zip = zipfile.ZipFile(io.BytesIO(await stream.read()))
+        assert [(info.filename, zip.read(info)) for info in zip.infolist()] == [
+            ('a.txt', b'[File A]'),
+            ('sub/b.txt', b'[File B]'),
+            ('sub/empty/', b''),
+        ]
+        assert provider.listed == ['/src/']
+
+    @pytest.mark.asyncio
+    async def test_zip_lists_each_folder_without_folder_tree(self, provider):
+        stream = await provider.zip(WaterButlerPath('/src/'))
+
+        zip = zipfile.ZipFile(io.BytesIO(await stream.read()))
+        assert [info.filename for info in zip.infolist()] == ['a.txt', 'sub/b.txt', 'sub/empty/']
+        assert provider.listed == ['/src/', '/src/sub/', '/src/sub/empty/']
+
+
+class TestNestFolderTree:
+
+    def test_nest_folder_tree(self):
+        a, b, c, sub = TreeItem('a'), TreeItem('b'), TreeItem('c'), TreeItem('sub', True)
+
+        tree = utils.MockProvider1._nest_folder_tree([
+            ('', TreeItem('', True)), ('sub/b', b), ('a', a), ('sub/', sub), ('missing/c', c),
+        ])
+
+        assert tree == [(a, None), (sub, [(b, None)])]
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from tests import utils
+from waterbutler.core import scheduler as wb_scheduler
+
+
+@pytest.fixture
+def scheduler():
+    return wb_scheduler.RequestScheduler()
+
+
+class TestTokenBucket:
+
+    @pytest.mark.asyncio
+    async def test_burst_is_granted_immediately(self):
+        bucket = wb_scheduler.TokenBucket(rate=1, burst=3)
+
+        for _ in range(3):
+            assert await bucket.acquire() == 0.0
+
+        assert bucket.granted == 3
+        assert bucket.queued == 0
+
+    @pytest.mark.asyncio
+    async def test_waits_for_refill(self):
+        bucket = wb_scheduler.TokenBucket(rate=50, burst=1)
+        await bucket.acquire()
+
+        waited = await bucket.acquire()
+
+        assert waited > 0
+        assert bucket.queued == 1
+        assert bucket.queued_time == waited
+
+    @pytest.mark.asyncio
+    async def test_waiters_are_served_in_order(self):
+        bucket = wb_scheduler.TokenBucket(rate=100, burst=1)
+        await bucket.acquire()
+        order = []
+
+        async def request(i):
+            await bucket.acquire()
+            order.append(i)
+
+        await asyncio.wait([asyncio.ensure_future(request(i)) for i in range(5)])
+
+        assert order == [0, 1, 2, 3, 4]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_is_skipped(self):
+        bucket = wb_scheduler.TokenBucket(rate=20, burst=1)
+        await bucket.acquire()
+
+        cancelled = asyncio.ensure_future(bucket.acquire())
+        waiting = asyncio.ensure_future(bucket.acquire())
+        await asyncio.sleep(0)
+        cancelled.cancel()
+
+        await asyncio.wait_for(waiting, 1)
+
+        assert cancelled.cancelled()
+        assert bucket.waiting == 0
+
+
+class TestRequestScheduler:
+
+    @pytest.mark.asyncio
+    async def test_zero_rate_disables_scheduling(self, scheduler):
+        for _ in range(5):
+            assert await scheduler.acquire('key', 0, 1) == 0.0
+
+        assert scheduler.stats() == {}
+
+    @pytest.mark.asyncio
+    async def test_keys_are_isolated(self, scheduler):
+        await scheduler.acquire(('dropbox', 'api.dropboxapi.com'), 0.01, 1)
+
+        waited = await asyncio.wait_for(
+            scheduler.acquire(('s3', 's3.amazonaws.com'), 0.01, 1), 1
+        )
+
+        assert waited == 0.0
+        assert len(scheduler.stats()) == 2
+
+    @pytest.mark.asyncio
+    async def test_stats(self, scheduler):
+        await scheduler.acquire('key', 100, 1)
+        await scheduler.acquire('key', 100, 1)
+
+        stats = scheduler.stats()['key']
+        assert stats['granted'] == 2
+        assert stats['queued'] == 1
+        assert stats['queued_time'] > 0
+        assert stats['waiting'] == 0
+
+
+class TestProviderBucketKey:
+
+    def test_default_key_is_name_and_host(self):
+        provider = utils.MockProvider1({}, {}, {})
+
+        key = provider.request_bucket_key('https://API.example.com/foo?bar=baz')
+
+        assert key == ('MockProvider1', 'api.example.com')
@@ -0,0 +1,170 @@
+import asyncio
+
+import pytest
+
+from tests import utils
+from waterbutler.core import singleflight as wb_singleflight
+from waterbutler.core.path import WaterButlerPath
+
+
+@pytest.fixture
+def singleflight(monkeypatch):
+    singleflight = wb_singleflight.SingleFlight()
+    monkeypatch.setattr(wb_singleflight, 'singleflight', singleflight)
+    return singleflight
+
+
+class SlowProvider(utils.MockProvider1):
+
+    NAME = 'SlowProvider'
+    COALESCE_REQUESTS = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = 0
+
+    async def metadata(self, path, throw=None, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if throw:
+            raise throw
+        return {'path': str(path), 'kwargs': kwargs}
+
+
+class TestKeys:
+
+    def test_stable_hash_ignores_dict_order(self):
+        assert (wb_singleflight.stable_hash({'a': 1, 'b': 2}) ==
+                wb_singleflight.stable_hash({'b': 2, 'a': 1}))
+
+    def test_path_key_includes_ids(self):
+        one = WaterButlerPath('/foo/bar.txt', _ids=('root', 'foo', 'one'))
+        two = WaterButlerPath('/foo/bar.txt', _ids=('root', 'foo', 'two'))
+
+        assert wb_singleflight.path_key(one) != wb_singleflight.path_key(two)
+        assert wb_singleflight.path_key(one) == wb_singleflight.path_key(
+            WaterButlerPath('/foo/bar.txt', _ids=('root', 'foo', 'one'))
+        )
+
+    def test_path_key_of_string(self):
+        assert wb_singleflight.path_key('/foo/bar.txt') == '/foo/bar.txt'
+
+
+class TestSingleFlight:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_are_coalesced(self, singleflight):
+        calls = []
+
+        async def fetch(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return {'value': value}
+
+        results = await asyncio.gather(*[singleflight.do('key', fetch, 1) for _ in range(5)])
+
+        assert calls == [1]
+        assert all(result == {'value': 1} for result in results)
+        assert len(set(id(result) for result in results)) == 5
+        assert singleflight.started == 1
+        assert singleflight.joined == 4
+        assert singleflight.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_leader_changes_are_not_seen_by_joined_callers(self, singleflight):
+        async def fetch():
+            await asyncio.sleep(0.01)
+            return {'items': [1]}
+
+        async def fetch_and_change():
+            result = await singleflight.do('key', fetch)
+            result['items'].append(2)
+            return result
+
+        leader = asyncio.ensure_future(fetch_and_change())
+        await asyncio.sleep(0)
+        joined = await singleflight.do('key', fetch)
+
+        assert (await leader) == {'items': [1, 2]}
+        assert joined == {'items': [1]}
+
+    @pytest.mark.asyncio
+    async def test_sequential_calls_are_not_coalesced(self, singleflight):
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+
+        await singleflight.do('key', fetch)
+        await singleflight.do('key', fetch)
+
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_exceptions_are_shared(self, singleflight):
+        async def fetch():
+            await asyncio.sleep(0.01)
+            raise ValueError('nope')
+
+        results = await asyncio.gather(*[singleflight.do('key', fetch) for _ in range(3)],
+                                       return_exceptions=True)
+
+        assert all(isinstance(result, ValueError) for result in results)
+        assert singleflight.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_others(self, singleflight):
+        async def fetch():
+            await asyncio.sleep(0.01)
+            return 'done'
+
+        first = asyncio.ensure_future(singleflight.do('key', fetch))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(singleflight.do('key', fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert await second == 'done'
+
+
+class TestProviderCoalescing:
+
+    @pytest.mark.asyncio
+    async def test_metadata_is_coalesced(self, singleflight):
+        provider = SlowProvider({}, {'token': 'a'}, {'folder': '/'})
+        other = SlowProvider({}, {'token': 'a'}, {'folder': '/'})
+        path = WaterButlerPath('/foo/')
+
+        results = await asyncio.gather(provider.metadata(path), other.metadata(path))
+
+        assert provider.calls + other.calls == 1
+        assert results[0] == results[1]
+
+    @pytest.mark.asyncio
+    async def test_different_credentials_are_not_coalesced(self, singleflight):
+        provider = SlowProvider({}, {'token': 'a'}, {'folder': '/'})
+        other = SlowProvider({}, {'token': 'b'}, {'folder': '/'})
+        path = WaterButlerPath('/foo/')
+
+        await asyncio.gather(provider.metadata(path), other.metadata(path))
+
+        assert provider.calls == 1
+        assert other.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_different_revisions_are_not_coalesced(self, singleflight):
+        provider = SlowProvider({}, {'token': 'a'}, {'folder': '/'})
+        path = WaterButlerPath('/foo.txt')
+
+        await asyncio.gather(provider.metadata(path, revision='1'),
+                             provider.metadata(path, revision='2'))
+
+        assert provider.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_default(self, singleflight):
+        provider = utils.MockProvider1({}, {}, {})
+
+        await asyncio.gather(provider.metadata('/foo/'), provider.metadata('/foo/'))
+
+        assert singleflight.started == 0
@@ -4,6 +4,9 @@ from unittest import mock
 import pytest
 
 from waterbutler.core import utils
+from waterbutler.core import streams
+from waterbutler.core.path import WaterButlerPath
+from waterbutler.core.streams import settings as stream_settings
 
 
 class TestAsyncRetry:
@@ -159,3 +162,156 @@ class TestContentDisposition:
     def test_disposition_encoding(self, filename, expected):
         encoded = utils.encode_for_disposition(filename)
         assert encoded == expected
+
+
+class TreeMetadata:
+
+    def __init__(self, name, children=None, size=None, content_type=None):
+        self.name = name
+        self.children = children
+        self.is_folder = children is not None
+        self.size_as_int = size
+        self.content_type = content_type
+
+
+class TreeProvider:
+    """Serves a folder tree of `TreeMetadata`, recording the folders listed and the files opened.
+    Downloads wait for ``release`` unless it is set.
+    """
+
+    def __init__(self, *children):
+        self.root = TreeMetadata('', list(children))
+        self.listed, self.opened = [], []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    def path_from_metadata(self, parent_path, metadata):
+        return parent_path.child(metadata.name, folder=metadata.is_folder)
+
+    def find(self, path):
+        node = self.root
+        for part in path.parts[1:]:
+            node = next(child for child in node.children if child.name == part.value)
+        return node
+
+    async def metadata(self, path):
+        self.listed.append(path.path)
+        return self.find(path).children
+
+    async def download(self, path):
+        self.opened.append(path.path)
+        await self.release.wait()
+        return streams.StringStream(path.name)
+
+
+class TestZipStreamGenerator:
+
+    @pytest.fixture
+    def provider(self):
+        return TreeProvider(
+            TreeMetadata('a.txt', size=10, content_type='text/plain'),
+            TreeMetadata('sub', [
+                TreeMetadata('b.txt', size=10),
+                TreeMetadata('empty', []),
+            ]),
+            TreeMetadata('c.txt', size=10),
+        )
+
+    async def entries(self, generator):
+        result = []
+        async for name, stream, *_ in generator:
+            result.append((name, await stream.read()))
+        return result
+
+    @pytest.mark.asyncio
+    async def test_entries_are_breadth_first(self, provider):
+        root = WaterButlerPath('/')
+        generator = utils.ZipStreamGenerator(provider, root, *provider.root.children)
+
+        assert await self.entries(generator) == [
+            ('a.txt', b'a.txt'),
+            ('c.txt', b'c.txt'),
+            ('sub/b.txt', b'b.txt'),
+            ('sub/empty/', b''),
+        ]
+        assert provider.listed == ['sub/', 'sub/empty/']
+
+    @pytest.mark.asyncio
+    async def test_prefetches_downloads_and_listings(self, provider):
+        root = WaterButlerPath('/')
+        with mock.patch.object(stream_settings, 'ZIP_PREFETCH_COUNT', 2):
+            generator = utils.ZipStreamGenerator(provider, root, *provider.root.children)
+
+        name, *_ = await generator.__anext__()
+
+        assert name == 'a.txt'
+        assert provider.opened == ['a.txt', 'c.txt']
+        assert provider.listed == ['sub/']
+
+    @pytest.mark.asyncio
+    async def test_prefetch_is_bounded_by_size(self, provider):
+        root = WaterButlerPath('/')
+        with mock.patch.object(stream_settings, 'ZIP_PREFETCH_SIZE', 15):
+            generator = utils.ZipStreamGenerator(provider, root, *provider.root.children)
+
+        await generator.__anext__()
+        assert provider.opened == ['a.txt']
+
+        await generator.__anext__()
+        assert provider.opened == ['a.txt', 'c.txt']
+
+    @pytest.mark.asyncio
+    async def test_close_cancels_prefetches(self, provider):
+        root = WaterButlerPath('/')
+        generator = utils.ZipStreamGenerator(provider, root, *provider.root.children)
+        provider.release.clear()
+
+        next_entry = asyncio.ensure_future(generator.__anext__())
+        await asyncio.sleep(0.01)
+        prefetched = [entry.task for entry in generator.remaining]
+        generator.close()
+        next_entry.cancel()
+        await asyncio.sleep(0)
+
+        assert provider.opened == ['a.txt', 'c.txt']
+        assert all(task.cancelled() or task.done() for task in prefetched)
+        assert not generator.remaining
+
+    @pytest.mark.asyncio
+    async def test_files_have_their_content_type(self, provider):
+        root = WaterButlerPath('/')
+        generator = utils.ZipStreamGenerator(provider, root, *provider.root.children)
+
+        name, stream, content_type = await generator.__anext__()
+        assert (name, content_type) == ('a.txt', 'text/plain')
+
+        name, stream, content_type = await generator.__anext__()
+        assert (name, content_type) == ('c.txt', None)
+
+    @pytest.mark.asyncio
+    async def test_tree_folders_are_not_listed(self, provider):
+        def tree(node):
+            return [(child, tree(child) if child.is_folder else None) for child in node.children]
+
+        root = WaterButlerPath('/')
+        generator = utils.ZipStreamGenerator(provider, root, tree=tree(provider.root))
+
+        assert await self.entries(generator) == [
+            ('a.txt', b'a.txt'),
+            ('c.txt', b'c.txt'),
+            ('sub/b.txt', b'b.txt'),
+            ('sub/empty/', b''),
+        ]
+        assert provider.listed == []
+
+    @pytest.mark.asyncio
+    async def test_tree_folders_without_children_are_listed(self, provider):
+        a_txt, sub, c_txt = provider.root.children
+        root = WaterButlerPath('/')
+        generator = utils.ZipStreamGenerator(provider, root,
+                                             tree=[(a_txt, None), (sub, None), (c_txt, None)])
+
+        assert [name for name, _ in await self.entries(generator)] == [
+            'a.txt', 'c.txt', 'sub/b.txt', 'sub/empty/'
+        ]
+        assert provider.listed == ['sub/', 'sub/empty/']
@@ -1,11 +1,14 @@
 import io
 import json
+import asyncio
 from http import HTTPStatus
+from unittest import mock
 
 import pytest
 import aiohttpretty
 
 from waterbutler.core import streams
+from waterbutler.core import buffers
 from waterbutler.core import exceptions
 from waterbutler.core.path import WaterButlerPath
 
@@ -573,6 +576,63 @@ class TestUpload:
             'Digest': 'sha={}'.format('pz4mZbOEOesBeUhR1THUF1Oq1bI=')
         }
 
+    @pytest.mark.asyncio
+    async def test_upload_parts_spools_past_budget(self, provider, root_provider_fixtures,
+                                                   monkeypatch):
+        budget = buffers.ByteBudget(10)
+        monkeypatch.setattr(buffers, 'part_budget', budget)
+        uploaded = []
+
+        async def upload_part(data, part_id, part_size, part_sha_b64, start_offset, total_size,
+                              session_id):
+            # the first part finishes last
+            await asyncio.sleep(0.01 if part_id == '0' else 0)
+            body = data if isinstance(data, bytes) else data.read()
+            uploaded.append((part_id, isinstance(data, bytes), body, part_sha_b64, start_offset))
+            return {'part_id': part_id}
+
+        provider._upload_part = upload_part
+        session_metadata = root_provider_fixtures['create_session_metadata']
+        stream = streams.StringStream('tenbytestr'.encode() * 2)
+
+        parts_metadata = await provider._upload_parts(stream, session_metadata)
+
+        assert parts_metadata == [{'part_id': '0'}, {'part_id': '1'}]
+        assert sorted(uploaded) == [
+            ('0', True, b'tenbytestr', 'pz4mZbOEOesBeUhR1THUF1Oq1bI=', 0),
+            ('1', False, b'tenbytestr', 'pz4mZbOEOesBeUhR1THUF1Oq1bI=', 10),
+        ]
+        assert budget.available == 10
+
+    @pytest.mark.asyncio
+    async def test_upload_part_retry_rewinds_spilled_part(self, provider, monkeypatch):
+        monkeypatch.setattr(asyncio, 'sleep', MockCoroutine())
+        sent = []
+
+        async def make_request(method, url, data=None, **kwargs):
+            sent.append(data.read())
+            if len(sent) == 1:
+                raise exceptions.UploadError('bad gateway', code=HTTPStatus.BAD_GATEWAY)
+            return mock.Mock(json=MockCoroutine(return_value={'part': {'part_id': '0'}}))
+
+        provider.make_request = make_request
+
+        part = await provider._upload_part(io.BytesIO(b'tenbytestr'), '0', 10,
+                                           'pz4mZbOEOesBeUhR1THUF1Oq1bI=', 0, 10, 'session')
+
+        assert part == {'part_id': '0'}
+        assert sent == [b'tenbytestr', b'tenbytestr']
+        assert provider.provider_metrics.serialize()['upload_parts'] == {'retries': 1}
+
+    @pytest.mark.asyncio
+    async def test_upload_parts_failure(self, provider, root_provider_fixtures):
+        provider._upload_part = MockCoroutine(side_effect=exceptions.UploadError('nope'))
+        session_metadata = root_provider_fixtures['create_session_metadata']
+        stream = streams.StringStream('tenbytestr'.encode() * 2)
+
+        with pytest.raises(exceptions.UploadError):
+            await provider._upload_parts(stream, session_metadata)
+
     @pytest.mark.asyncio
     @pytest.mark.aiohttpretty
     async def test_complete_chunked_upload_session(self, provider, root_provider_fixtures):
@@ -12,6 +12,7 @@ from waterbutler.core import streams, exceptions
 from waterbutler.core.path import WaterButlerPath
 from waterbutler.providers.cloudfiles import CloudFilesProvider
 from waterbutler.providers.cloudfiles import settings as cloud_settings
+from waterbutler.providers.cloudfiles.provider import connection_cache
 
 
 @pytest.fixture
@@ -36,6 +37,13 @@ def settings():
     return {'container': 'purple rain'}
 
 
+@pytest.fixture(autouse=True)
+def clear_connection_cache():
+    connection_cache.clear()
+    yield
+    connection_cache.clear()
+
+
 @pytest.fixture
 def provider(auth, credentials, settings):
     return CloudFilesProvider(auth, credentials, settings)
@@ -721,6 +729,60 @@ class TestOperations:
         assert aiohttpretty.has_call(method='POST', uri=token_url)
         assert aiohttpretty.has_call(method='HEAD', uri=endpoint)
 
+    @pytest.mark.asyncio
+    @pytest.mark.aiohttpretty
+    async def test_ensure_connection_is_shared(self, auth, credentials, settings, auth_json,
+                                               mock_temp_key, endpoint, mock_time):
+        aiohttpretty.register_json_uri('POST', cloud_settings.AUTH_URL, body=auth_json)
+
+        first = CloudFilesProvider(auth, credentials, settings)
+        await first._ensure_connection()
+        second = CloudFilesProvider(auth, credentials, settings)
+        await second._ensure_connection()
+
+        assert len(aiohttpretty.calls) == 2  # one token request, one temp url key request
+        assert second.token == first.token
+        assert second.endpoint == endpoint
+        assert second.temp_url_key == first.temp_url_key
+
+    @pytest.mark.asyncio
+    @pytest.mark.aiohttpretty
+    async def test_ensure_connection_keyed_by_api_key(self, auth, credentials, settings,
+                                                      auth_json, mock_temp_key, mock_time):
+        aiohttpretty.register_json_uri('POST', cloud_settings.AUTH_URL, body=auth_json)
+
+        await CloudFilesProvider(auth, credentials, settings)._ensure_connection()
+        credentials['token'] = 'counterrevolutionary'
+        await CloudFilesProvider(auth, credentials, settings)._ensure_connection()
+
+        assert len([call for call in aiohttpretty.calls if call['method'] == 'POST']) == 2
+
+    @pytest.mark.asyncio
+    @pytest.mark.aiohttpretty
+    async def test_ensure_connection_expiring_token_is_not_cached(self, provider, auth_json,
+                                                                  mock_temp_key):
+        # the token in auth_json expired in 2014
+        aiohttpretty.register_json_uri('POST', cloud_settings.AUTH_URL, body=auth_json)
+
+        await provider._ensure_connection()
+
+        assert len(connection_cache) == 0
+
+    @pytest.mark.asyncio
+    @pytest.mark.aiohttpretty
+    async def test_unauthorized_invalidates_connection(self, provider, auth_json,
+                                                       mock_temp_key, mock_time):
+        aiohttpretty.register_json_uri('POST', cloud_settings.AUTH_URL, body=auth_json)
+        await provider._ensure_connection()
+        path = WaterButlerPath('/foo.txt')
+        aiohttpretty.register_uri('HEAD', provider.build_url(path.path), status=401)
+
+        with pytest.raises(exceptions.MetadataError):
+            await provider.metadata(path)
+
+        assert provider.token is None
+        assert len(connection_cache) == 0
+
     def test_can_duplicate_names(self, connected_provider):
         assert connected_provider.can_duplicate_names() is False
 
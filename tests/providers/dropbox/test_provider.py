@@ -624,6 +624,64 @@ class TestMetadata:
             await provider.metadata(path)
 
 
+class TestFolderTree:
+
+    @staticmethod
+    def entry(tag, path_display):
+        return {
+            '.tag': tag,
+            'id': 'id:' + path_display,
+            'name': path_display.rsplit('/', 1)[1],
+            'path_lower': path_display.lower(),
+            'path_display': path_display,
+        }
+
+    @pytest.mark.asyncio
+    @pytest.mark.aiohttpretty
+    async def test_folder_tree_pages_through_continue(self, provider):
+        path = await provider.validate_path('/Stuff/')
+        url = provider.build_url('files', 'list_folder')
+        aiohttpretty.register_json_uri(
+            'POST',
+            url,
+            data={'path': '/Photos/Stuff', 'recursive': True},
+            body={
+                'entries': [
+                    # The listed folder comes back as an entry of its own
+                    self.entry('folder', '/Photos/Stuff'),
+                    self.entry('folder', '/Photos/Stuff/Sub'),
+                ],
+                'has_more': True,
+                'cursor': 'first-page',
+            },
+        )
+        aiohttpretty.register_json_uri(
+            'POST',
+            url + '/continue',
+            data={'cursor': 'first-page'},
+            body={
+                'entries': [
+                    self.entry('file', '/Photos/Stuff/Sub/b.txt'),
+                    self.entry('file', '/Photos/Stuff/a.txt'),
+                ],
+                'has_more': False,
+                'cursor': 'second-page',
+            },
+        )
+
+        tree = await provider.folder_tree(path)
+
+        assert [item.name for item, _ in tree] == ['Sub', 'a.txt']
+        (sub, sub_children), (a_txt, a_txt_children) = tree
+        assert isinstance(sub, DropboxFolderMetadata)
+        assert sub.path == '/Stuff/Sub/'
+        assert [(item.name, children) for item, children in sub_children] == [('b.txt', None)]
+        assert isinstance(a_txt, DropboxFileMetadata)
+        assert a_txt_children is None
+        assert aiohttpretty.has_call(method='POST', uri=url)
+        assert aiohttpretty.has_call(method='POST', uri=url + '/continue')
+
+
 class TestCreateFolder:
 
     @pytest.mark.asyncio
@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from waterbutler.providers.github.cache import TreeCache
+
+
+def tree_body(*paths):
+    return json.dumps({
+        'sha': 'abc',
+        'truncated': False,
+        'tree': [{'path': path, 'type': 'blob', 'sha': path} for path in paths],
+    }).encode('utf-8')
+
+
+class TestTreeCache:
+
+    @pytest.mark.asyncio
+    async def test_get_set(self):
+        cache = TreeCache(1024)
+        key = TreeCache.key('cat', 'food', 'abc', True)
+        await cache.set(key, tree_body('a.txt'))
+
+        assert await cache.get(key) == tree_body('a.txt')
+        assert await cache.get(TreeCache.key('cat', 'food', 'abc', False)) is None
+        assert await cache.get(TreeCache.key('dog', 'food', 'abc', True)) is None
+
+    @pytest.mark.asyncio
+    async def test_bounded_by_bytes(self):
+        body = tree_body('a.txt')
+        cache = TreeCache(len(body) * 2)
+        await cache.set('one', body)
+        await cache.set('two', body)
+        await cache.get('one')
+        await cache.set('three', body)
+
+        assert await cache.get('one') == body
+        assert await cache.get('two') is None
+        assert cache.size == len(body) * 2
+
+    @pytest.mark.asyncio
+    async def test_oversized_bodies_are_not_cached(self):
+        cache = TreeCache(4)
+        await cache.set('one', tree_body('a.txt'))
+
+        assert len(cache) == 0
+        assert cache.size == 0
+
+    @pytest.mark.asyncio
+    async def test_index(self):
+        body = tree_body('a.txt', 'b/c.txt')
+        cache = TreeCache(len(body) * 2)
+        await cache.set('one', body)
+
+        assert cache.get_index('one') is None
+        index = cache.set_index('one', json.loads(body.decode('utf-8')))
+
+        assert set(index) == {'a.txt', 'b/c.txt'}
+        assert cache.get_index('one') is index
+        assert cache.size == len(body) * 2
+
+    @pytest.mark.asyncio
+    async def test_index_counts_towards_size(self):
+        body = tree_body('a.txt')
+        cache = TreeCache(len(body) * 2)
+        await cache.set('one', body)
+        await cache.set('two', body)
+        cache.set_index('two', json.loads(body.decode('utf-8')))
+
+        assert await cache.get('one') is None
+        assert cache.get_index('two') is not None
+
+    @pytest.mark.asyncio
+    async def test_disk_tier(self, tmpdir):
+        body = tree_body('a.txt')
+        await TreeCache(1024, disk_dir=str(tmpdir)).set('one', body)
+        cache = TreeCache(1024, disk_dir=str(tmpdir))
+
+        assert await cache.get('one') == body
+        assert len(cache) == 1
+
+    @pytest.mark.asyncio
+    async def test_disk_tier_is_pruned(self, tmpdir):
+        body = tree_body('a.txt')
+        cache = TreeCache(1024, disk_dir=str(tmpdir), disk_max_bytes=len(body))
+        await cache.set('one', body)
+        await cache.set('two', body)
+
+        assert len(tmpdir.listdir()) == 1
+
+    @pytest.mark.asyncio
+    async def test_corrupt_disk_entries_are_misses(self, tmpdir):
+        cache = TreeCache(1024, disk_dir=str(tmpdir))
+        tmpdir.join(cache._path('one').rsplit('/', 1)[1]).write('{not json')
+
+        assert await cache.get('one') is None
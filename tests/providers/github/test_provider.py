@@ -14,6 +14,7 @@ import aiohttpretty
 from waterbutler.core import streams, exceptions
 from waterbutler.providers.github import GitHubProvider
 from waterbutler.providers.github.path import GitHubPath
+from waterbutler.providers.github.cache import tree_cache
 from waterbutler.providers.github.metadata import (GitHubRevision,
                                                    GitHubFileTreeMetadata,
                                                    GitHubFolderTreeMetadata,
@@ -83,6 +84,13 @@ def file_stream(file_like):
     return streams.FileStreamReader(file_like)
 
 
+@pytest.fixture(autouse=True)
+def clear_tree_cache():
+    tree_cache.clear()
+    yield
+    tree_cache.clear()
+
+
 @pytest.fixture
 def provider(auth, credentials, settings, provider_fixtures):
     provider = GitHubProvider(auth, credentials, settings)
@@ -1012,6 +1020,70 @@ class TestMetadata:
         assert result == expected
 
 
+class TestFolderTree:
+
+    @pytest.mark.asyncio
+    @pytest.mark.aiohttpretty
+    async def test_folder_tree_fetches_tree_per_subfolder(self, provider):
+        path = GitHubPath(
+            '/test/', _ids=[(provider.default_branch, ''), (provider.default_branch, '')]
+        )
+        contents_url = furl.furl(provider.build_repo_url('contents', '/test/'))
+        contents_url.args.update({'ref': path.branch_ref})
+        aiohttpretty.register_json_uri('GET', contents_url, body=[
+            {'name': 'one', 'path': 'test/one', 'type': 'dir', 'sha': 'one-sha'},
+            {'name': 'two', 'path': 'test/two', 'type': 'dir', 'sha': 'two-sha'},
+            {'name': 'a.txt', 'path': 'test/a.txt', 'type': 'file', 'sha': 'a-sha', 'size': 1,
+             'html_url': 'https://github.com/cat/food/blob/master/test/a.txt'},
+        ])
+        one_url = provider.build_repo_url('git', 'trees', 'one-sha', recursive=1)
+        aiohttpretty.register_json_uri('GET', one_url, body={'truncated': False, 'tree': [
+            {'path': 'inner', 'type': 'tree', 'sha': 'inner-sha'},
+            {'path': 'inner/b.txt', 'type': 'blob', 'sha': 'b-sha', 'size': 2},
+            # submodules have nothing to download
+            {'path': 'module', 'type': 'commit', 'sha': 'module-sha'},
+        ]})
+        two_url = provider.build_repo_url('git', 'trees', 'two-sha', recursive=1)
+        aiohttpretty.register_json_uri('GET', two_url, body={'truncated': False, 'tree': [
+            {'path': 'c.txt', 'type': 'blob', 'sha': 'c-sha', 'size': 3},
+        ]})
+
+        tree = await provider.folder_tree(path)
+
+        def names(items):
+            return [(item.name, None if children is None else names(children))
+                    for item, children in items]
+
+        assert names(tree) == [
+            ('one', [('inner', [('b.txt', None)])]),
+            ('two', [('c.txt', None)]),
+            ('a.txt', None),
+        ]
+        inner, inner_children = tree[0][1][0]
+        assert isinstance(inner, GitHubFolderTreeMetadata)
+        assert inner.path == '/test/one/inner/'
+        assert isinstance(inner_children[0][0], GitHubFileTreeMetadata)
+        assert inner_children[0][0].path == '/test/one/inner/b.txt'
+        assert aiohttpretty.has_call(method='GET', uri=one_url)
+        assert aiohttpretty.has_call(method='GET', uri=two_url)
+
+    @pytest.mark.asyncio
+    @pytest.mark.aiohttpretty
+    async def test_folder_tree_truncated(self, provider):
+        path = GitHubPath(
+            '/test/', _ids=[(provider.default_branch, ''), (provider.default_branch, '')]
+        )
+        contents_url = furl.furl(provider.build_repo_url('contents', '/test/'))
+        contents_url.args.update({'ref': path.branch_ref})
+        aiohttpretty.register_json_uri('GET', contents_url, body=[
+            {'name': 'one', 'path': 'test/one', 'type': 'dir', 'sha': 'one-sha'},
+        ])
+        one_url = provider.build_repo_url('git', 'trees', 'one-sha', recursive=1)
+        aiohttpretty.register_json_uri('GET', one_url, body={'truncated': True, 'tree': []})
+
+        assert await provider.folder_tree(path) is None
+
+
 class TestIntra:
 
     @pytest.mark.asyncio
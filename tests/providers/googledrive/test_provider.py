@@ -13,6 +13,7 @@ from waterbutler.core import exceptions
 from waterbutler.core.path import WaterButlerPath
 
 from waterbutler.providers.googledrive import settings as ds
+from waterbutler.providers.googledrive import provider as drive_provider
 from waterbutler.providers.googledrive import GoogleDriveProvider
 from waterbutler.providers.googledrive import utils as drive_utils
 from waterbutler.providers.googledrive.provider import GoogleDrivePath
@@ -80,6 +81,13 @@ def other_provider(auth, other_credentials, settings):
     return GoogleDriveProvider(auth, other_credentials, settings)
 
 
+@pytest.fixture(autouse=True)
+def path_cache():
+    drive_provider.path_cache.clear()
+    yield drive_provider.path_cache
+    drive_provider.path_cache.clear()
+
+
 @pytest.fixture
 def search_for_file_response():
     return {
@@ -369,6 +377,161 @@ class TestValidatePath:
         assert result.name in path.name
 
 
+class TestPathCache:
+
+    @pytest.fixture(autouse=True)
+    def enable_path_cache(self, provider):
+        provider.PATH_CACHE_TTL = 60
+
+    def register_lookup(self, provider, search_for_file_response, actual_file_response):
+        file_id = '1234ideclarethumbwar'
+        query_url = provider.build_url(
+            'files', provider.folder['id'], 'children',
+            q=_build_title_search_query(provider, 'file.txt', False),
+            fields='items(id)'
+        )
+        specific_url = provider.build_url('files', file_id, fields='id,title,mimeType')
+        aiohttpretty.register_json_uri('GET', query_url, body=search_for_file_response)
+        aiohttpretty.register_json_uri('GET', specific_url, body=actual_file_response)
+
+    @pytest.mark.asyncio
+    @pytest.mark.aiohttpretty
+    async def test_warm_lookup_makes_no_requests(self, provider, search_for_file_response,
+                                                 actual_file_response):
+        self.register_lookup(provider, search_for_file_response, actual_file_response)
+
+        first = await provider.validate_v1_path('/file.txt')
+        assert len(aiohttpretty.calls) == 2
+
+        second = await provider.validate_v1_path('/file.txt')
+        assert len(aiohttpretty.calls) == 2
+        assert first == second
+
+    @pytest.mark.asyncio
+    @pytest.mark.aiohttpretty
+    async def test_kind_is_part_of_key(self, provider, search_for_file_response,
+                                       actual_file_response, no_folder_response):
+        self.register_lookup(provider, search_for_file_response, actual_file_response)
+        wrong_query_url = provider.build_url(
+            'files', provider.folder['id'], 'children',
+            q=_build_title_search_query(provider, 'file.txt', True),
+            fields='items(id)'
+        )
+        aiohttpretty.register_json_uri('GET', wrong_query_url, body=no_folder_response)
+
+        await provider.validate_v1_path('/file.txt')
+
+        with pytest.raises(exceptions.NotFoundError):
+            await provider.validate_v1_path('/file.txt/')
+
+    @pytest.mark.asyncio
+    @pytest.mark.aiohttpretty
+    async def test_delete_invalidates_parent(self, provider, search_for_file_response,
+                                             actual_file_response):
+        self.register_lookup(provider, search_for_file_response, actual_file_response)
+        path = await provider.validate_v1_path('/file.txt')
+        aiohttpretty.register_uri('PUT', provider.build_url('files', path.identifier), status=200)
+
+        await provider.delete(path)
+        await provider.validate_v1_path('/file.txt')
+
+        assert len(aiohttpretty.calls) == 5
+
+    @pytest.mark.asyncio
+    @pytest.mark.aiohttpretty
+    async def test_caches_lookup_keys_only(self, provider, path_cache, search_for_file_response,
+                                           actual_file_response):
+        actual_file_response = dict(actual_file_response, labels={'trashed': False})
+        self.register_lookup(provider, search_for_file_response, actual_file_response)
+
+        await provider.validate_v1_path('/file.txt')
+
+        cached = path_cache.get(provider.folder['id'], provider._path_cache_key('file.txt', False))
+        assert sorted(cached) == ['id', 'mimeType', 'title']
+
+    @pytest.mark.asyncio
+    @pytest.mark.aiohttpretty
+    async def test_delete_rechecks_cached_target(self, provider, search_for_file_response,
+                                                 actual_file_response):
+        actual_file_response = dict(actual_file_response, title='file.txt')
+        self.register_lookup(provider, search_for_file_response, actual_file_response)
+        path = await provider.validate_v1_path('/file.txt')
+        check_url = provider.build_url('files', path.identifier,
+                                       fields='labels(trashed),parents(id)')
+        aiohttpretty.register_json_uri('GET', check_url, body={
+            'labels': {'trashed': False},
+            'parents': [{'id': provider.folder['id']}],
+        })
+        aiohttpretty.register_uri('PUT', provider.build_url('files', path.identifier), status=200)
+
+        await provider.delete(path)
+
+        assert aiohttpretty.has_call(method='GET', uri=check_url)
+        assert aiohttpretty.has_call(method='PUT',
+                                     uri=provider.build_url('files', path.identifier))
+
+    @pytest.mark.asyncio
+    @pytest.mark.aiohttpretty
+    async def test_delete_of_stale_cached_target(self, provider, search_for_file_response,
+                                                 actual_file_response, no_folder_response):
+        actual_file_response = dict(actual_file_response, title='file.txt')
+        self.register_lookup(provider, search_for_file_response, actual_file_response)
+        path = await provider.validate_v1_path('/file.txt')
+
+        # Trashed by another process, so the lookup now finds nothing
+        aiohttpretty.register_json_uri(
+            'GET',
+            provider.build_url('files', path.identifier, fields='labels(trashed),parents(id)'),
+            body={'labels': {'trashed': True}, 'parents': [{'id': provider.folder['id']}]},
+        )
+        aiohttpretty.register_json_uri(
+            'GET',
+            provider.build_url('files', provider.folder['id'], 'children',
+                               q=_build_title_search_query(provider, 'file.txt', False),
+                               fields='items(id)'),
+            body=no_folder_response,
+        )
+
+        with pytest.raises(exceptions.NotFoundError):
+            await provider.delete(path)
+
+        assert not aiohttpretty.has_call(method='PUT',
+                                         uri=provider.build_url('files', path.identifier))
+
+    @pytest.mark.asyncio
+    @pytest.mark.aiohttpretty
+    async def test_disabled(self, provider, search_for_file_response, actual_file_response):
+        provider.PATH_CACHE_TTL = 0
+        self.register_lookup(provider, search_for_file_response, actual_file_response)
+
+        await provider.validate_v1_path('/file.txt')
+        await provider.validate_v1_path('/file.txt')
+
+        assert len(aiohttpretty.calls) == 4
+
+
+class TestRevalidateChildren:
+
+    @pytest.mark.asyncio
+    @pytest.mark.aiohttpretty
+    async def test_skips_same_named_form(self, provider):
+        base = GoogleDrivePath('/', _ids=[provider.folder['id']], folder=True)
+        list_url = provider.build_url('files', q=provider._build_query(provider.folder['id']),
+                                      alt='json', maxResults=1000)
+        aiohttpretty.register_json_uri('GET', list_url, body={'items': [
+            {'id': 'form-id', 'title': 'survey', 'mimeType': 'application/vnd.google-apps.form'},
+            {'id': 'file-id', 'title': 'survey', 'mimeType': 'text/plain'},
+            {'id': 'map-id', 'title': 'places', 'mimeType': 'application/vnd.google-apps.map'},
+        ]})
+
+        survey, places = await provider.revalidate_children(base, [('survey', False),
+                                                                  ('places', False)])
+
+        assert survey.identifier == 'file-id'
+        assert places.identifier is None
+        assert len(aiohttpretty.calls) == 1
+
+
 class TestUpload:
 
     @pytest.mark.asyncio
@@ -755,6 +755,25 @@ class TestValidatePath:
 
         assert revalidated_path.name == 'one'
 
+    @pytest.mark.asyncio
+    @pytest.mark.aiohttpretty
+    async def test_revalidate_children_single_listing(self, provider_one, folder_path,
+                                                      folder_children_metadata, mock_time):
+        url, params = build_signed_url_without_auth(provider_one, 'GET', folder_path.identifier,
+                                                    'children', user_id=provider_one.auth['id'])
+        aiohttpretty.register_json_uri('GET', url, params=params, status=200,
+                                       body=folder_children_metadata)
+
+        children = await provider_one.revalidate_children(
+            folder_path, [('one', False), ('New Folder', True), ('new_file', False)]
+        )
+
+        assert [child.name for child in children] == ['one', 'New Folder', 'new_file']
+        assert children[0].identifier == '59a9b637b7d1c903ab5a8f58'
+        assert children[1].identifier == '59c0054cb7d1c90114c456af'
+        assert children[2].identifier is None
+        assert len(aiohttpretty.calls) == 1
+
     @pytest.mark.asyncio
     @pytest.mark.aiohttpretty
     async def test_validate_path_nested(self, provider_one, file_lineage, folder_lineage,
@@ -998,6 +1017,7 @@ class TestCrossRegionMove:
                                                              dst_provider,
                                                              WaterButlerPath('/foo/'),
                                                              WaterButlerPath('/'),
+                                                             can_intra=src_provider.can_intra_move,
                                                              rename=None,
                                                              conflict='replace')
         src_provider.delete.assert_called_once_with(WaterButlerPath('/foo/'))
@@ -1167,6 +1187,7 @@ class TestCrossRegionCopy:
                                                              dst_provider,
                                                              WaterButlerPath('/foo/'),
                                                              WaterButlerPath('/'),
+                                                             can_intra=src_provider.can_intra_copy,
                                                              rename=None,
                                                              conflict='replace')
 
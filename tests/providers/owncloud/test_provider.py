@@ -356,6 +356,48 @@ class TestMetadata:
         assert result[0].name == 'Documents'
 
 
+def dav_listing(*hrefs):
+    responses = ''.join(
+        '<d:response><d:href>/owncloud/remote.php/webdav{}</d:href><d:propstat><d:prop>'
+        '<d:getetag>&quot;{}&quot;</d:getetag></d:prop>'
+        '<d:status>HTTP/1.1 200 OK</d:status></d:propstat></d:response>'.format(href, i)
+        for i, href in enumerate(hrefs)
+    )
+    return ('<?xml version="1.0" ?><d:multistatus xmlns:d="DAV:">{}'
+            '</d:multistatus>'.format(responses))
+
+
+class TestFolderTree:
+
+    @pytest.mark.asyncio
+    @pytest.mark.aiohttpretty
+    async def test_folder_tree_depth_infinity(self, provider):
+        path = WaterButlerPath('/Stuff/', prepend=provider.folder)
+        url = provider._webdav_url_ + path.full_path
+        body = dav_listing('/my_folder/Stuff/', '/my_folder/Stuff/Sub/',
+                           '/my_folder/Stuff/Sub/b.txt', '/my_folder/Stuff/a.txt')
+        aiohttpretty.register_uri('PROPFIND', url, body=body, auto_length=True, status=207)
+
+        tree = await provider.folder_tree(path)
+
+        assert [item.name for item, _ in tree] == ['Sub', 'a.txt']
+        (sub, sub_children), (a_txt, a_txt_children) = tree
+        assert sub.kind == 'folder'
+        assert [(item.name, children) for item, children in sub_children] == [('b.txt', None)]
+        assert a_txt.kind == 'file'
+        assert a_txt_children is None
+        assert aiohttpretty.has_call(method='PROPFIND', uri=url, headers={'Depth': 'infinity'})
+
+    @pytest.mark.asyncio
+    @pytest.mark.aiohttpretty
+    async def test_folder_tree_depth_infinity_refused(self, provider):
+        path = WaterButlerPath('/Stuff/', prepend=provider.folder)
+        url = provider._webdav_url_ + path.full_path
+        aiohttpretty.register_uri('PROPFIND', url, status=403)
+
+        assert await provider.folder_tree(path) is None
+
+
 class TestRevisions:
 
     @pytest.mark.asyncio
@@ -4,7 +4,9 @@ import xml
 import json
 import time
 import base64
+import asyncio
 import hashlib
+import aiohttp
 import aiohttpretty
 from http import client
 from urllib import parse
@@ -15,8 +17,9 @@ from boto.compat import BytesIO
 from boto.utils import compute_md5
 
 from waterbutler.providers.s3 import S3Provider
+from waterbutler.providers.s3.provider import region_cache
 from waterbutler.core.path import WaterButlerPath
-from waterbutler.core import streams, metadata, exceptions
+from waterbutler.core import buffers, streams, metadata, exceptions
 from waterbutler.providers.s3 import settings as pd_settings
 
 from tests.utils import MockCoroutine
@@ -53,6 +56,13 @@ def mock_time(monkeypatch):
     monkeypatch.setattr(time, 'time', mock_time)
 
 
+@pytest.fixture(autouse=True)
+def clear_region_cache():
+    region_cache.clear()
+    yield
+    region_cache.clear()
+
+
 @pytest.fixture
 def provider(auth, credentials, settings):
     provider = S3Provider(auth, credentials, settings)
@@ -202,6 +212,37 @@ class TestRegionDetection:
         await provider._check_region()
         assert provider.connection.host == host
 
+    @pytest.mark.asyncio
+    @pytest.mark.aiohttpretty
+    async def test_region_is_cached(self, auth, credentials, settings, mock_time):
+        provider = S3Provider(auth, credentials, settings)
+        region_url = provider.bucket.generate_url(100, 'GET', query_parameters={'location': ''})
+        aiohttpretty.register_uri('GET', region_url, status=200, body=location_response('EU'))
+
+        await provider._check_region()
+        other = S3Provider(auth, credentials, settings)
+        await other._check_region()
+
+        assert len(aiohttpretty.calls) == 1
+        assert other.region == 'eu-west-1'
+        assert other.connection.host == 's3-eu-west-1.amazonaws.com'
+
+    @pytest.mark.asyncio
+    @pytest.mark.aiohttpretty
+    async def test_region_redirect_invalidates_cache(self, auth, credentials, settings, mock_time):
+        provider = S3Provider(auth, credentials, settings)
+        region_cache.set(provider.bucket.name, '', 'us-west-1', 60)
+        await provider._check_region()
+
+        path = WaterButlerPath('/foo.txt')
+        url = provider.bucket.new_key(path.path).generate_url(100, 'HEAD')
+        aiohttpretty.register_uri('HEAD', url, status=301)
+
+        with pytest.raises(exceptions.MetadataError):
+            await provider.metadata(path)
+
+        assert region_cache.get(provider.bucket.name, '') is None
+
 
 class TestValidatePath:
 
@@ -649,15 +690,95 @@ class TestCRUD:
 
         assert provider._upload_part.call_count == 3
         provider._upload_part.assert_has_calls([
-            mock.call(file_stream, path, upload_id, 1, 9),
-            mock.call(file_stream, path, upload_id, 2, 9),
-            mock.call(file_stream, path, upload_id, 3, 2),
+            mock.call(b'abcdefghi', path, upload_id, 1, 9),
+            mock.call(b'jklmnopqr', path, upload_id, 2, 9),
+            mock.call(b'st', path, upload_id, 3, 2),
         ])
         assert len(parts_metadata) == 3
         assert parts_metadata == side_effect
 
         provider.CHUNK_SIZE = pd_settings.CHUNK_SIZE
 
+    @pytest.mark.asyncio
+    async def test_chunked_upload_upload_parts_keeps_order(self, provider, file_stream):
+        provider.CHUNK_SIZE = 2
+
+        async def upload_part(data, path, session_upload_id, chunk_number, chunk_size):
+            # the first part finishes last
+            await asyncio.sleep(0.01 if chunk_number == 1 else 0)
+            return {'ETAG': data.decode()}
+
+        provider._upload_part = upload_part
+
+        parts_metadata = await provider._upload_parts(file_stream, WaterButlerPath('/foobah'), 'id')
+
+        assert parts_metadata == [{'ETAG': 'sl'}, {'ETAG': 'ee'}, {'ETAG': 'py'}]
+
+        provider.CHUNK_SIZE = pd_settings.CHUNK_SIZE
+
+    @pytest.mark.asyncio
+    async def test_chunked_upload_upload_parts_bounded_concurrency(self, provider, file_stream):
+        provider.CHUNK_SIZE = 2
+        provider.CHUNKED_UPLOAD_CONCURRENCY = 1
+        in_flight, max_in_flight = 0, 0
+
+        async def upload_part(data, path, session_upload_id, chunk_number, chunk_size):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(in_flight, max_in_flight)
+            await asyncio.sleep(0)
+            in_flight -= 1
+            return {'ETAG': str(chunk_number)}
+
+        provider._upload_part = upload_part
+
+        await provider._upload_parts(file_stream, WaterButlerPath('/foobah'), 'id')
+
+        assert max_in_flight == 1
+
+        provider.CHUNK_SIZE = pd_settings.CHUNK_SIZE
+        provider.CHUNKED_UPLOAD_CONCURRENCY = pd_settings.CHUNKED_UPLOAD_CONCURRENCY
+
+    @pytest.mark.asyncio
+    async def test_chunked_upload_upload_parts_spool_past_budget(self, provider, file_stream,
+                                                                 monkeypatch):
+        provider.CHUNK_SIZE = 2
+        budget = buffers.ByteBudget(2)
+        monkeypatch.setattr(buffers, 'part_budget', budget)
+        uploaded = []
+
+        async def upload_part(data, path, session_upload_id, chunk_number, chunk_size):
+            await asyncio.sleep(0)
+            body = data if isinstance(data, bytes) else data.read()
+            uploaded.append((session_upload_id, chunk_number, isinstance(data, bytes), body))
+            return {'ETAG': str(chunk_number)}
+
+        provider._upload_part = upload_part
+        other_stream = streams.FileStreamReader(io.BytesIO(b'abcdef'))
+
+        await asyncio.gather(
+            provider._upload_parts(file_stream, WaterButlerPath('/foobah'), 'id'),
+            provider._upload_parts(other_stream, WaterButlerPath('/barbaz'), 'id2'),
+        )
+
+        # the two uploads never held more than the budget's one part in memory between them
+        assert sorted(body for _, _, _, body in uploaded) == [b'ab', b'cd', b'ee', b'ef',
+                                                               b'py', b'sl']
+        assert any(not in_memory for _, _, in_memory, _ in uploaded)
+        assert budget.available == 2
+
+        provider.CHUNK_SIZE = pd_settings.CHUNK_SIZE
+
+    @pytest.mark.asyncio
+    async def test_chunked_upload_upload_parts_failure(self, provider, file_stream):
+        provider.CHUNK_SIZE = 2
+        provider._upload_part = MockCoroutine(side_effect=exceptions.UploadError('nope'))
+
+        with pytest.raises(exceptions.UploadError):
+            await provider._upload_parts(file_stream, WaterButlerPath('/foobah'), 'id')
+
+        provider.CHUNK_SIZE = pd_settings.CHUNK_SIZE
+
     @pytest.mark.asyncio
     @pytest.mark.aiohttpretty
     async def test_chunked_upload_upload_part(self, provider, file_stream,
@@ -686,14 +807,102 @@ class TestCRUD:
         part_headers = {k.upper(): v for k, v in part_headers.items()}
         aiohttpretty.register_uri('PUT', upload_part_url, status=200, headers=part_headers)
 
-        part_metadata = await provider._upload_part(file_stream, path, upload_id, chunk_number,
-                                                    provider.CHUNK_SIZE)
+        part_metadata = await provider._upload_part(b'sl', path, upload_id, chunk_number, 2)
 
         assert aiohttpretty.has_call(method='PUT', uri=upload_part_url)
         assert part_headers == part_metadata
 
         provider.CHUNK_SIZE = pd_settings.CHUNK_SIZE
 
+    @pytest.mark.asyncio
+    @pytest.mark.aiohttpretty
+    async def test_chunked_upload_upload_part_retries(self, provider, upload_parts_headers_list,
+                                                      mock_time, monkeypatch):
+        monkeypatch.setattr(pd_settings, 'CHUNKED_UPLOAD_MAX_PART_RETRIES', 1)
+        monkeypatch.setattr(asyncio, 'sleep', MockCoroutine())
+        path = WaterButlerPath('/foobah')
+        params = {'partNumber': '1', 'uploadId': 'id'}
+        upload_part_url = provider.bucket.new_key(path.path).generate_url(
+            100,
+            'PUT',
+            query_parameters=params,
+            headers={'Content-Length': '2'}
+        )
+        part_headers = json.loads(upload_parts_headers_list).get('headers_list')[0]
+        part_headers = {k.upper(): v for k, v in part_headers.items()}
+        aiohttpretty.register_uri('PUT', upload_part_url, responses=[
+            {'status': 400},
+            {'status': 200, 'headers': part_headers},
+        ])
+
+        part_metadata = await provider._upload_part(b'sl', path, 'id', 1, 2)
+
+        assert part_headers == part_metadata
+        assert provider.provider_metrics.serialize()['upload_parts'] == {'retries': 1}
+
+    @pytest.mark.asyncio
+    async def test_chunked_upload_upload_part_retry_rewinds_spilled_part(self, provider,
+                                                                          monkeypatch):
+        monkeypatch.setattr(asyncio, 'sleep', MockCoroutine())
+        sent = []
+
+        async def make_request(method, url, data=None, **kwargs):
+            sent.append(data.read())
+            if len(sent) == 1:
+                raise aiohttp.ClientConnectionError('connection dropped')
+            return mock.Mock(headers={'ETAG': 'etag'}, release=MockCoroutine())
+
+        provider.make_request = make_request
+
+        path = WaterButlerPath('/foobah')
+
+        part_metadata = await provider._upload_part(io.BytesIO(b'sleepy'), path, 'id', 1, 6)
+
+        assert part_metadata == {'ETAG': 'etag'}
+        assert sent == [b'sleepy', b'sleepy']
+
+    @pytest.mark.asyncio
+    async def test_chunked_upload_upload_parts_part_fails_once(self, provider, file_stream,
+                                                               monkeypatch):
+        monkeypatch.setattr(asyncio, 'sleep', MockCoroutine())
+        provider.CHUNK_SIZE = 2
+        sent, failed = [], False
+
+        async def make_request(method, url, data=None, params=None, **kwargs):
+            nonlocal failed
+            sent.append((params['partNumber'], data))
+            if params['partNumber'] == '2' and not failed:
+                failed = True
+                raise asyncio.TimeoutError()
+            return mock.Mock(headers={'ETAG': data.decode()}, release=MockCoroutine())
+
+        provider.make_request = make_request
+
+        parts_metadata = await provider._upload_parts(file_stream, WaterButlerPath('/foobah'), 'id')
+
+        assert parts_metadata == [{'ETAG': 'sl'}, {'ETAG': 'ee'}, {'ETAG': 'py'}]
+        assert sorted(sent) == [('1', b'sl'), ('2', b'ee'), ('2', b'ee'), ('3', b'py')]
+
+        provider.CHUNK_SIZE = pd_settings.CHUNK_SIZE
+
+    @pytest.mark.asyncio
+    @pytest.mark.aiohttpretty
+    async def test_chunked_upload_upload_part_forbidden_is_not_retried(self, provider, mock_time):
+        path = WaterButlerPath('/foobah')
+        params = {'partNumber': '1', 'uploadId': 'id'}
+        upload_part_url = provider.bucket.new_key(path.path).generate_url(
+            100,
+            'PUT',
+            query_parameters=params,
+            headers={'Content-Length': '2'}
+        )
+        aiohttpretty.register_uri('PUT', upload_part_url, status=403)
+
+        with pytest.raises(exceptions.UploadError):
+            await provider._upload_part(b'sl', path, 'id', 1, 2)
+
+        assert len(aiohttpretty.calls) == 1
+
     @pytest.mark.asyncio
     @pytest.mark.aiohttpretty
     async def test_chunked_upload_complete_multipart_upload(self, provider,
@@ -1424,3 +1633,29 @@ class TestOperations:
 
     def test_can_duplicate_names(self, provider):
         assert provider.can_duplicate_names()
+
+
+class TestFolderTree:
+
+    @pytest.mark.asyncio
+    @pytest.mark.aiohttpretty
+    async def test_folder_tree_pages_by_marker(self, provider, mock_time):
+        path = WaterButlerPath('/folder/')
+        query_url = provider.bucket.generate_url(100, 'GET')
+
+        params_one = {'prefix': 'folder/'}
+        response_one = list_objects_response(['folder/a.txt', 'folder/sub/'], truncated=True)
+        params_two = {'prefix': 'folder/', 'marker': 'folder/sub/'}
+        response_two = list_objects_response(['folder/sub/b.txt', 'folder/other/c.txt'])
+        aiohttpretty.register_uri('GET', query_url, params=params_one, body=response_one)
+        aiohttpretty.register_uri('GET', query_url, params=params_two, body=response_two)
+
+        tree = await provider.folder_tree(path)
+
+        # other/ is only the prefix of its file, so it's filled in at the end
+        assert [(item.name, children) for item, children in tree
+                if children is None] == [('a.txt', None)]
+        assert [(item.name, [child.name for child, _ in children]) for item, children in tree
+                if children is not None] == [('sub', ['b.txt']), ('other', ['c.txt'])]
+        assert aiohttpretty.has_call(method='GET', uri=query_url, params=params_one)
+        assert aiohttpretty.has_call(method='GET', uri=query_url, params=params_two)
@@ -196,7 +196,15 @@ class TestCrudHandler(utils.HandlerTestCase):
     def test_upload(self):
         data = b'stone cold crazy'
         expected = utils.MockFileMetadata()
-        self.mock_provider.upload = utils.MockCoroutine(return_value=(expected, True))
+        calls, streamed = [], []
+
+        # the body has to be read before the upload finishes, the rest of it is dropped after that
+        async def upload(*args, **kwargs):
+            calls.append((args, kwargs))
+            streamed.append(await args[0].read())
+            return expected, True
+
+        self.mock_provider.upload = upload
 
         resp = yield self.http_client.fetch(
             self.get_url('/file?provider=queenhub&path=/roger.png'),
@@ -204,12 +212,10 @@ class TestCrudHandler(utils.HandlerTestCase):
             body=data,
         )
 
-        calls = self.mock_provider.upload.call_args_list
         assert len(calls) == 1
         args, kwargs = calls[0]
         assert isinstance(args[0], streams.RequestStreamReader)
-        streamed = yield args[0].read()
-        assert streamed == data
+        assert streamed == [data]
         assert kwargs['action'] == 'upload'
         assert str(kwargs['path']) == '/roger.png'
         assert expected.serialized() == json.loads(resp.body.decode())
@@ -3,6 +3,8 @@ import json
 import pytest
 
 from tests.utils import MockCoroutine
+from waterbutler.core import streams
+from waterbutler.core import exceptions
 from waterbutler.core.path import WaterButlerPath
 
 from tests.server.api.v1.utils import mock_handler
@@ -238,6 +240,111 @@ class TestMetadataMixin:
 
         handler.write_stream.assert_called_once_with(mock_stream)
 
+    @pytest.mark.asyncio
+    async def test_download_folder_as_zip_level(self, http_request, mock_stream):
+
+        handler = mock_handler(http_request)
+
+        handler.provider.zip = MockCoroutine(return_value=mock_stream)
+        handler.path = WaterButlerPath('/test_file/')
+        handler.request.query_arguments['zip_level'] = [b'9']
+
+        await handler.download_folder_as_zip()
+
+        handler.provider.zip.assert_called_once_with(handler.path, compression_level=9)
+
+    @pytest.mark.asyncio
+    async def test_download_folder_as_stored_zip(self, http_request):
+
+        handler = mock_handler(http_request)
+
+        archive = streams.StoredZipArchive([
+            streams.StoredZipEntry('folder/', 0, (2020, 1, 1, 0, 0, 0)),
+        ])
+        handler.provider.stored_zip = MockCoroutine(return_value=archive)
+        handler.provider.zip = MockCoroutine()
+        handler.path = WaterButlerPath('/test_file/')
+        handler.request.query_arguments['zip_level'] = [b'0']
+
+        await handler.download_folder_as_zip()
+
+        assert not handler.provider.zip.called
+        assert handler._headers['Content-Type'] == 'application/zip'
+        assert handler._headers['Content-Length'] == str(archive.size)
+        assert handler._headers['Accept-Ranges'] == 'bytes'
+        assert handler._headers['Etag'] == '"{}"'.format(archive.etag)
+        stream = handler.write_stream.call_args[0][0]
+        assert (stream.start, stream.end) == (0, archive.size - 1)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('range_header,if_range,expected', [
+        ('bytes=10-19', None, (206, 10, 19)),
+        ('bytes=10-', None, (206, 10, 'last')),
+        ('bytes=10-100000', None, (206, 10, 'last')),
+        ('bytes=10-19', 'etag', (206, 10, 19)),
+        ('bytes=10-19', '"stale"', (200, 0, 'last')),
+        ('bytes=100000-', None, (416, None, None)),
+    ])
+    async def test_stored_zip_range(self, http_request, range_header, if_range, expected):
+
+        handler = mock_handler(http_request)
+
+        archive = streams.StoredZipArchive([
+            streams.StoredZipEntry('folder/', 0, (2020, 1, 1, 0, 0, 0)),
+        ])
+        handler.request.headers['Range'] = range_header
+        if if_range is not None:
+            etag = '"{}"'.format(archive.etag)
+            handler.request.headers['If-Range'] = etag if if_range == 'etag' else if_range
+
+        await handler.write_stored_zip(archive)
+
+        status, start, end = expected
+        end = archive.size - 1 if end == 'last' else end
+        assert handler.get_status() == status
+        if status == 416:
+            assert handler._headers['Content-Range'] == 'bytes */{}'.format(archive.size)
+            assert not handler.write_stream.called
+            return
+
+        stream = handler.write_stream.call_args[0][0]
+        assert (stream.start, stream.end) == (start, end)
+        assert handler._headers['Content-Length'] == str(end - start + 1)
+        if status == 206:
+            expected_range = 'bytes {}-{}/{}'.format(start, end, archive.size)
+            assert handler._headers['Content-Range'] == expected_range
+
+    @pytest.mark.asyncio
+    async def test_stored_zip_falls_back_to_streaming(self, http_request, mock_stream):
+
+        handler = mock_handler(http_request)
+
+        handler.provider.stored_zip = MockCoroutine(return_value=None)
+        handler.provider.zip = MockCoroutine(return_value=mock_stream)
+        handler.path = WaterButlerPath('/test_file/')
+        handler.request.query_arguments['zip_level'] = [b'0']
+
+        await handler.download_folder_as_zip()
+
+        handler.provider.zip.assert_called_once_with(handler.path, compression_level=0)
+        handler.write_stream.assert_called_once_with(mock_stream)
+        assert 'Content-Length' not in handler._headers
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('zip_level', [b'10', b'-2', b'fast'])
+    async def test_download_folder_as_zip_invalid_level(self, http_request, zip_level):
+
+        handler = mock_handler(http_request)
+
+        handler.provider.zip = MockCoroutine()
+        handler.path = WaterButlerPath('/test_file/')
+        handler.request.query_arguments['zip_level'] = [zip_level]
+
+        with pytest.raises(exceptions.InvalidParameters):
+            await handler.download_folder_as_zip()
+
+        assert not handler.provider.zip.called
+
     @pytest.mark.asyncio
     async def test_download_folder_as_zip_root(self, http_request, mock_stream):
 
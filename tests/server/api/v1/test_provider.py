@@ -1,13 +1,15 @@
+import asyncio
 from uuid import UUID
 from unittest import mock
 
 import pytest
 
+from waterbutler.core.streams import BytePipe
 from waterbutler.core.path import WaterButlerPath
 from waterbutler.server.api.v1.provider import list_or_value
 
 from tests.server.api.v1.utils import mock_handler
-from tests.utils import MockCoroutine, MockStream, MockWriter, MockProvider
+from tests.utils import MockCoroutine, MockStream, MockProvider
 from tests.server.api.v1.fixtures import (http_request, patch_auth_handler,
                                           handler_auth, patch_make_provider_core)
 
@@ -55,6 +57,60 @@ class TestProviderHandler:
         handler.target_path = WaterButlerPath('/file')
         await handler.prepare_stream()
 
+    @pytest.mark.asyncio
+    async def test_prepare_stream_upload(self, http_request):
+
+        async def upload(stream, path):
+            return await stream.read(100), True
+
+        handler = mock_handler(http_request)
+        handler.target_path = WaterButlerPath('/file')
+        handler.request.headers['Content-Length'] = 10
+        handler.provider.upload = upload
+        await handler.prepare_stream()
+
+        await handler.data_received(b'12345')
+        await handler.data_received(b'67890')
+        handler.pipe.write_eof()
+
+        assert await handler.uploader == (b'1234567890', True)
+
+    @pytest.mark.asyncio
+    async def test_prepare_stream_failed_upload_drops_body(self, http_request):
+        handler = mock_handler(http_request)
+        handler.target_path = WaterButlerPath('/file')
+        handler.provider.upload = MockCoroutine(side_effect=ValueError('over quota'))
+        await handler.prepare_stream()
+        await asyncio.sleep(0)
+
+        # the body is still accepted without anything reading it
+        for _ in range(10):
+            await asyncio.wait_for(handler.data_received(b'x' * 1024 * 1024), 1)
+        handler.pipe.write_eof()
+
+        assert handler.pipe.size == 0
+        with pytest.raises(ValueError):
+            await handler.uploader
+
+    @pytest.mark.asyncio
+    async def test_connection_close_fails_upload(self, http_request):
+
+        async def upload(stream, path):
+            return await stream.read(100), True
+
+        handler = mock_handler(http_request)
+        handler.target_path = WaterButlerPath('/file')
+        handler.request.headers['Content-Length'] = 10
+        handler.provider.upload = upload
+        await handler.prepare_stream()
+        await handler.data_received(b'12345')
+
+        with mock.patch('tornado.web.RequestHandler.on_connection_close'):
+            handler.on_connection_close()
+
+        with pytest.raises(ConnectionAbortedError):
+            await asyncio.wait_for(handler.uploader, 1)
+
     @pytest.mark.asyncio
     async def test_head(self, http_request):
 
@@ -154,12 +210,12 @@ class TestProviderHandler:
         handler = mock_handler(http_request)
         handler.path = WaterButlerPath('/folder/')
         handler.stream = MockStream()
-        handler.writer = MockWriter()
+        handler.pipe = BytePipe(100)
 
         await handler.data_received(b'1234567890')
 
         assert handler.bytes_uploaded == 10
-        handler.writer.write.assert_called_once_with(b'1234567890')
+        assert handler.pipe.size == 10
 
 
 class TestProviderHandlerFinish:
@@ -59,6 +59,5 @@ def mock_handler(http_request):
     handler.write_stream = MockCoroutine()
     handler.redirect = Mock()
     handler.uploader = asyncio.Future()
-    handler.wsock = Mock()
-    handler.writer = Mock()
+    handler.pipe = Mock()
     return handler
@@ -1,11 +1,19 @@
+import io
+import os
+import asyncio
+import hashlib
+import tempfile
 from unittest import mock
 
 import pytest
+import tornado.web
 from tornado import testing
 
 from tests.server.api.v1.utils import ServerTestCase
 
-from waterbutler.server.utils import CORsMixin, parse_request_range
+from waterbutler.core import streams
+from waterbutler.server import settings
+from waterbutler.server.utils import CORsMixin, UtilMixin, parse_request_range
 
 
 class MockHandler(CORsMixin):
@@ -189,3 +197,129 @@ class TestRangeParsing():
         result = parse_request_range(range_header)
         assert result == expected
 
+
+class StreamFileHandler(UtilMixin, tornado.web.RequestHandler):
+
+    def initialize(self, path, results):
+        self.file_path = path
+        self.results = results
+
+    async def get(self):
+        file_pointer = open(self.file_path, 'rb')
+        byte_range = self.get_query_argument('range', None)
+        if self.get_query_argument('memory', None):
+            stream = streams.FileStreamReader(io.BytesIO(file_pointer.read()))
+        elif byte_range is None:
+            stream = streams.FileStreamReader(file_pointer)
+        else:
+            stream = streams.PartialFileStreamReader(file_pointer,
+                                                     [int(x) for x in byte_range.split('-')])
+            self.set_status(206)
+        if self.get_query_argument('hash', None):
+            stream.add_writer('md5', streams.HashStreamWriter(hashlib.md5))
+        if not self.get_query_argument('chunked', None):
+            self.set_header('Content-Length', str(stream.size))
+
+        await self.write_stream(stream)
+        file_pointer.close()
+        self.results['downloaded'] = self.bytes_downloaded
+
+    async def _write_local_file(self, stream):
+        if self.get_query_argument('truncate', None):
+            local_range = stream.local_range
+
+            def truncate_after_local_range():
+                source = local_range()
+                open(self.file_path, 'wb').close()
+                return source
+
+            stream.local_range = truncate_after_local_range
+        self.results['sendfile'] = await super()._write_local_file(stream)
+        return self.results['sendfile']
+
+    async def _write_block(self, block, queued):
+        self.results.setdefault('blocks', []).append(len(block))
+        return await super()._write_block(block, queued)
+
+
+class TestWriteStream(testing.AsyncHTTPTestCase):
+
+    DATA = os.urandom(3 * 1024 * 1024 + 123)
+
+    def setUp(self):
+        policy = asyncio.get_event_loop_policy()
+        policy.get_event_loop().close()
+        self.event_loop = policy.new_event_loop()
+        policy.set_event_loop(self.event_loop)
+
+        fd, self.file_path = tempfile.mkstemp()
+        with os.fdopen(fd, 'wb') as fp:
+            fp.write(self.DATA)
+        self.results = {}
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        self.event_loop.close()
+        os.remove(self.file_path)
+
+    def get_app(self):
+        return tornado.web.Application([
+            (r'/', StreamFileHandler, {'path': self.file_path, 'results': self.results}),
+        ])
+
+    def test_local_file_is_sent_from_file(self):
+        resp = self.fetch('/')
+
+        assert resp.body == self.DATA
+        assert self.results == {'sendfile': True, 'downloaded': len(self.DATA)}
+
+    def test_local_file_range(self):
+        resp = self.fetch('/?range=5000-2100000')
+
+        assert resp.code == 206
+        assert resp.body == self.DATA[5000:2100001]
+        assert self.results == {'sendfile': True, 'downloaded': 2100000 - 5000 + 1}
+
+    def test_stream_with_writers_is_read(self):
+        resp = self.fetch('/?hash=1')
+
+        assert resp.body == self.DATA
+        assert self.results['sendfile'] is False
+        assert self.results['downloaded'] == len(self.DATA)
+
+    def test_chunked_local_file_is_read(self):
+        resp = self.fetch('/?chunked=1')
+
+        assert resp.body == self.DATA
+        assert self.results['sendfile'] is False
+
+    def test_truncated_local_file_closes_connection(self):
+        resp = self.fetch('/?truncate=1')
+
+        assert resp.code == 599
+        assert 'sendfile' not in self.results
+
+    @mock.patch.object(settings, 'SENDFILE_CHUNK_SIZE', 0)
+    def test_sendfile_disabled(self):
+        resp = self.fetch('/')
+
+        assert resp.body == self.DATA
+        assert self.results['sendfile'] is False
+
+    @mock.patch.object(settings, 'WRITE_COALESCE_SIZE', 1024 * 1024)
+    def test_chunks_are_coalesced(self):
+        resp = self.fetch('/?memory=1')
+
+        assert resp.body == self.DATA
+        assert self.results['sendfile'] is False
+        assert self.results['downloaded'] == len(self.DATA)
+        assert self.results['blocks'] == [1024 * 1024] * 3 + [123]
+
+    @mock.patch.object(settings, 'WRITE_HIGH_WATER_MARK', 0)
+    def test_chunked_response(self):
+        resp = self.fetch('/?memory=1&chunked=1')
+
+        assert resp.body == self.DATA
+        assert 'Content-Length' not in resp.headers
+        assert self.results['downloaded'] == len(self.DATA)
@@ -81,11 +81,6 @@ class MockRequestBody(asyncio.Future):
         yield None
 
 
-class MockWriter(object):
-    write = mock.Mock()
-    drain = MockCoroutine()
-
-
 class MockProvider(provider.BaseProvider):
     NAME = 'MockProvider'
     copy = None
@@ -1,3 +1,4 @@
+import copy
 import logging
 import datetime
 
@@ -8,14 +9,19 @@ from aiohttp.client_exceptions import ClientError, ContentTypeError
 
 from waterbutler.core import exceptions
 from waterbutler.auth.osf import settings
+from waterbutler.core.cache import LRUCache
 from waterbutler.core.auth import AuthType, BaseAuthHandler
 from waterbutler.settings import MFR_IDENTIFYING_HEADER
+from waterbutler.core.singleflight import stable_hash
 
 
 JWE_KEY = jwe.kdf(settings.JWE_SECRET.encode(), settings.JWE_SALT.encode())
 
 logger = logging.getLogger(__name__)
 
+# Successful v1 auth payloads, keyed by ``OsfAuthHandler._cache_key``.  See ``AUTH_CACHE_TTL``.
+auth_cache = LRUCache(settings.AUTH_CACHE_MAX_ENTRIES)
+
 
 class OsfAuthHandler(BaseAuthHandler):
     """Identity lookup via the Open Science Framework"""
@@ -106,6 +112,11 @@ class OsfAuthHandler(BaseAuthHandler):
         (project) and provider.  Auth credentials sent by the user to WB are passed onto the OSF so
         it can determine the user.  Auth payload also includes some metrics and metadata to help
         the OSF with resource tallies and permission optimizations.
+
+        If ``AUTH_CACHE_TTL`` is set, successful responses are cached for that many seconds and
+        reused by requests with the same resource, provider, action, intent, version, credentials,
+        and view_only key.  Cache hits skip the round trip to the OSF, so the OSF will not see their
+        metrics.  Errors are never cached.
         """
 
         (permissions_req, intent) = self._determine_actions(resource, provider, request, action,
@@ -128,6 +139,14 @@ class OsfAuthHandler(BaseAuthHandler):
             # View only must go outside of the jwt
             view_only = view_only[0].decode()
 
+        cache_key = None
+        if settings.AUTH_CACHE_TTL > 0:
+            cache_key = self._cache_key(resource, provider, permissions_req, intent, version,
+                                        headers, cookie, view_only, dict(request.cookies))
+            cached = auth_cache.get(cache_key, '')
+            if cached is not None:
+                return copy.deepcopy(cached)
+
         payload = await self.make_request(
             self.build_payload({
                 'nid': resource,
@@ -148,8 +167,14 @@ class OsfAuthHandler(BaseAuthHandler):
         )
 
         payload['auth']['callback_url'] = payload['callback_url']
+        if cache_key is not None:
+            auth_cache.set(cache_key, '', copy.deepcopy(payload), settings.AUTH_CACHE_TTL)
         return payload
 
+    def _cache_key(self, *args):
+        """Hash the inputs of an auth request, so that the cache never holds raw credentials."""
+        return stable_hash(args)
+
     def _determine_actions(self, resource, provider, request, action=None,
                            auth_type=AuthType.SOURCE, path='', version=None):
         """Decide what the user is trying to achieve and what permissions they need to achieve it.
@@ -21,3 +21,9 @@ JWE_SECRET = (JWE_SECRET or 'CirclesAre4Squares')
 JWT_SECRET = (JWT_SECRET or 'ILiekTrianglesALot')
 
 MFR_ACTION_HEADER = config.get('MFR_ACTION_HEADER', 'X-Cos-Mfr-Request-Action')
+
+# Seconds to cache successful v1 auth responses from the OSF for.  0 disables the cache.  Cached
+# payloads are reused for any request with the same resource, provider, action, credentials and
+# view_only key, so keep this short: permission changes on the OSF will not be seen until it passes.
+AUTH_CACHE_TTL = int(config.get('AUTH_CACHE_TTL', 0))
+AUTH_CACHE_MAX_ENTRIES = int(config.get('AUTH_CACHE_MAX_ENTRIES', 1000))
@@ -0,0 +1,184 @@
+import typing
+import asyncio
+import logging
+import tempfile
+import threading
+from http import HTTPStatus
+
+import aiohttp
+
+from waterbutler import settings as wb_settings
+from waterbutler.core import exceptions
+
+
+logger = logging.getLogger(__name__)
+
+# Errors sending a part that are worth sending it again for
+PART_RETRY_ERRORS = (exceptions.UploadError, aiohttp.ClientError, asyncio.TimeoutError)
+
+# Statuses that mean a failed part is not worth retrying, e.g. the upload was aborted
+PART_FATAL_CODES = (HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN, HTTPStatus.NOT_FOUND)
+
+
+class ByteBudget:
+    """A count of ``size`` bytes of memory shared by everything in the process that buffers upload
+    data.  Memory is claimed with ``try_acquire`` for data that has already arrived, and is never
+    waited for: a caller that can't get it is expected to put the data somewhere else instead (see
+    `read_part`), so an upload that is slow or stalled can't hold up anyone else's.
+
+    Celery tasks may run on event loops of their own, so the count is guarded by a lock.
+
+    :param int size: number of bytes in the budget
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.available = size
+        self._lock = threading.Lock()
+
+    def try_acquire(self, nbytes: int) -> bool:
+        """Claim ``nbytes`` if they are free.
+
+        :rtype: `bool`
+        :return: ``True`` if the bytes were claimed and must be handed back with ``release``
+        """
+        with self._lock:
+            if nbytes > self.available:
+                return False
+            self.available -= nbytes
+            return True
+
+    def release(self, nbytes: int) -> None:
+        with self._lock:
+            self.available += nbytes
+
+
+# Memory for the parts of every chunked upload in the process, see ``read_part``
+part_budget = ByteBudget(wb_settings.UPLOAD_PART_BUFFER_POOL_SIZE)
+
+
+class UploadPart:
+    """One part of a chunked upload, read in full from the upload stream by `read_part`.
+
+    ``data`` is the contents of the part, as `bytes`, or as a tempfile rewound to its start if
+    there wasn't enough memory left to hold it.  ``digest`` is the digest of the part, if it was
+    asked for.  Call ``close`` once the part has been sent to hand back its memory or remove its
+    tempfile.
+    """
+
+    def __init__(self, data: typing.Union[bytes, typing.IO], size: int,
+                 digest: typing.Optional[bytes], reserved: int=0,
+                 budget: ByteBudget=None) -> None:
+        self.data = data
+        self.size = size
+        self.digest = digest
+        self._reserved = reserved
+        self._budget = budget
+
+    @property
+    def in_memory(self) -> bool:
+        return isinstance(self.data, bytes)
+
+    def close(self) -> None:
+        if self.in_memory:
+            if self._reserved:
+                self._budget.release(self._reserved)
+                self._reserved = 0
+        else:
+            self.data.close()  # type: ignore
+
+
+async def read_part(stream, size: int, hash_factory: typing.Callable=None,
+                    chunk_size: int=wb_settings.UPLOAD_PART_READ_SIZE,
+                    budget: ByteBudget=None) -> UploadPart:
+    """Read the next ``size`` bytes of ``stream`` as one part of a chunked upload.  The part is read
+    ``chunk_size`` bytes at a time, and memory is claimed from ``budget`` for each chunk once it has
+    arrived.  When the budget runs out, the part is moved to a tempfile instead and the rest of it
+    is written there.  Disk writes and hashing are done in a worker thread.
+
+    :param stream: the stream to read from
+    :param int size: the size of the part
+    :param hash_factory: e.g. ``hashlib.sha1``, if the part's digest is needed
+    :param budget: defaults to the process-wide `part_budget`
+    :rtype: `UploadPart`
+    """
+    if budget is None:
+        budget = part_budget
+    loop = asyncio.get_event_loop()
+    part_hash = hash_factory() if hash_factory is not None else None
+    chunks = []  # type: typing.List[bytes]
+    reserved, spool = 0, None
+
+    def write(held):
+        for chunk in held:
+            spool.write(chunk)
+            if part_hash is not None:
+                part_hash.update(chunk)
+
+    try:
+        remaining = size
+        while remaining > 0:
+            chunk = await stream.read(min(remaining, chunk_size))
+            if not chunk:
+                raise exceptions.UploadError('The upload ended before all of its parts were read.')
+            remaining -= len(chunk)
+
+            if spool is None and budget.try_acquire(len(chunk)):
+                reserved += len(chunk)
+                chunks.append(chunk)
+                continue
+
+            if spool is None:
+                spool = tempfile.TemporaryFile()
+            chunks.append(chunk)
+            await loop.run_in_executor(None, write, chunks)
+            chunks = []
+            budget.release(reserved)
+            reserved = 0
+
+        if spool is not None:
+            await loop.run_in_executor(None, spool.seek, 0)
+            data = spool  # type: typing.Union[bytes, typing.IO]
+        else:
+            data = b''.join(chunks)
+            if part_hash is not None:
+                await loop.run_in_executor(None, part_hash.update, data)
+    except BaseException:
+        budget.release(reserved)
+        if spool is not None:
+            spool.close()
+        raise
+
+    digest = part_hash.digest() if part_hash is not None else None
+    return UploadPart(data, size, digest, reserved=reserved, budget=budget)
+
+
+async def send_part(send: typing.Callable, data: typing.Union[bytes, typing.IO], retries: int,
+                    metrics=None, description: str='part') -> typing.Any:
+    """Call ``await send(data)`` to upload one part of a chunked upload, and call it again up to
+    ``retries`` times if it fails with one of ``PART_RETRY_ERRORS``.  A file is rewound before every
+    attempt, so that a retry sends the whole part again.  ``send`` should make its request with
+    ``retry=0``, as ``make_request`` would resend a file from wherever the last attempt left it.
+
+    :param send: coroutine function sending the part
+    :param data: the contents of the part, as bytes or a file
+    :param int retries: number of times to retry the part
+    :param metrics: the provider's ``provider_metrics``, to count retries in
+    :param str description: identifies the part in log messages
+    :return: whatever ``send`` returns
+    """
+    attempt = 0
+    while True:
+        if not isinstance(data, bytes):
+            data.seek(0)
+        try:
+            return await send(data)
+        except PART_RETRY_ERRORS as exc:
+            if attempt >= retries or getattr(exc, 'code', None) in PART_FATAL_CODES:
+                raise
+            attempt += 1
+            if metrics is not None:
+                metrics.incr('upload_parts.retries')
+            logger.warning('Retrying {} after {!r} ({}/{})'.format(description, exc, attempt,
+                                                                   retries))
+            await asyncio.sleep(attempt)
@@ -0,0 +1,179 @@
+import time
+import typing
+import pickle
+import logging
+import collections
+
+from redis import Redis
+from redis.exceptions import RedisError
+
+from waterbutler import settings as wb_settings
+from waterbutler.server import settings as server_settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """An in-process, size-bounded LRU cache whose entries expire after a per-entry TTL.  Entries
+    are grouped into buckets so that every variant of a key (e.g. every revision of a path) can be
+    dropped at once.  ``{bucket: {variant: (expires_at, value)}}``
+
+    :param int max_entries: max number of buckets to hold before evicting the least recently used
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._buckets = collections.OrderedDict()  # type: collections.OrderedDict
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def get(self, bucket: str, variant: str) -> typing.Any:
+        entries = self._buckets.get(bucket)
+        if entries is None or variant not in entries:
+            return None
+
+        expires_at, value = entries[variant]
+        if expires_at < time.monotonic():
+            del entries[variant]
+            if not entries:
+                del self._buckets[bucket]
+            return None
+
+        self._buckets.move_to_end(bucket)
+        return value
+
+    def set(self, bucket: str, variant: str, value: typing.Any, ttl: int) -> None:
+        self._buckets.setdefault(bucket, {})[variant] = (time.monotonic() + ttl, value)
+        self._buckets.move_to_end(bucket)
+        while len(self._buckets) > self.max_entries:
+            self._buckets.popitem(last=False)
+
+    def delete(self, *buckets: str) -> None:
+        for bucket in buckets:
+            self._buckets.pop(bucket, None)
+
+    def delete_prefix(self, prefix: str) -> None:
+        for bucket in [bucket for bucket in self._buckets if bucket.startswith(prefix)]:
+            del self._buckets[bucket]
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+
+class RedisCache:
+    """A Redis-backed cache tier with the same interface as :class:`LRUCache`, so that cached
+    metadata can be shared between WaterButler processes.  Each bucket is stored as a Redis hash
+    with one field per variant.  The TTL is applied to the whole hash.
+
+    Redis errors are logged and treated as cache misses.  The cache must never fail a request.
+    """
+
+    def __init__(self, conn: Redis) -> None:
+        self.conn = conn
+
+    def get(self, bucket: str, variant: str) -> typing.Optional[bytes]:
+        try:
+            return self.conn.hget(bucket, variant)
+        except RedisError as exc:
+            logger.warning('Metadata cache HGET failed for {}: {!r}'.format(bucket, exc))
+            return None
+
+    def set(self, bucket: str, variant: str, value: bytes, ttl: int) -> None:
+        try:
+            pipe = self.conn.pipeline()
+            pipe.hset(bucket, variant, value)
+            pipe.expire(bucket, ttl)
+            pipe.execute()
+        except RedisError as exc:
+            logger.warning('Metadata cache HSET failed for {}: {!r}'.format(bucket, exc))
+
+    def delete(self, *buckets: str) -> None:
+        if not buckets:
+            return
+        try:
+            self.conn.delete(*buckets)
+        except RedisError as exc:
+            logger.warning('Metadata cache DEL failed for {}: {!r}'.format(buckets, exc))
+
+    def delete_prefix(self, prefix: str) -> None:
+        pattern = ''.join('\\' + char if char in '*?[]\\' else char for char in prefix) + '*'
+        try:
+            keys = list(self.conn.scan_iter(match=pattern))
+            if keys:
+                self.conn.delete(*keys)
+        except RedisError as exc:
+            logger.warning('Metadata cache SCAN/DEL failed for {}: {!r}'.format(prefix, exc))
+
+    def clear(self) -> None:
+        self.delete_prefix(MetadataCache.PREFIX)
+
+
+class MetadataCache:
+    """A cache for provider metadata, held either in-process by an :class:`LRUCache` or, when Redis
+    is configured, in a :class:`RedisCache` shared by every WaterButler process.  There is no local
+    tier in front of Redis: writes made in celery workers invalidate Redis, and would never reach
+    the in-process caches of the server.  Values are pickled before being stored, so every hit
+    returns a fresh copy that the caller is free to mutate.
+
+    Keys are built by the provider (see ``BaseProvider._metadata_cache_bucket``) from a scope unique
+    to the provider's name, settings and credentials, the materialized path, and a variant
+    identifying the path ids and the kwargs (e.g. ``revision``) of the call.
+    """
+
+    PREFIX = 'waterbutler:metadata:'
+
+    def __init__(self, max_entries: int=wb_settings.METADATA_CACHE_MAX_ENTRIES,
+                 redis: Redis=None) -> None:
+        if redis is not None:
+            self.tier = RedisCache(redis)  # type: typing.Union[LRUCache, RedisCache]
+        else:
+            self.tier = LRUCache(max_entries)
+
+    @classmethod
+    def bucket(cls, scope: str, path: str) -> str:
+        return '{}{}:{}'.format(cls.PREFIX, scope, path)
+
+    def get(self, bucket: str, variant: str) -> typing.Tuple[bool, typing.Any]:
+        """Look up a cached value.
+
+        :rtype: `tuple`
+        :return: ``(hit, value)``
+        """
+        raw = self.tier.get(bucket, variant)
+        if raw is None:
+            return False, None
+        try:
+            return True, pickle.loads(raw)
+        except Exception as exc:
+            logger.warning('Discarding unreadable metadata cache entry {}: {!r}'.format(bucket, exc))
+            self.tier.delete(bucket)
+            return False, None
+
+    def set(self, bucket: str, variant: str, value: typing.Any, ttl: int) -> None:
+        try:
+            raw = pickle.dumps(value)
+        except Exception as exc:
+            logger.debug('Not caching unpicklable metadata for {}: {!r}'.format(bucket, exc))
+            return
+        self.tier.set(bucket, variant, raw, ttl)
+
+    def invalidate(self, *buckets: str, prefixes: typing.Iterable[str]=()) -> None:
+        self.tier.delete(*buckets)
+        for prefix in prefixes:
+            self.tier.delete_prefix(prefix)
+
+    def clear(self) -> None:
+        self.tier.clear()
+
+
+def _make_cache() -> MetadataCache:
+    redis = None
+    if wb_settings.METADATA_CACHE_USE_REDIS:
+        redis = Redis(host=server_settings.REDIS_HOST, port=server_settings.REDIS_PORT,
+                      password=server_settings.REDIS_PASSWORD)
+    return MetadataCache(redis=redis)
+
+
+metadata_cache = _make_cache()
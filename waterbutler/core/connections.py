@@ -0,0 +1,140 @@
+import time
+import typing
+import asyncio
+import logging
+import weakref
+from urllib import parse
+
+import aiohttp
+
+from waterbutler import settings as wb_settings
+
+
+logger = logging.getLogger(__name__)
+
+
+def close_session(session: aiohttp.ClientSession) -> None:
+    """Synchronously close an :class:`aiohttp.ClientSession` and the connector it owns.  This is a
+    slightly modified version of how ``aiohttp-3.5.4`` closes sessions and connectors.
+
+    1. sessions: https://github.com/aio-libs/aiohttp/blob/v3.5.4/aiohttp/client.py#L893
+    2. connectors: https://github.com/aio-libs/aiohttp/blob/v3.5.4/aiohttp/connector.py#L389
+        2.1 Update: https://github.com/aio-libs/aiohttp/pull/3417/files.
+
+    We try to avoid accessing protected members unless we can't.  For example, we use
+    ``session.connector`` instead of ``session._connector``, and use ``session.detach()`` instead
+    of calling ``session._connector = None``.  We have to use ``session._connector_owner`` since it
+    doesn't have a public property. We have to call ``connector._close()`` instead of
+    ``connector.close()`` since ``aiohttp`` decided to make ``.close()`` async recently.
+    """
+    if not session.closed:
+        if session.connector is not None and session._connector_owner:
+            session.connector._close()
+        session.detach()
+
+
+def pool_key(url: str) -> typing.Tuple[str, str, typing.Optional[int]]:
+    """Build the key identifying the upstream host that ``url`` points at.  Userinfo is dropped
+    and the host is lowercased, so that ``https://User@Example.com/`` and
+    ``https://example.com/foo`` share a pool.
+
+    :param str url: the url a request will be sent to
+    :rtype: `tuple`
+    :return: a ``(scheme, host, port)`` tuple
+    """
+    parts = parse.urlsplit(str(url))
+    return parts.scheme.lower(), (parts.hostname or '').lower(), parts.port
+
+
+class ConnectionPool:
+    """A process-wide registry of :class:`aiohttp.ClientSession` objects, keyed by event loop and
+    upstream host.  Each session owns a keep-alive :class:`aiohttp.TCPConnector`, so every provider
+    instance talking to the same host on the same loop reuses already-established TCP+TLS
+    connections instead of doing its own handshake.
+
+    Quirks:
+
+    * Sessions are still per event loop, since actions such as move and copy are run in celery
+      tasks that may have a loop of their own.  The loop map is weakly-keyed so that sessions
+      belonging to a discarded loop can be garbage collected.
+
+    * Pooled sessions are shared between users, so they must never carry per-request state.
+      Credentials stay in the per-request headers (see ``BaseProvider.build_headers``) and the
+      sessions use a :class:`aiohttp.DummyCookieJar` so that cookies set by one response are never
+      replayed on another user's request.
+
+    * Sessions that have not been used for ``idle_timeout`` seconds and have no connections checked
+      out are evicted and closed the next time the pool for that loop is accessed.
+
+    :param int limit_per_host: max number of simultaneous connections to a single host, across all
+        users and requests in the process.  0, the default, means no limit.
+    :param int keepalive_timeout: seconds to keep an idle connection open for reuse
+    :param int idle_timeout: seconds after which an unused session is evicted from the pool
+    """
+
+    def __init__(self, limit_per_host: int=wb_settings.HTTP_POOL_LIMIT_PER_HOST,
+                 keepalive_timeout: int=wb_settings.HTTP_POOL_KEEPALIVE_TIMEOUT,
+                 idle_timeout: int=wb_settings.HTTP_POOL_IDLE_TIMEOUT) -> None:
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.idle_timeout = idle_timeout
+        # {loop: {(scheme, host, port): [session, last_used]}}
+        self._loops = weakref.WeakKeyDictionary()  # type: weakref.WeakKeyDictionary
+
+    def __len__(self):
+        return sum(len(sessions) for sessions in self._loops.values())
+
+    def get_session(self, url: str) -> aiohttp.ClientSession:
+        """Obtain the pooled session for the host of ``url`` on the current event loop, creating
+        it if it does not exist yet.  Evicts idle sessions for the current loop as a side effect.
+
+        :param str url: the url a request will be sent to
+        :rtype: :class:`aiohttp.ClientSession`
+        """
+        loop = asyncio.get_event_loop()
+        sessions = self._loops.setdefault(loop, {})
+        now = time.monotonic()
+        self._evict_idle(sessions, now)
+
+        key = pool_key(url)
+        entry = sessions.get(key)
+        if entry is None or entry[0].closed:
+            logger.debug('Opening pooled session for {}://{}:{}'.format(*key))
+            entry = [self._create_session(), now]
+            sessions[key] = entry
+        entry[1] = now
+        return entry[0]
+
+    def clear(self) -> None:
+        """Close every pooled session on every loop."""
+        for sessions in self._loops.values():
+            for session, _ in sessions.values():
+                close_session(session)
+            sessions.clear()
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=0,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        return aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.DummyCookieJar())
+
+    def _evict_idle(self, sessions: dict, now: float) -> None:
+        for key, (session, last_used) in list(sessions.items()):
+            if session.closed:
+                del sessions[key]
+            elif now - last_used > self.idle_timeout and not self._in_use(session):
+                logger.debug('Evicting idle pooled session for {}://{}:{}'.format(*key))
+                close_session(session)
+                del sessions[key]
+
+    @staticmethod
+    def _in_use(session: aiohttp.ClientSession) -> bool:
+        """``True`` if any of the session's connections are still checked out, e.g. by a response
+        that is being streamed to the client."""
+        connector = session.connector
+        return connector is not None and bool(getattr(connector, '_acquired', None))
+
+
+pool = ConnectionPool()
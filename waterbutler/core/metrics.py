@@ -59,14 +59,15 @@ class MetricsBase():
         """
         self._set_dotted_key(self._metrics, key, value)
 
-    def incr(self, key):
-        """incr() increments the value stored in key, or initializes it to 1 if it has not yet been
-        set.
+    def incr(self, key, amount=1):
+        """incr() increments the value stored in key by ``amount``, or initializes it to ``amount``
+        if it has not yet been set.
 
         :param str key: the key to increment the ``value`` of
+        :param amount: how much to increment by, defaults to 1
         """
         value = self._get_dotted_key(self._metrics, key)
-        self._set_dotted_key(self._metrics, key, 1 if value is None else value + 1)
+        self._set_dotted_key(self._metrics, key, amount if value is None else value + amount)
 
     def append(self, key, new_value):
         """Assume key points to a list and append ``new_value`` to it.  Will initialize a list if
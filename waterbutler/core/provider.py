@@ -1,56 +1,36 @@
 import abc
-import time
 import typing
 import asyncio
 import logging
 import weakref
 import functools
 import itertools
+import collections
 from urllib import parse
 
 import furl
 import aiohttp
+import dateutil.parser
 from aiohttp.client import _RequestContextManager
 
 from waterbutler.core import streams
 from waterbutler.core import exceptions
+from waterbutler.core import connections
 from waterbutler.core import path as wb_path
+from waterbutler.core import cache as wb_cache
 from waterbutler import settings as wb_settings
+from waterbutler.core.scheduler import scheduler
 from waterbutler.core.metrics import MetricsRecord
 from waterbutler.core import metadata as wb_metadata
 from waterbutler.core.utils import ZipStreamGenerator
 from waterbutler.core.utils import RequestHandlerContext
+from waterbutler.core import singleflight as wb_singleflight
 
 
 logger = logging.getLogger(__name__)
-_THROTTLES = weakref.WeakKeyDictionary()  # type: weakref.WeakKeyDictionary
 
-
-def throttle(concurrency=10, interval=1):
-    def _throttle(func):
-        @functools.wraps(func)
-        async def wrapped(*args, **kwargs):
-            if asyncio.get_event_loop() not in _THROTTLES:
-                count, last_call, event = 0, time.time(), asyncio.Event()
-                _THROTTLES[asyncio.get_event_loop()] = (count, last_call, event)
-                event.set()
-            else:
-                count, last_call, event = _THROTTLES[asyncio.get_event_loop()]
-
-            await event.wait()
-            count += 1
-            if count > concurrency:
-                count = 0
-                if (time.time() - last_call) < interval:
-                    event.clear()
-                    await asyncio.sleep(interval - (time.time() - last_call))
-                    event.set()
-
-            last_call = time.time()
-            _THROTTLES[asyncio.get_event_loop()] = (count, last_call, event)
-            return await func(*args, **kwargs)
-        return wrapped
-    return _throttle
+# Earliest modification time a zip archive can hold
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
 
 
 def build_url(base, *segments, **query):
@@ -85,6 +65,34 @@ class BaseProvider(metaclass=abc.ABCMeta):
 
     BASE_URL = None
 
+    # Upstream requests are scheduled through a token bucket per `request_bucket_key()`. Providers
+    # override these with the values from their settings module.  A rate of 0 disables scheduling.
+    REQUEST_RATE = wb_settings.REQUEST_RATE  # requests per second
+    REQUEST_BURST = wb_settings.REQUEST_BURST
+
+    # If True, concurrent identical calls to `metadata()` and `validate_v1_path()` share a single
+    # upstream request.  See `_single_flight()`.
+    COALESCE_REQUESTS = wb_settings.COALESCE_REQUESTS
+
+    # Seconds to cache the results of `metadata()` for. 0 disables caching. See `_cached_metadata()`.
+    METADATA_CACHE_TTL = wb_settings.METADATA_CACHE_TTL
+
+    # Set to True by providers whose `download()` honors ``range``, so that large files copied or
+    # moved by celery are downloaded in concurrent segments.  See `_copy_download()`.
+    SEGMENTED_DOWNLOADS = False
+
+    # Methods that modify the storage, and how to find the paths they affect from their arguments.
+    # Each returns a list of `(provider, path)` tuples, where a provider of `None` means `self`.
+    _METADATA_WRITES = {
+        'upload': lambda stream, path, *args, **kwargs: [(None, path)],
+        'delete': lambda path, *args, **kwargs: [(None, path)],
+        'create_folder': lambda path, *args, **kwargs: [(None, path)],
+        'move': lambda dest, src, dest_path, *args, **kwargs: [(None, src), (dest, dest_path)],
+        'copy': lambda dest, src, dest_path, *args, **kwargs: [(dest, dest_path)],
+        'intra_move': lambda dest, src, dest_path, *args, **kwargs: [(None, src), (dest, dest_path)],
+        'intra_copy': lambda dest, src, dest_path, *args, **kwargs: [(dest, dest_path)],
+    }  # type: typing.Dict[str, typing.Callable]
+
     def __init__(self, auth: dict,
                  credentials: dict,
                  settings: dict,
@@ -108,37 +116,32 @@ class BaseProvider(metaclass=abc.ABCMeta):
         self.provider_metrics.add('auth', auth)
         self.metrics = self.provider_metrics.new_subrecord(self.NAME)
 
-        # The `.loop_session_map` ensures that only one session is created for one event loop per
-        # provider instance.  On one hand, we can't just have one session for each provider instance
-        # since actions such as move and copy are run in background probably with a different loop.
-        # On the other hand, we can't have one session for each request since sessions are only
-        # closed when the provider instance is destroyed. There would be too many for WB to handle.
+        # Most requests draw their session from the process-wide `connections.pool`.  Requests that
+        # need a customized connector (e.g. owncloud's ssl verification) can't share a pooled
+        # session, so the `.loop_session_map` ensures that only one such session is created for
+        # one event loop per provider instance.
         self.loop_session_map = weakref.WeakKeyDictionary()  # type: weakref.WeakKeyDictionary
         # The `.session_list` keeps track of all the sessions created for the provider instance so
         # that they can be properly closed upon instance destroy.
         self.session_list = []  # type: typing.List[aiohttp.ClientSession]
 
-    def __del__(self):
-        """
-        Manually close all sessions created during the life of the provider instance.  Our code are
-        a slightly modified version of how ``aiohttp-3.5.4`` closes sessions and connectors.
+        if self.COALESCE_REQUESTS:
+            self.metadata = self._single_flight(self.metadata)  # type: ignore
+            self.validate_v1_path = self._single_flight(self.validate_v1_path)  # type: ignore
 
-        1. sessions: https://github.com/aio-libs/aiohttp/blob/v3.5.4/aiohttp/client.py#L893
-        2. connectors: https://github.com/aio-libs/aiohttp/blob/v3.5.4/aiohttp/connector.py#L389
-            2.1 Update: https://github.com/aio-libs/aiohttp/pull/3417/files.
+        # Number of writes in progress that touch this provider, see `_invalidates_metadata()`
+        self._metadata_writes = 0
+        if self.METADATA_CACHE_TTL > 0:
+            self.metadata = self._cached_metadata(self.metadata)  # type: ignore
+            for name, get_paths in self._METADATA_WRITES.items():
+                setattr(self, name, self._invalidates_metadata(getattr(self, name), get_paths))
 
-        Our implementation tries to avoid accessing protected members unless we can't.  For example,
-        we use ``session.connector`` instead of ``session._connector``, and use ``session.detach()``
-        instead of calling ``session._connector = None``.  We have to ``session._connector_owner``
-        since it doesn't have an public property. We have to call ``connector._close()`` instead of
-        ``connector.close()`` since ``aiohttp`` decided to make ``.close()`` async recently. Here is
-        the PR: https://github.com/aio-libs/aiohttp/pull/3417/files.
+    def __del__(self):
+        """Manually close all sessions created during the life of the provider instance.  Pooled
+        sessions belong to :data:`waterbutler.core.connections.pool` and are left open.
         """
         for session in self.session_list:
-            if not session.closed:
-                if session.connector is not None and session._connector_owner:
-                    session.connector._close()
-                session.detach()
+            connections.close_session(session)
 
     @property
     @abc.abstractmethod
@@ -187,7 +190,7 @@ class BaseProvider(metaclass=abc.ABCMeta):
             if value is not None
         }
 
-    def get_or_create_session(self, connector=None):
+    def get_or_create_session(self, connector=None, url=None):
         """
         Obtain an existing session or create a new one for making requests.
 
@@ -196,7 +199,11 @@ class BaseProvider(metaclass=abc.ABCMeta):
         Sessions must be carefully managed by WB.  On one hand, we can't just have one session for
         each provider instance since actions such as move and copy are run in background probably
         with a different loop.  On the other hand, we can't have one session for each request since
-        sessions are only closed when the provider instance is destroyed.
+        every new session has to do its own TCP+TLS handshake with the upstream.
+
+        If ``url`` is given and no customized connector is, the session is drawn from the
+        process-wide :data:`waterbutler.core.connections.pool`, which is shared by all provider
+        instances and keyed by event loop and upstream host.
 
         For providers that use a customized connector such as owncloud, the new session is created
         with the given connector; while an existing session simply ignores (and closes) the new
@@ -204,9 +211,13 @@ class BaseProvider(metaclass=abc.ABCMeta):
         found must already have a connector with qualified customizations.
 
         :param connector: a customized connector
+        :param str url: the url the session will be used to make a request to
         :return: the one session that belongs to the current event loop
         :rtype: :class:`aiohttp.ClientSession`
         """
+        if connector is None and url is not None:
+            return connections.pool.get_session(url)
+
         loop = asyncio.get_event_loop()
         session = self.loop_session_map.get(loop, None)
         if not session:
@@ -219,7 +230,118 @@ class BaseProvider(metaclass=abc.ABCMeta):
 
         return session
 
-    @throttle()
+    def _single_flight(self, func: typing.Callable) -> typing.Callable:
+        """Wrap the bound coroutine method ``func`` so that concurrent calls with the same provider
+        name, settings, credentials, path and kwargs (e.g. ``revision``) share one in-flight call.
+        Credentials are hashed and never kept in the key.  Used for ``metadata`` and
+        ``validate_v1_path`` when ``COALESCE_REQUESTS`` is enabled.
+        """
+        @functools.wraps(func)
+        async def wrapped(path, *args, **kwargs):
+            key = (
+                self.NAME,
+                func.__name__,
+                wb_singleflight.stable_hash(self.settings),
+                wb_singleflight.stable_hash(self.credentials),
+                wb_singleflight.path_key(path),
+                wb_singleflight.stable_hash([args, kwargs]),
+            )
+            return await wb_singleflight.singleflight.do(key, func, path, *args, **kwargs)
+        return wrapped
+
+    @property
+    def _metadata_cache_scope(self) -> str:
+        """Cache entries are scoped to the provider name, settings and credentials, so that two
+        users only ever share entries if they'd get the same answer from the upstream."""
+        return '{}:{}'.format(self.NAME, wb_singleflight.stable_hash([self.settings,
+                                                                      self.credentials]))
+
+    def _metadata_cache_bucket(self, path) -> str:
+        """The cache bucket holding every cached variant of ``path``.  Buckets are named after the
+        materialized path, so a folder's bucket name is a prefix of the names of its descendants'.
+        """
+        if isinstance(path, wb_path.WaterButlerPath):
+            path = '{}:{}'.format(wb_singleflight.stable_hash(path.extra), path.materialized_path)
+        return wb_cache.MetadataCache.bucket(self._metadata_cache_scope, str(path))
+
+    def _cached_metadata(self, func: typing.Callable) -> typing.Callable:
+        """Wrap the bound ``metadata`` method with a read-through lookup in
+        :data:`waterbutler.core.cache.metadata_cache`.  Entries live for ``METADATA_CACHE_TTL``
+        seconds, or until one of the methods in ``_METADATA_WRITES`` touches the path.  Hits and
+        misses are counted in ``provider_metrics`` under ``metadata_cache``.
+
+        The cache is bypassed while a write to this provider is in progress, so that a write never
+        sees metadata from before it started, e.g. when an upload returns the metadata of the file
+        it has just overwritten.
+        """
+        @functools.wraps(func)
+        async def wrapped(path, *args, **kwargs):
+            if self._metadata_writes:
+                return await func(path, *args, **kwargs)
+
+            bucket = self._metadata_cache_bucket(path)
+            variant = wb_singleflight.stable_hash([wb_singleflight.path_key(path), args, kwargs])
+
+            hit, value = wb_cache.metadata_cache.get(bucket, variant)
+            if hit:
+                self.provider_metrics.incr('metadata_cache.hits')
+                return value
+
+            self.provider_metrics.incr('metadata_cache.misses')
+            value = await func(path, *args, **kwargs)
+            wb_cache.metadata_cache.set(bucket, variant, value, self.METADATA_CACHE_TTL)
+            return value
+        return wrapped
+
+    def _invalidates_metadata(self, func: typing.Callable,
+                              get_paths: typing.Callable) -> typing.Callable:
+        """Wrap the bound write method ``func`` so that cached metadata for the paths it affects
+        is invalidated before it starts and again once it finishes, whether it succeeded or not.
+        Every provider it touches bypasses the cache while it runs."""
+        @functools.wraps(func)
+        async def wrapped(*args, **kwargs):
+            affected = [(provider or self, path) for provider, path in get_paths(*args, **kwargs)]
+            affected = [(provider, path) for provider, path in affected
+                        if isinstance(provider, BaseProvider)]
+            writers = list({id(provider): provider for provider, _ in affected}.values())
+
+            for provider in writers:
+                provider._metadata_writes += 1
+            for provider, path in affected:
+                provider.invalidate_metadata(path)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                for provider in writers:
+                    provider._metadata_writes -= 1
+                for provider, path in affected:
+                    provider.invalidate_metadata(path)
+        return wrapped
+
+    def invalidate_metadata(self, path: wb_path.WaterButlerPath) -> None:
+        """Drop cached metadata for ``path`` and its parent.  If ``path`` is a folder, everything
+        cached beneath it is dropped too.  A no-op if metadata caching is disabled.
+
+        :param path: ( :class:`.WaterButlerPath` ) the path that was modified
+        """
+        if self.METADATA_CACHE_TTL <= 0 or not isinstance(path, wb_path.WaterButlerPath):
+            return
+
+        buckets = [self._metadata_cache_bucket(path)]
+        if path.parent is not None:
+            buckets.append(self._metadata_cache_bucket(path.parent))
+        prefixes = [buckets[0]] if path.is_dir else []
+        wb_cache.metadata_cache.invalidate(*buckets, prefixes=prefixes)
+
+    def request_bucket_key(self, url: str) -> typing.Hashable:
+        """Identifies the token bucket that requests to ``url`` are scheduled through.  Defaults to
+        one bucket per provider and upstream host.  Providers whose vendor enforces rate limits
+        per account may override this to include an account identifier.
+
+        :param str url: the url a request will be sent to
+        """
+        return self.NAME, connections.pool_key(url)[1]
+
     async def make_request(self, method, url, *args, **kwargs):
         r"""
         A wrapper around seven HTTP request methods in :class:`aiohttp.ClientSession`.  It replaces
@@ -244,8 +366,8 @@ class BaseProvider(metaclass=abc.ABCMeta):
 
         :func:`__init__()`: session list and event loop map initialization
         :func:`__del__()`: session and connection closing
-        :func:`get_or_create_session()`: either get the current session or create a new one if not
-        found when making a request
+        :func:`get_or_create_session()`: either get the pooled session for the upstream host or
+        create a new one if not found when making a request
 
         :param method: ( :class:`str` ) The HTTP method
         :param url: The URL or URL-to-be to send the request to
@@ -280,12 +402,20 @@ class BaseProvider(metaclass=abc.ABCMeta):
         if byte_range:
             kwargs['headers']['Range'] = self._build_range_header(byte_range)
         connector = kwargs.pop('connector', None)
-        session = self.get_or_create_session(connector=connector)
+        if connector is not None:
+            session = self.get_or_create_session(connector=connector)
 
         method = method.upper()
         while retry >= 0:
             # Don't overwrite the callable ``url`` so that signed URLs are refreshed for every retry
             non_callable_url = url() if callable(url) else url
+            if connector is None:
+                session = self.get_or_create_session(url=non_callable_url)
+            queued_time = await scheduler.acquire(self.request_bucket_key(non_callable_url),
+                                                  self.REQUEST_RATE, self.REQUEST_BURST)
+            if queued_time:
+                self.provider_metrics.incr('requests.queued.count')
+                self.provider_metrics.incr('requests.queued.time', queued_time)
             try:
                 self.provider_metrics.incr('requests.count')
                 # TODO: use a `dict` to select methods with either `lambda` or `functools.partial`
@@ -385,7 +515,9 @@ class BaseProvider(metaclass=abc.ABCMeta):
             return await self.intra_move(*args)
 
         if src_path.is_dir:
-            meta_data, created = await self._folder_file_op(self.move, *args, **kwargs)  # type: ignore
+            meta_data, created = await self._folder_file_op(self.move, *args,  # type: ignore
+                                                            can_intra=self.can_intra_move,
+                                                            **kwargs)
         else:
             meta_data, created = await self.copy(*args, handle_naming=False, **kwargs)  # type: ignore
 
@@ -431,38 +563,113 @@ class BaseProvider(metaclass=abc.ABCMeta):
             return await self.intra_copy(*args)
 
         if src_path.is_dir:
-            return await self._folder_file_op(self.copy, *args, **kwargs)  # type: ignore
+            return await self._folder_file_op(self.copy, *args,  # type: ignore
+                                              can_intra=self.can_intra_copy, **kwargs)
 
-        download_stream = await self.download(src_path)
+        download_stream = await self._copy_download(src_path)
 
         if getattr(download_stream, 'name', None):
             dest_path.rename(download_stream.name)
 
-        return await dest_provider.upload(download_stream, dest_path)
+        try:
+            return await dest_provider.upload(download_stream, dest_path)
+        finally:
+            if isinstance(download_stream, streams.SegmentedStream):
+                download_stream.close()
+
+    async def _copy_download(self, path: wb_path.WaterButlerPath) -> streams.BaseStream:
+        """Download the file at ``path`` to be copied to another provider.  Inside celery tasks,
+        files of at least ``SEGMENTED_DOWNLOAD_THRESHOLD`` bytes from providers that set
+        ``SEGMENTED_DOWNLOADS`` are fetched as concurrent byte ranges, see `SegmentedStream`.
+        """
+        threshold = wb_settings.SEGMENTED_DOWNLOAD_THRESHOLD
+        if self.SEGMENTED_DOWNLOADS and self.is_celery_task and threshold > 0:
+            metadata = await self.metadata(path)
+            size = metadata.size_as_int  # type: ignore
+            if size is not None and size >= threshold:
+                self.provider_metrics.add('copy.segmented_download', True)
+                return streams.SegmentedStream(functools.partial(self.download, path), size,
+                                               wb_settings.SEGMENTED_DOWNLOAD_SEGMENT_SIZE,
+                                               wb_settings.SEGMENTED_DOWNLOAD_CONCURRENCY)
+        return await self.download(path)
 
     async def _folder_file_op(self,
                               func: typing.Callable,
                               dest_provider: 'BaseProvider',
                               src_path: wb_path.WaterButlerPath,
                               dest_path: wb_path.WaterButlerPath,
+                              can_intra: typing.Callable=None,
                               **kwargs) -> typing.Tuple[wb_metadata.BaseFolderMetadata, bool]:
         """Recursively apply func to src/dest path.
 
+        The tree is walked by a pool of ``OP_CONCURRENCY`` workers sharing a queue of jobs, one job
+        per child of a folder.  The children of each folder are revalidated in bulk with
+        ``revalidate_children`` as soon as it is listed.  A job for a file calls ``func`` on it.
+        A job for a folder recreates the folder at the destination and queues jobs for its
+        children, so subfolders are walked alongside their siblings instead of blocking them.
+        Folders that ``can_intra`` says ``func`` can handle in a single intra op are passed to
+        ``func`` like files.  The first failure cancels all other jobs and is reraised.
+
+        Children are listed in the returned metadata in the same order as in the source listing.
+
         Called from: func: copy and move if src_path.is_dir.
 
         Calls: func: dest_provider.delete and notes result for bool: created
                func: dest_provider.create_folder
                func: dest_provider.revalidate_path
+               func: dest_provider.revalidate_children
+               func: self.revalidate_children
                func: self.metadata
 
         :param coroutine func: to be applied to src/dest path
         :param *Provider dest_provider: Destination provider
         :param *ProviderPath src_path: Source path
         :param *ProviderPath dest_path: Destination path
+        :param callable can_intra: ``can_intra_move`` or ``can_intra_copy``, whichever matches
+            ``func``.  If omitted, every subfolder is walked.
         """
         assert src_path.is_dir, 'src_path must be a directory'
         assert asyncio.iscoroutinefunction(func), 'func must be a coroutine'
 
+        folder, created, dest_path, items = await self._folder_op_prepare(dest_provider, src_path,
+                                                                          dest_path)
+
+        queue = asyncio.Queue()  # type: asyncio.Queue
+        await self._folder_op_enqueue(queue, dest_provider, src_path, dest_path, items, folder)
+
+        async def worker():
+            while True:
+                job = await queue.get()
+                try:
+                    await self._folder_op_job(queue, func, can_intra, dest_provider, *job)
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(wb_settings.OP_CONCURRENCY)]
+        finished = asyncio.ensure_future(queue.join())
+        try:
+            await asyncio.wait(workers + [finished], return_when=asyncio.FIRST_COMPLETED)
+            for fut in workers:
+                if fut.done():
+                    fut.result()  # a worker only stops if its job failed
+        finally:
+            pending = [fut for fut in workers + [finished] if not fut.done()]
+            for fut in pending:
+                fut.cancel()
+            if pending:
+                await asyncio.wait(pending)
+
+        return folder, created
+
+    async def _folder_op_prepare(self,
+                                 dest_provider: 'BaseProvider',
+                                 src_path: wb_path.WaterButlerPath,
+                                 dest_path: wb_path.WaterButlerPath) \
+            -> typing.Tuple[wb_metadata.BaseFolderMetadata, bool, wb_path.WaterButlerPath, list]:
+        """Replace the folder at ``dest_path`` with a new, empty folder and list the children of
+        ``src_path``.  Returns the new folder's metadata, whether it was created rather than
+        replaced, its revalidated path, and the source listing.
+        """
         try:
             await dest_provider.delete(dest_path)
             created = False
@@ -475,37 +682,53 @@ class BaseProvider(metaclass=abc.ABCMeta):
 
         dest_path = await dest_provider.revalidate_path(dest_path.parent, dest_path.name, folder=dest_path.is_dir)
 
-        folder.children = []
         items = await self.metadata(src_path)  # type: ignore
 
         # Metadata returns a union, which confuses mypy
         self.provider_metrics.append('_folder_file_ops.item_counts', len(items))  # type: ignore
 
-        for i in range(0, len(items), wb_settings.OP_CONCURRENCY):  # type: ignore
-            futures = []
-            for item in items[i:i + wb_settings.OP_CONCURRENCY]:  # type: ignore
-                futures.append(asyncio.ensure_future(
-                    func(
-                        dest_provider,
-                        # TODO figure out a way to cut down on all the requests made here
-                        (await self.revalidate_path(src_path, item.name, folder=item.is_folder)),
-                        (await dest_provider.revalidate_path(dest_path, item.name, folder=item.is_folder)),
-                        handle_naming=False,
-                    )
-                ))
-
-                if item.is_folder:
-                    await futures[-1]
-
-            if not futures:
-                continue
-
-            done, _ = await asyncio.wait(futures, return_when=asyncio.FIRST_EXCEPTION)
+        return folder, created, dest_path, items  # type: ignore
+
+    async def _folder_op_enqueue(self,
+                                 queue: asyncio.Queue,
+                                 dest_provider: 'BaseProvider',
+                                 src_path: wb_path.WaterButlerPath,
+                                 dest_path: wb_path.WaterButlerPath,
+                                 items: list,
+                                 folder: wb_metadata.BaseFolderMetadata) -> None:
+        """Revalidate every item in ``items`` under both ``src_path`` and ``dest_path`` and queue
+        a job for each.  Each job fills in its own slot of ``folder.children``.
+        """
+        children = [(item.name, item.is_folder) for item in items]
+        src_children, dest_children = await asyncio.gather(
+            self.revalidate_children(src_path, children),
+            dest_provider.revalidate_children(dest_path, children),
+        )
 
-            for fut in done:
-                folder.children.append(fut.result()[0])
+        folder.children = [None] * len(items)
+        for index, item in enumerate(items):
+            queue.put_nowait((src_children[index], dest_children[index], item, folder.children, index))
+
+    async def _folder_op_job(self,
+                             queue: asyncio.Queue,
+                             func: typing.Callable,
+                             can_intra: typing.Optional[typing.Callable],
+                             dest_provider: 'BaseProvider',
+                             src_path: wb_path.WaterButlerPath,
+                             dest_path: wb_path.WaterButlerPath,
+                             item: wb_metadata.BaseMetadata,
+                             children: list,
+                             index: int) -> None:
+        if item.is_folder and not (can_intra and can_intra(dest_provider, src_path)):
+            folder, _, dest_path, items = await self._folder_op_prepare(dest_provider, src_path,
+                                                                        dest_path)
+            await self._folder_op_enqueue(queue, dest_provider, src_path, dest_path, items, folder)
+            children[index] = folder
+        else:
+            children[index] = (await func(dest_provider, src_path, dest_path, handle_naming=False))[0]
 
-        return folder, created
+        self.provider_metrics.incr('_folder_file_ops.items_completed')
+        logger.debug('_folder_file_op: finished {} -> {}'.format(src_path, dest_path))
 
     async def handle_naming(self,
                             src_path: wb_path.WaterButlerPath,
@@ -686,18 +909,158 @@ class BaseProvider(metaclass=abc.ABCMeta):
         """
         return base.child(path, folder=folder)
 
-    async def zip(self, path: wb_path.WaterButlerPath, **kwargs) -> asyncio.StreamReader:
+    async def revalidate_children(self,
+                                  base: wb_path.WaterButlerPath,
+                                  children: typing.Sequence[typing.Tuple[str, bool]]) \
+            -> typing.List[wb_path.WaterButlerPath]:
+        """Bulk version of :meth:`revalidate_path`.  Build a WaterButlerPath for each
+        ``(name, folder)`` pair in ``children``, all of which are children of ``base``.  Returns the
+        paths in the same order as ``children``.
+
+        The default implementation calls ``revalidate_path`` for each child.  Providers that have
+        to list ``base`` to look up a child's id should override this to list it only once.
+
+        :param  base: ( :class:`.WaterButlerPath` ) The base folder to look under
+        :param children: ( :class:`list` ) of ``(name, folder)`` tuples
+        :rtype: :class:`list` of :class:`.WaterButlerPath`
+        """
+        return list(await asyncio.gather(*[
+            self.revalidate_path(base, name, folder=folder) for name, folder in children
+        ]))
+
+    async def zip(self, path: wb_path.WaterButlerPath, compression_level: int=None,
+                  **kwargs) -> asyncio.StreamReader:
         """Streams a Zip archive of the given folder
 
         :param  path: ( :class:`.WaterButlerPath` ) The folder to compress
+        :param  int compression_level: zlib level to deflate files at, 0 to store them all.
+            Defaults to ``ZIP_COMPRESSION_LEVEL``.
+        """
+
+        path, contents = await self._zip_contents(path)
+        return streams.ZipStreamReader(ZipStreamGenerator(self, path, tree=contents),
+                                       compression_level=compression_level)
+
+    async def stored_zip(self, path: wb_path.WaterButlerPath,
+                         **kwargs) -> typing.Optional[streams.StoredZipArchive]:
+        """Lays out a store-only Zip archive of the given folder, whose size is known before it is
+        sent and any byte range of which can be streamed.  Returns `None` if the size of any file
+        in the folder isn't known, since the archive can't be laid out without it.
+
+        CRC32s computed while streaming the archive are cached for ``ZIP_CRC_CACHE_TTL`` seconds, so
+        that resuming the download only needs the files it resumes from.
+
+        :param  path: ( :class:`.WaterButlerPath` ) The folder to archive
         """
+        path, contents = await self._zip_contents(path)
+
+        entries, crc_keys = [], {}
+        remaining = collections.deque((path, item, children) for item, children in contents)
+        while remaining:
+            parent, item, children = remaining.popleft()
+            child = self.path_from_metadata(parent, item)
+            name = child.path.replace(path.path, '', 1)
+            if child.is_dir:
+                if children is None:
+                    children = [(child_item, None)
+                                for child_item in await self.metadata(child)]  # type: ignore
+                if children:
+                    remaining.extend((child, child_item, grandchildren)
+                                     for child_item, grandchildren in children)
+                else:
+                    entries.append(streams.StoredZipEntry(name, 0, ZIP_EPOCH))
+                continue
 
+            if item.size_as_int is None:
+                return None
+            date_time, version = self._stored_zip_details(item)
+            bucket = self._metadata_cache_bucket(child)
+            variant = 'zip-crc32:{}'.format(wb_singleflight.stable_hash([item.size_as_int,
+                                                                         date_time, version]))
+            crc = None
+            if wb_settings.ZIP_CRC_CACHE_TTL > 0:
+                _, crc = wb_cache.metadata_cache.get(bucket, variant)
+            crc_keys[name] = (bucket, variant)
+            entries.append(streams.StoredZipEntry(name, item.size_as_int, date_time,
+                                                  functools.partial(self.download, child),
+                                                  crc=crc, version=version))
+
+        def on_crc(entry):
+            if wb_settings.ZIP_CRC_CACHE_TTL > 0:
+                bucket, variant = crc_keys[entry.zinfo.filename]
+                wb_cache.metadata_cache.set(bucket, variant, entry.zinfo.CRC,
+                                            wb_settings.ZIP_CRC_CACHE_TTL)
+
+        return streams.StoredZipArchive(entries, on_crc=on_crc)
+
+    async def folder_tree(self, path: wb_path.WaterButlerPath,
+                          **kwargs) -> typing.Optional[typing.List[tuple]]:
+        """Lists everything under the folder at ``path`` at once, for providers that can do so in
+        fewer requests than listing each folder in turn.  Returns the folder's contents as
+        ``(metadata, children)`` pairs, where ``children`` is a list of such pairs for a folder and
+        `None` for a file, or `None` if the provider can't list folders recursively.  Used to
+        expand folders for zipping.
+
+        :param  path: ( :class:`.WaterButlerPath` ) The folder to list
+        """
+        return None
+
+    @staticmethod
+    def _nest_folder_tree(entries: typing.Iterable[typing.Tuple[str, wb_metadata.BaseMetadata]]) \
+            -> typing.List[tuple]:
+        """Builds the return value of `folder_tree` from a flat listing.  ``entries`` are
+        ``(relative_path, metadata)`` pairs, where ``relative_path`` is the entry's path relative
+        to the listed folder, with a trailing slash for folders.  An entry whose parent folder
+        isn't listed is dropped, as is the listed folder itself.
+        """
+        entries = [(relative, item) for relative, item in entries if relative.strip('/')]
+        children = {'': []}  # type: typing.Dict[str, list]
+        for relative, item in entries:
+            if relative.endswith('/'):
+                children[relative] = []
+
+        for relative, item in entries:
+            parent = relative.rstrip('/').rpartition('/')[0]
+            siblings = children.get(parent + '/' if parent else '')
+            if siblings is not None:
+                siblings.append((item, children.get(relative) if relative.endswith('/') else None))
+
+        return children['']
+
+    async def _zip_contents(self, path: wb_path.WaterButlerPath) \
+            -> typing.Tuple[wb_path.WaterButlerPath, typing.List[tuple]]:
+        """The folder to zip and its contents as ``(metadata, children)`` pairs, as for
+        `folder_tree`.  Folders whose ``children`` is `None` still have to be listed.  If ``path``
+        is a file, zips it on its own from its parent folder.
+        """
         meta_data = await self.metadata(path)  # type: ignore
         if path.is_file:
-            meta_data = [meta_data]  # type: ignore
-            path = path.parent
-
-        return streams.ZipStreamReader(ZipStreamGenerator(self, path, *meta_data))  # type: ignore
+            return path.parent, [(meta_data, None)]
+
+        if any(item.is_folder for item in meta_data):  # type: ignore
+            tree = await self.folder_tree(path)
+            if tree is not None:
+                return path, tree
+        return path, [(item, None) for item in meta_data]  # type: ignore
+
+    @staticmethod
+    def _stored_zip_details(meta_data: wb_metadata.BaseFileMetadata) -> typing.Tuple[tuple, str]:
+        """The zip modification time of a file and a version string for it, from whatever of its
+        modification time and etag the provider reports.  Both must be the same every time the
+        unchanged file is archived.
+        """
+        date_time, version = ZIP_EPOCH, None
+        try:
+            modified = dateutil.parser.parse(meta_data.modified_utc)
+            if modified.year >= ZIP_EPOCH[0]:
+                date_time = modified.timetuple()[:6]
+        except (NotImplementedError, KeyError, TypeError, ValueError, OverflowError):
+            pass
+        try:
+            version = str(meta_data.etag)
+        except (NotImplementedError, KeyError, TypeError):
+            pass
+        return date_time, version
 
     def shares_storage_root(self, other: 'BaseProvider') -> bool:
         """Returns True if ``self`` and ``other`` both point to the same storage root.  Used to
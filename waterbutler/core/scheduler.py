@@ -0,0 +1,166 @@
+import typing
+import asyncio
+import logging
+import weakref
+import collections
+
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """A token bucket that hands out tokens to waiting requests in the order they asked for them.
+
+    The bucket holds at most ``burst`` tokens and regains ``rate`` tokens per second.  Each
+    request consumes one token.  If a token is available and nobody is queued ahead, ``acquire``
+    returns immediately.  Otherwise the caller joins a FIFO queue and is woken by a timer once a
+    token has accumulated, so a burst of requests is spread out evenly instead of sleeping and
+    waking all at once.
+
+    :param float rate: tokens added per second
+    :param int burst: max number of tokens the bucket can hold
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        assert rate > 0, 'rate must be positive'
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.loop = asyncio.get_event_loop()
+
+        self._tokens = float(self.burst)
+        self._last_refill = self.loop.time()
+        self._waiters = collections.deque()  # type: typing.Deque[asyncio.Future]
+        self._timer = None  # type: typing.Optional[asyncio.Handle]
+
+        # counters for reporting
+        self.granted = 0
+        self.queued = 0
+        self.queued_time = 0.0
+
+    @property
+    def waiting(self) -> int:
+        """Number of requests currently queued for a token."""
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    async def acquire(self) -> float:
+        """Wait for a token and consume it.
+
+        :rtype: `float`
+        :return: the number of seconds spent queued
+        """
+        if not self._waiters and self._take():
+            self.granted += 1
+            return 0.0
+
+        start = self.loop.time()
+        waiter = self.loop.create_future()
+        self._waiters.append(waiter)
+        self._schedule_wakeup()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The token was granted before we got cancelled. Hand it back to the next waiter.
+                self._tokens = min(self._tokens + 1, self.burst)
+                self._wakeup()
+            raise
+
+        waited = self.loop.time() - start
+        self.granted += 1
+        self.queued += 1
+        self.queued_time += waited
+        return waited
+
+    def _refill(self) -> None:
+        now = self.loop.time()
+        self._tokens = min(self._tokens + (now - self._last_refill) * self.rate, self.burst)
+        self._last_refill = now
+
+    def _take(self) -> bool:
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def _schedule_wakeup(self) -> None:
+        if self._timer is not None:
+            return
+        self._refill()
+        delay = max(0.0, (1 - self._tokens) / self.rate)
+        self._timer = self.loop.call_later(delay, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._wakeup()
+
+    def _wakeup(self) -> None:
+        while self._waiters:
+            waiter = self._waiters[0]
+            if waiter.done():
+                self._waiters.popleft()
+                continue
+            if not self._take():
+                break
+            self._waiters.popleft()
+            waiter.set_result(None)
+
+        if self._waiters:
+            self._schedule_wakeup()
+
+
+class RequestScheduler:
+    """Process-wide registry of :class:`TokenBucket` objects, one per event loop and key.  Providers
+    key their buckets by upstream host (and optionally account), so a burst of requests against one
+    provider is queued without delaying requests to unrelated providers.
+
+    Buckets are created with the rate and burst of the first request that uses them.  A rate of
+    ``0`` or less disables scheduling for that request.
+    """
+
+    def __init__(self) -> None:
+        # {loop: {key: bucket}}
+        self._loops = weakref.WeakKeyDictionary()  # type: weakref.WeakKeyDictionary
+
+    def get_bucket(self, key: typing.Hashable, rate: float, burst: int) -> TokenBucket:
+        buckets = self._loops.setdefault(asyncio.get_event_loop(), {})
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = TokenBucket(rate, burst)
+        return bucket
+
+    async def acquire(self, key: typing.Hashable, rate: float, burst: int) -> float:
+        """Wait until a request identified by ``key`` may be sent upstream.
+
+        :param key: identifies the bucket, usually ``(provider name, host)``
+        :param float rate: requests per second allowed for ``key``
+        :param int burst: number of requests that may be sent back-to-back
+        :rtype: `float`
+        :return: the number of seconds spent queued
+        """
+        if rate <= 0:
+            return 0.0
+
+        waited = await self.get_bucket(key, rate, burst).acquire()
+        if waited:
+            logger.debug('Request for {} was queued for {:.3f}s'.format(key, waited))
+        return waited
+
+    def stats(self) -> dict:
+        """Counters for every bucket on the current loop, keyed by ``str(key)``."""
+        buckets = self._loops.get(asyncio.get_event_loop(), {})
+        return {
+            str(key): {
+                'granted': bucket.granted,
+                'queued': bucket.queued,
+                'queued_time': bucket.queued_time,
+                'waiting': bucket.waiting,
+            }
+            for key, bucket in buckets.items()
+        }
+
+    def clear(self) -> None:
+        self._loops.clear()
+
+
+scheduler = RequestScheduler()
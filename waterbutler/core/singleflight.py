@@ -0,0 +1,114 @@
+import copy
+import json
+import typing
+import asyncio
+import hashlib
+import logging
+import weakref
+
+from waterbutler.core import path as wb_path
+
+
+logger = logging.getLogger(__name__)
+
+
+def stable_hash(value) -> str:
+    """Hash a json-serializable value (e.g. provider settings or credentials) so that it can be
+    used in a key without keeping the raw value around.  Dict keys are sorted so that equal dicts
+    always produce the same hash.
+    """
+    serialized = json.dumps(value, sort_keys=True, default=repr)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+
+def path_key(path) -> typing.Hashable:
+    """Build a hashable key for a path argument.  Strings are used as-is.  For a
+    :class:`.WaterButlerPath` the key includes the value and identifier of every part, the kind,
+    the storage root and any provider-specific ``extra`` (e.g. the GitHub branch).
+    """
+    if not isinstance(path, wb_path.WaterButlerPath):
+        return str(path)
+
+    return (
+        type(path).__name__,
+        path.full_path,
+        path.kind,
+        repr([(part.value, part.identifier) for part in path.parts]),
+        stable_hash(path.extra),
+    )
+
+
+class SingleFlight:
+    """Coalesce concurrent identical calls into one.  The first caller for a given key starts the
+    call as an independent task; every caller that asks for the same key while that task is still
+    running awaits the same task instead of issuing its own.  Once the task finishes, the key is
+    forgotten, so nothing is cached beyond the lifetime of the in-flight call.
+
+    Quirks:
+
+    * The call runs in its own task and is shielded from its callers, so a client disconnecting
+      and cancelling the first request does not fail the requests that joined it.
+
+    * Results may be mutable (e.g. ``WaterButlerPath.rename``), so every caller gets its own
+      result.  Each caller but the last to pick it up gets a deep copy, taken before the original
+      is handed to anyone.
+
+    * Exceptions are propagated to every caller.
+    """
+
+    def __init__(self) -> None:
+        # {loop: {key: _Call}}
+        self._loops = weakref.WeakKeyDictionary()  # type: weakref.WeakKeyDictionary
+        self.started = 0
+        self.joined = 0
+
+    def in_flight(self) -> int:
+        return len(self._loops.get(asyncio.get_event_loop(), {}))
+
+    async def do(self, key: typing.Hashable, func: typing.Callable, *args, **kwargs):
+        """Call ``func(*args, **kwargs)``, or join an in-flight call with the same ``key``.
+
+        :param key: identifies calls that are interchangeable
+        :param func: coroutine function to call
+        :return: the result of the call
+        """
+        calls = self._loops.setdefault(asyncio.get_event_loop(), {})
+
+        call = calls.get(key)
+        if call is not None:
+            self.joined += 1
+            logger.debug('Joining in-flight call for {}'.format(key))
+        else:
+            self.started += 1
+            call = _Call(asyncio.ensure_future(func(*args, **kwargs)))
+            calls[key] = call
+            call.task.add_done_callback(lambda fut: self._forget(calls, key, call))
+
+        call.waiters += 1
+        try:
+            result = await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+        return result if call.waiters == 0 else copy.deepcopy(result)
+
+    @staticmethod
+    def _forget(calls: dict, key: typing.Hashable, call: '_Call') -> None:
+        if calls.get(key) is call:
+            del calls[key]
+        # Retrieve the exception so that asyncio doesn't complain about it never being retrieved
+        # if every caller was cancelled before the call finished.
+        if not call.task.cancelled():
+            call.task.exception()
+
+
+class _Call:
+    """An in-flight call of `SingleFlight` and the number of callers still waiting for it."""
+
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task: asyncio.Future) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+singleflight = SingleFlight()
@@ -14,7 +14,14 @@ from waterbutler.core.streams.http import ResponseStreamReader  # noqa
 
 from waterbutler.core.streams.metadata import HashStreamWriter  # noqa
 
+from waterbutler.core.streams.pipe import BytePipe  # noqa
+from waterbutler.core.streams.pipe import ReadAheadStream  # noqa
+
+from waterbutler.core.streams.segmented import SegmentedStream  # noqa
+
+from waterbutler.core.streams.zip import StoredZipEntry  # noqa
 from waterbutler.core.streams.zip import ZipStreamReader  # noqa
+from waterbutler.core.streams.zip import StoredZipArchive  # noqa
 
 from waterbutler.core.streams.base64 import Base64EncodeStream  # noqa
 
@@ -1,7 +1,9 @@
 import abc
 import asyncio
 
+from waterbutler.core.streams import settings
 from waterbutler.server.settings import CHUNK_SIZE
+from waterbutler.core.streams.metadata import HashStreamWriter
 
 
 class BaseStream(asyncio.StreamReader, metaclass=abc.ABCMeta):
@@ -12,12 +14,20 @@ class BaseStream(asyncio.StreamReader, metaclass=abc.ABCMeta):
 
     Classes that inherit from `BaseStream` must implement a ``_read()`` method that reads ``size``
     bytes from its source and returns it.
+
+    Chunks of at least ``HASH_OFFLOAD_MIN_SIZE`` bytes are fed to the `HashStreamWriter` writers
+    from a worker thread.  The next chunk is read while the last one is hashed.  The read that
+    reaches the stream's ``size`` (or its end, if the size isn't known) waits for hashing to
+    finish, so digests are complete once the stream has been consumed.
     """
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.readers = {}
         self.writers = {}
+        self._hashing = None
+        self._bytes_read = 0
+        self._expected_size = None  # type: int
 
     def __aiter__(self):
         return self
@@ -58,15 +68,50 @@ class BaseStream(asyncio.StreamReader, metaclass=abc.ABCMeta):
                 writer.write_eof()
 
     async def read(self, size=-1):
+        if self._expected_size is None:
+            # Taken before the first read, while nothing can be reading from the source
+            self._expected_size = self._known_size()
         eof = self.at_eof()
         data = await self._read(size)
         if not eof:
             for reader in self.readers.values():
                 reader.feed_data(data)
-            for writer in self.writers.values():
-                writer.write(data)
+            await self._write(data)
         return data
 
+    def _known_size(self):
+        """The stream's ``size``, or 0 if the size isn't known up front."""
+        try:
+            size = self.size
+        except (TypeError, ValueError):
+            return 0
+        return size if isinstance(size, int) and size > 0 else 0
+
+    def _consumed(self):
+        if self.at_eof():
+            return True
+        return 0 < self._expected_size <= self._bytes_read
+
+    async def _write(self, data):
+        if data:
+            self._bytes_read += len(data)
+        if self._hashing is not None:
+            await asyncio.wrap_future(self._hashing)
+            self._hashing = None
+
+        hashers = []
+        for writer in self.writers.values():
+            if isinstance(writer, HashStreamWriter) and len(data) >= settings.HASH_OFFLOAD_MIN_SIZE:
+                hashers.append(writer)
+            else:
+                writer.write(data)
+
+        if hashers:
+            self._hashing = HashStreamWriter.update_in_thread(hashers, data)
+            if self._consumed():
+                await asyncio.wrap_future(self._hashing)
+                self._hashing = None
+
     @abc.abstractmethod
     async def _read(self, size):
         pass
@@ -1,17 +1,43 @@
+import io
 import os
 import asyncio
 
+from waterbutler.core.streams import settings
 from waterbutler.core.streams.base import BaseStream
 
 
+def _positional_fd(file_pointer):
+    """Return the file descriptor of ``file_pointer`` if it can be read with ``os.pread``, else
+    ``None``.  Text files and in-memory files (e.g. `io.BytesIO`) have to be read sequentially.
+    """
+    if isinstance(file_pointer, io.TextIOBase) or not hasattr(os, 'pread'):
+        return None
+    try:
+        return file_pointer.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
 class FileStreamReader(BaseStream):
+    """Stream the contents of a file object.  The whole file is read, regardless of the current
+    position of the file pointer.
+
+    Reads are made in a worker thread, at least ``FILE_READ_AHEAD_SIZE`` bytes at a time, and the
+    next block is fetched while the last one is consumed.  Files with a file descriptor are read
+    with ``os.pread``, so the position of the file pointer is never used or changed.
+    """
 
     def __init__(self, file_pointer):
         super().__init__()
-        self.file_gen = None
         self.file_pointer = file_pointer
-        self.read_size = None
         self.content_type = 'application/octet-stream'
+        self._fd = _positional_fd(file_pointer)
+        self._start, self._end = 0, None  # byte range to read, ``_end`` is exclusive
+        self._position = None  # offset of the next block to fetch, None before the first read
+        self._exhausted = False
+        self._block, self._block_pos = None, 0
+        self._prefetch = None  # type: asyncio.Future
+        self._in_flight = None  # type: asyncio.Future
 
     @property
     def size(self):
@@ -22,40 +48,117 @@ class FileStreamReader(BaseStream):
         return ret
 
     def close(self):
-        self.file_pointer.close()
+        """Close the file.  If a block is still being read in a worker thread, the file is closed
+        once that read finishes, so the thread never reads from a closed or reused descriptor.
+        """
+        self._prefetch = None
+        if self._in_flight is not None and not self._in_flight.done():
+            self._in_flight.add_done_callback(self._close_after_read)
+        else:
+            self.file_pointer.close()
         self.feed_eof()
 
-    async def chunk_reader(self):
-        self.file_pointer.seek(0)
-        while True:
-            chunk = self.file_pointer.read(self.read_size)
-            if not chunk:
-                self.feed_eof()
-                yield b''
-
-            yield chunk
+    def local_range(self):
+        """The ``(file descriptor, offset, length)`` of the bytes this stream would return, so they
+        can be sent straight from the file with ``sendfile`` (see `waterbutler.server.utils.UtilMixin.write_stream`).
+        ``None`` if the file has no descriptor, or if the stream has already been read from or has
+        readers or writers that need to see the data.
+        """
+        if self._fd is None or self._position is not None or self.readers or self.writers:
+            return None
+        size = os.fstat(self._fd).st_size
+        end = size if self._end is None else min(self._end, size)
+        return self._fd, self._start, max(end - self._start, 0)
+
+    def _close_after_read(self, future):
+        if not future.cancelled():
+            future.exception()  # retrieve it, nobody is waiting for this block any more
+        self.file_pointer.close()
 
     async def _read(self, size):
-        self.file_gen = self.file_gen or self.chunk_reader()
-        self.read_size = size
-        # add sleep of 0 so read will yield and continue in next io loop iteration
-        # asyncio.sleep(0) yields None by default, which displeases tornado
-        await asyncio.sleep(0.001)
-        async for chunk in self.file_gen:
-            return chunk
+        loop = asyncio.get_event_loop()
+        if self._position is None:
+            self._position = self._start
+            await loop.run_in_executor(None, self._prepare)
+
+        chunks, wanted = [], size
+        while wanted != 0:
+            if not self._block_unread():
+                self._block, self._block_pos = await self._next_block(wanted), 0
+                if not self._block:
+                    break
+            end = len(self._block) if wanted < 0 else self._block_pos + wanted
+            chunk = self._block[self._block_pos:end]
+            self._block_pos += len(chunk)
+            if wanted > 0:
+                wanted -= len(chunk)
+            chunks.append(chunk)
+
+        if not chunks:
+            self.feed_eof()
+            return b''
+
+        if not self._block_unread() and not self._exhausted:
+            self._prefetch = self._fetch(settings.FILE_READ_AHEAD_SIZE)
+        return chunks[0] if len(chunks) == 1 else chunks[0][:0].join(chunks)
+
+    def _block_unread(self):
+        return self._block is not None and self._block_pos < len(self._block)
+
+    async def _next_block(self, wanted):
+        if self._prefetch is not None:
+            prefetch, self._prefetch = self._prefetch, None
+            return await prefetch
+        if self._exhausted:
+            return None
+        return await self._fetch(-1 if wanted < 0 else max(wanted, settings.FILE_READ_AHEAD_SIZE))
+
+    def _fetch(self, length):
+        """Start reading the next ``length`` bytes, or the rest of the range if ``length`` is -1,
+        in a worker thread.
+        """
+        if self._end is not None:
+            remaining = self._end - self._position
+            length = remaining if length < 0 else min(length, remaining)
+        if length < 0 or (self._end is not None and self._position + length >= self._end):
+            self._exhausted = True
+
+        offset = self._position
+        if length > 0:
+            self._position += length
+        self._in_flight = asyncio.get_event_loop().run_in_executor(None, self._read_block, offset,
+                                                                   length)
+        return self._in_flight
+
+    def _prepare(self):
+        if self._fd is None:
+            self.file_pointer.seek(self._start)
+            return
+        if hasattr(self.file_pointer, 'flush'):
+            # ``pread`` bypasses the file object, so make sure it has nothing left to write
+            self.file_pointer.flush()
+        if self._end is None:
+            self._end = os.fstat(self._fd).st_size
+
+    def _read_block(self, offset, length):
+        if length == 0:
+            return b''
+        if self._fd is None:
+            return self.file_pointer.read(length)
+        return os.pread(self._fd, length, offset)
 
 
 class PartialFileStreamReader(FileStreamReader):
-    """Awful class, used to avoid messing with FileStreamReader.  Extends FSR with start and end
-    byte offsets to indicate a byte range of the file to return.  Reading from this stream will
-    only return the requested range, never data outside of it.
+    """Extends `FileStreamReader` with start and end byte offsets to indicate a byte range of the
+    file to return.  Reading from this stream will only return the requested range, never data
+    outside of it.
     """
 
     def __init__(self, file_pointer, byte_range):
         super().__init__(file_pointer)
         self.start = byte_range[0]
         self.end = byte_range[1]
-        self.bytes_read = 0
+        self._start, self._end = self.start, self.end + 1
 
     @property
     def size(self):
@@ -76,24 +179,3 @@ class PartialFileStreamReader(FileStreamReader):
     @property
     def content_range(self):
         return 'bytes {}-{}/{}'.format(self.start, self.end, self.total_size)
-
-    async def chunk_reader(self):
-        self.file_pointer.seek(self.start)
-        while True:
-            chunk = self.file_pointer.read(self.read_size)
-            self.bytes_read += self.read_size
-            if not chunk:
-                self.feed_eof()
-                yield b''
-
-            yield chunk
-
-    async def _read(self, size):
-        self.file_gen = self.file_gen or self.chunk_reader()
-        bytes_remaining = self.size - self.bytes_read
-        self.read_size = bytes_remaining if size == -1 else min(size, bytes_remaining)
-        # add sleep of 0 so read will yield and continue in next io loop iteration
-        # asyncio.sleep(0) yields None by default, which displeases tornado
-        await asyncio.sleep(0.001)
-        async for chunk in self.file_gen:
-            return chunk
@@ -1,22 +1,71 @@
+import typing
+import concurrent.futures
+
+from waterbutler.core.streams import settings
+
+
+_executor = None  # type: typing.Optional[concurrent.futures.ThreadPoolExecutor]
+
+
+def _get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = concurrent.futures.ThreadPoolExecutor(max_workers=settings.HASH_WORKERS,
+                                                          thread_name_prefix='wb-hash')
+    return _executor
+
+
+def _update_all(hashes: list, data: bytes) -> None:
+    for hash in hashes:
+        hash.update(data)
+
+
 class HashStreamWriter:
-    """Stream-like object that hashes and discards its input."""
+    """Stream-like object that hashes and discards its input.
+
+    Writers attached to a `BaseStream` are fed large chunks from a worker thread, see
+    :meth:`update_in_thread`.  :attr:`digest` and :attr:`hexdigest` wait for any pending update
+    before returning.
+    """
 
     def __init__(self, hasher):
         self.hash = hasher()
+        self._pending = None  # type: typing.Optional[concurrent.futures.Future]
+
+    @classmethod
+    def update_in_thread(cls, writers: typing.Sequence['HashStreamWriter'],
+                         data: bytes) -> concurrent.futures.Future:
+        """Feed ``data`` to every one of ``writers`` in a single worker thread.  hashlib releases
+        the GIL while hashing, so this runs alongside the event loop and the hashing of other
+        streams.  Callers must wait for the returned future before feeding the same writers again.
+        """
+        future = _get_executor().submit(_update_all, [writer.hash for writer in writers], data)
+        for writer in writers:
+            writer._pending = future
+        return future
 
     @property
     def digest(self):
+        self.wait()
         return self.hash.digest()
 
     @property
     def hexdigest(self):
+        self.wait()
         return self.hash.hexdigest()
 
     def can_write_eof(self):
         return False
 
     def write(self, data):
+        self.wait()
         self.hash.update(data)
 
+    def wait(self):
+        """Block until the last update sent to a worker thread has been applied."""
+        if self._pending is not None:
+            self._pending.result()
+            self._pending = None
+
     def close(self):
         pass
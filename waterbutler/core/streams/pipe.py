@@ -0,0 +1,220 @@
+import typing
+import asyncio
+import collections
+
+from waterbutler.server.settings import CHUNK_SIZE
+from waterbutler.core.streams.base import BaseStream
+
+
+class BytePipe:
+    """An in-memory channel that hands the chunks of a request body from the handler receiving them
+    to the provider uploading them, in place of a socket pair.  Chunks are queued by reference and
+    only copied when a read spans more than one of them.  The writer waits in ``write`` while
+    ``high_water`` bytes or more are waiting to be read, unless the reader is waiting for more
+    bytes than that, as ``readexactly`` does for a large part.
+
+    Meant for one writer and one reader.  The reader gets the interface `RequestStreamReader` uses:
+    ``at_eof``, ``read`` and ``readexactly``.  Errors travel both ways: ``abort`` makes the reader's
+    next read raise, and ``close_reader`` drops everything queued or written afterwards, so a writer
+    is never left waiting on a reader that has given up.
+
+    :param int high_water: number of queued bytes at which ``write`` starts waiting
+    """
+
+    def __init__(self, high_water: int) -> None:
+        self.high_water = max(high_water, 1)
+        self._chunks = collections.deque()  # type: typing.Deque[bytes]
+        self._offset = 0  # bytes of the first chunk that have been read
+        self._size = 0  # bytes queued and not yet read
+        self._eof = False
+        self._exception = None  # type: typing.Optional[BaseException]
+        self._reader_closed = False
+        self._read_waiter = None  # type: typing.Optional[asyncio.Future]
+        self._wanted = 0  # bytes the waiting reader needs queued before it can continue
+        self._write_waiter = None  # type: typing.Optional[asyncio.Future]
+
+    @property
+    def size(self) -> int:
+        """Number of bytes queued and not yet read."""
+        return self._size
+
+    async def write(self, data: bytes) -> None:
+        """Queue ``data`` for the reader, then wait until less than ``high_water`` bytes are queued.
+        """
+        if self._eof:
+            raise RuntimeError('Cannot write to a pipe after write_eof()')
+        if self._reader_closed or not data:
+            return
+
+        self._chunks.append(data)
+        self._size += len(data)
+        self._wakeup(self._read_waiter)
+
+        while self._paused():
+            self._write_waiter = asyncio.get_event_loop().create_future()
+            try:
+                await self._write_waiter
+            finally:
+                self._write_waiter = None
+
+    def _paused(self) -> bool:
+        return (self._size >= self.high_water and self._size >= self._wanted and
+                not self._reader_closed)
+
+    def write_eof(self) -> None:
+        self._eof = True
+        self._wakeup(self._read_waiter)
+
+    def abort(self, exc: BaseException) -> None:
+        """Make the reader's pending and future reads raise ``exc``.  Does nothing after
+        ``write_eof``, as everything the reader needs has been written by then.
+        """
+        if self._eof:
+            return
+        self._exception = exc
+        self._wakeup(self._read_waiter)
+
+    def close_reader(self) -> None:
+        """The reader is done, whether or not it read everything.  Drop queued data and ignore any
+        further writes.
+        """
+        self._reader_closed = True
+        self._chunks.clear()
+        self._offset = self._size = 0
+        self._wakeup(self._write_waiter)
+
+    def at_eof(self) -> bool:
+        return self._eof and not self._size
+
+    async def read(self, n: int=-1) -> bytes:
+        """Read up to ``n`` bytes, or everything until EOF if ``n`` is negative."""
+        if n < 0:
+            # Take chunks as they arrive, so the writer isn't left waiting on a full pipe
+            chunks = []
+            while not self._eof:
+                if self._size:
+                    chunks.append(self._take(self._size))
+                await self._wait_for_data()
+            self._raise_if_aborted()
+            chunks.append(self._take(self._size))
+            return b''.join(chunks)
+
+        while not self._size and not self._eof:
+            await self._wait_for_data()
+        self._raise_if_aborted()
+        return self._take(min(n, self._size))
+
+    async def readexactly(self, n: int) -> bytes:
+        """Read exactly ``n`` bytes.  Raises `asyncio.IncompleteReadError` with whatever was left if
+        EOF comes first.
+        """
+        while self._size < n and not self._eof:
+            await self._wait_for_data(n)
+        self._raise_if_aborted()
+        if self._size < n:
+            raise asyncio.IncompleteReadError(self._take(self._size), n)
+        return self._take(n)
+
+    async def _wait_for_data(self, wanted: int=1) -> None:
+        """Wait for the next write.  Until then the writer may queue past ``high_water`` if that
+        is what it takes to reach ``wanted`` bytes, like asyncio's ``_wait_for_data`` resuming a
+        paused transport.
+        """
+        self._raise_if_aborted()
+        self._wanted = wanted
+        if not self._paused():
+            self._wakeup(self._write_waiter)
+        self._read_waiter = asyncio.get_event_loop().create_future()
+        try:
+            await self._read_waiter
+        finally:
+            self._read_waiter = None
+            self._wanted = 0
+        self._raise_if_aborted()
+
+    def _raise_if_aborted(self) -> None:
+        if self._exception is not None:
+            raise self._exception
+
+    def _take(self, n: int) -> bytes:
+        chunks = []
+        remaining = n
+        while remaining:
+            chunk = self._chunks[0]
+            available = len(chunk) - self._offset
+            if available <= remaining:
+                chunks.append(chunk[self._offset:] if self._offset else chunk)
+                self._chunks.popleft()
+                self._offset = 0
+                remaining -= available
+            else:
+                chunks.append(chunk[self._offset:self._offset + remaining])
+                self._offset += remaining
+                remaining = 0
+
+        self._size -= n
+        if self._size < self.high_water:
+            self._wakeup(self._write_waiter)
+        if len(chunks) == 1:
+            return bytes(chunks[0])
+        return b''.join(chunks)
+
+    @staticmethod
+    def _wakeup(waiter: typing.Optional[asyncio.Future]) -> None:
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+
+class ReadAheadStream(BaseStream):
+    """Reads ``stream`` in the background, up to ``buffer_size`` bytes ahead of the consumer, so
+    that fetching the next chunks from upstream overlaps with sending the last ones on.  The read
+    ahead waits while the buffer is full, so at most ``buffer_size`` plus one chunk is held.  Errors
+    raised reading ``stream`` are raised from ``read``.
+
+    Call ``close`` once done with the stream, to stop the read ahead and close ``stream`` if it
+    can be closed.
+    """
+
+    def __init__(self, stream, buffer_size, chunk_size=CHUNK_SIZE):
+        super().__init__()
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self._pipe = BytePipe(buffer_size)
+        self._filler = None  # type: asyncio.Future
+
+    @property
+    def size(self):
+        return getattr(self.stream, 'size', None)
+
+    def close(self):
+        self._pipe.close_reader()
+        if self._filler is not None:
+            self._filler.cancel()
+        if hasattr(self.stream, 'close'):
+            self.stream.close()
+
+    def start(self):
+        """Start reading ahead without waiting for the first ``read``."""
+        if self._filler is None:
+            self._filler = asyncio.ensure_future(self._fill())
+
+    async def _read(self, n=-1):
+        self.start()
+        data = await self._pipe.read(n)
+        if not data:
+            self.feed_eof()
+        return data
+
+    async def _fill(self):
+        try:
+            while True:
+                chunk = await self.stream.read(self.chunk_size)
+                if not chunk:
+                    break
+                await self._pipe.write(chunk)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            self._pipe.abort(exc)
+        else:
+            self._pipe.write_eof()
@@ -0,0 +1,99 @@
+import asyncio
+import collections
+
+from waterbutler.core import exceptions
+from waterbutler.core.streams.base import BaseStream
+
+
+class SegmentedStream(BaseStream):
+    """Stream a file of ``size`` bytes by downloading consecutive byte ranges of it concurrently.
+    ``fetch`` is called with an inclusive ``(start, end)`` range and must return a stream of those
+    bytes, e.g. ``functools.partial(provider.download, path)`` for a provider that honors ``range``.
+
+    Up to ``concurrency`` segments of ``segment_size`` bytes are downloaded at once.  Each is read
+    whole and they are returned in order, so no more than ``concurrency`` segments are held on top
+    of the one being read from.  A segment that is shorter or longer than requested raises a
+    `DownloadError`.
+
+    Call ``close`` if the stream is abandoned before it is exhausted, to cancel the downloads.
+    """
+
+    def __init__(self, fetch, size, segment_size, concurrency):
+        super().__init__()
+        self.fetch = fetch
+        self._size = size
+        self.concurrency = max(concurrency, 1)
+        self._ranges = (
+            (start, min(start + segment_size, size) - 1)
+            for start in range(0, size, max(segment_size, 1))
+        )
+        self._pending = collections.deque()  # type: collections.deque
+        self._segment, self._segment_pos = b'', 0
+
+    @property
+    def size(self):
+        return self._size
+
+    def close(self):
+        for task in self._pending:
+            task.cancel()
+        self._pending.clear()
+
+    async def _read(self, n=-1):
+        chunks = []
+        while n != 0:
+            if self._segment_pos >= len(self._segment):
+                self._schedule()
+                if not self._pending:
+                    break
+                try:
+                    self._segment = await self._pending[0]
+                except BaseException:
+                    self.close()
+                    raise
+                self._pending.popleft()
+                self._segment_pos = 0
+                self._schedule()
+
+            end = len(self._segment) if n < 0 else self._segment_pos + n
+            chunk = self._segment[self._segment_pos:end]
+            self._segment_pos += len(chunk)
+            if n > 0:
+                n -= len(chunk)
+            chunks.append(chunk)
+
+        if not chunks:
+            self.feed_eof()
+            return b''
+        return chunks[0] if len(chunks) == 1 else b''.join(chunks)
+
+    def _schedule(self):
+        while len(self._pending) < self.concurrency:
+            byte_range = next(self._ranges, None)
+            if byte_range is None:
+                break
+            self._pending.append(asyncio.ensure_future(self._download(*byte_range)))
+
+    async def _download(self, start, end):
+        expected = end - start + 1
+        stream = await self.fetch((start, end))
+        try:
+            chunks, received = [], 0
+            while received < expected:
+                chunk = await stream.read(expected - received)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                received += len(chunk)
+
+            # Also makes the stream see its EOF and release the connection
+            if received != expected or await stream.read(1):
+                raise exceptions.DownloadError(
+                    'Requested bytes {}-{} but received a different amount of '
+                    'data'.format(start, end)
+                )
+        finally:
+            if hasattr(stream, 'close'):
+                stream.close()
+
+        return chunks[0] if len(chunks) == 1 else b''.join(chunks)
@@ -1,3 +1,4 @@
+import os
 import zlib
 
 from waterbutler import settings
@@ -13,3 +14,39 @@ ZIP_EXTENSIONS = config.get('ZIP_EXTENSIONS', '.zip .gz .bzip .bzip2 .rar .xz .b
 # (approximately equivalent to a 6).  See the zlib docs for more:
 # https://docs.python.org/3/library/zlib.html#zlib.compressobj
 ZIP_COMPRESSION_LEVEL = int(config.get('ZIP_COMPRESSION_LEVEL', zlib.Z_DEFAULT_COMPRESSION))
+
+# Files whose content type is one of these are already compressed, and are stored in zip archives
+# without being deflated.  Types ending in '/' match all of their subtypes.
+ZIP_STORED_CONTENT_TYPES = config.get(
+    'ZIP_STORED_CONTENT_TYPES',
+    'image/jpeg image/png image/gif image/webp image/heic video/ audio/mpeg audio/mp4 audio/aac '
+    'audio/ogg audio/flac application/zip application/gzip application/x-gzip application/x-bzip2 '
+    'application/x-xz application/x-7z-compressed application/vnd.rar application/x-rar-compressed '
+    'application/x-hdf5 application/x-hdf application/vnd.apache.parquet',
+).split(' ')
+
+# The first ZIP_SAMPLE_SIZE bytes of any other file are trial-compressed at the fastest level.  If
+# they don't shrink to less than ZIP_STORE_RATIO of their size, the file is stored.  A size of 0
+# turns sampling off.
+ZIP_SAMPLE_SIZE = int(config.get('ZIP_SAMPLE_SIZE', 64 * 1024))  # 64KiB
+ZIP_STORE_RATIO = float(config.get('ZIP_STORE_RATIO', 0.95))
+
+# Chunks of at least HASH_OFFLOAD_MIN_SIZE bytes read from a stream are hashed in a pool of
+# HASH_WORKERS threads instead of on the event loop.  Smaller chunks are not worth the hand-off.
+HASH_OFFLOAD_MIN_SIZE = int(config.get('HASH_OFFLOAD_MIN_SIZE', 64 * 1024))  # 64KiB
+HASH_WORKERS = int(config.get('HASH_WORKERS', os.cpu_count() or 1))
+
+# Minimum size of the reads made from disk by FileStreamReader
+FILE_READ_AHEAD_SIZE = int(config.get('FILE_READ_AHEAD_SIZE', 1024 * 1024))  # 1MiB
+
+# While one entry of a zip archive is streamed, up to ZIP_PREFETCH_COUNT of the following files
+# are opened for download and as many of the following folders are listed.  Downloads are only
+# opened ahead while the files they are for add up to no more than ZIP_PREFETCH_SIZE bytes.
+ZIP_PREFETCH_COUNT = int(config.get('ZIP_PREFETCH_COUNT', 8))
+ZIP_PREFETCH_SIZE = int(config.get('ZIP_PREFETCH_SIZE', 32 * 1024 * 1024))  # 32MiB
+
+# Zip entries are deflated, and their CRC32 computed, in a pool of ZIP_COMPRESSION_WORKERS threads.
+# That many entries of an archive are compressed at once: the one being sent and the ones after
+# it, each up to ZIP_COMPRESSION_BUFFER_SIZE bytes ahead.  1 compresses one entry at a time.
+ZIP_COMPRESSION_WORKERS = int(config.get('ZIP_COMPRESSION_WORKERS', os.cpu_count() or 1))
+ZIP_COMPRESSION_BUFFER_SIZE = int(config.get('ZIP_COMPRESSION_BUFFER_SIZE', 1024 * 1024))  # 1MiB
@@ -1,17 +1,74 @@
 import zlib
 import time
 import struct
+import typing
+import hashlib
 import asyncio
 import logging
 import zipfile
 import binascii
+import collections
+import concurrent.futures
 
+from waterbutler.core import exceptions
+from waterbutler.server.settings import CHUNK_SIZE
 from waterbutler.core.streams import settings
+from waterbutler.core.streams.pipe import ReadAheadStream
 from waterbutler.core.streams.base import BaseStream, MultiStream, StringStream
 
 logger = logging.getLogger(__name__)
 
 
+# samples smaller than this are too short to tell whether their file will compress
+MIN_SAMPLE_SIZE = 4096
+
+
+_executor = None  # type: typing.Optional[concurrent.futures.ThreadPoolExecutor]
+
+
+def _get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(settings.ZIP_COMPRESSION_WORKERS, 1),
+            thread_name_prefix='wb-zip',
+        )
+    return _executor
+
+
+def _deflate(compressor, crc: int, chunk: bytes, final: bool) -> typing.Tuple[int, bytes]:
+    """Update ``crc`` with ``chunk`` and compress it.  Runs in a worker thread: zlib releases the
+    GIL for both, so entries compressed in different threads run in parallel.
+    """
+    crc = binascii.crc32(chunk, crc)
+    compressed = compressor.compress(chunk)
+    compressed += compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+    return crc, compressed
+
+
+def _is_already_zipped(filename: str) -> bool:
+    return any(filename.endswith(zip_ext) for zip_ext in settings.ZIP_EXTENSIONS)
+
+
+def _is_compressed_type(content_type: typing.Optional[str]) -> bool:
+    if not content_type:
+        return False
+    content_type = content_type.split(';')[0].strip().lower()
+    return any(
+        content_type.startswith(stored) if stored.endswith('/') else content_type == stored
+        for stored in settings.ZIP_STORED_CONTENT_TYPES
+    )
+
+
+def _compresses_well(sample: bytes) -> bool:
+    """Trial-compress ``sample`` at the fastest level.  Runs in a worker thread."""
+    if len(sample) < MIN_SAMPLE_SIZE:
+        return True
+    compressor = zlib.compressobj(1, zlib.DEFLATED, -15)
+    compressed_size = len(compressor.compress(sample)) + len(compressor.flush())
+    return compressed_size < len(sample) * settings.ZIP_STORE_RATIO
+
+
 # for some reason python3.5 has this as (1 << 31) - 1, which is 0x7fffffff
 ZIP64_LIMIT = 0xffffffff - 1
 
@@ -70,15 +127,17 @@ class ZipLocalFileDataDescriptor(BaseStream):
 
 class ZipLocalFileData(BaseStream):
     """A thin stream wrapper. Update the original_size, compressed_size, and CRC of a ZipLocalFile
-    as chunks are read and compressed.
+    as chunks are read and compressed.  Chunks are compressed in the zip worker pool, off the event
+    loop.
 
     See section 4.3.8 of the PKZIP APPNOTE.TXT.
 
     Note: This class is tightly coupled to ZipStreamReader and should not be used separately.
     """
-    def __init__(self, file, stream, *args, **kwargs):
+    def __init__(self, file, stream, *args, sample=b'', **kwargs):
         self.file = file
         self.stream = stream
+        self.sample = sample  # already read from ``stream`` to choose the compression
         self._buffer = bytearray()
         super().__init__(*args, **kwargs)
 
@@ -90,20 +149,21 @@ class ZipLocalFileData(BaseStream):
 
         ret = self._buffer
 
-        while (n == -1 or len(ret) < n) and not self.stream.at_eof():
-            chunk = await self.stream.read(n, *args, **kwargs)
+        while (n == -1 or len(ret) < n) and (self.sample or not self.stream.at_eof()):
+            if self.sample:
+                chunk, self.sample = self.sample, b''
+            else:
+                chunk = await self.stream.read(n, *args, **kwargs)
 
-            # Update file info
+            # Update file info and compress
             self.file.original_size += len(chunk)
-            self.file.zinfo.CRC = binascii.crc32(chunk, self.file.zinfo.CRC)
-
-            # compress
             if self.file.compressor:
-                compressed = self.file.compressor.compress(chunk)
-                compressed += self.file.compressor.flush(
-                    zlib.Z_FINISH if self.stream.at_eof() else zlib.Z_SYNC_FLUSH
+                self.file.zinfo.CRC, compressed = await asyncio.get_event_loop().run_in_executor(
+                    _get_executor(), _deflate, self.file.compressor, self.file.zinfo.CRC,
+                    chunk, self.stream.at_eof(),
                 )
             else:
+                self.file.zinfo.CRC = binascii.crc32(chunk, self.file.zinfo.CRC)
                 compressed = chunk
 
             # Update file info
@@ -118,73 +178,17 @@ class ZipLocalFileData(BaseStream):
             self._buffer = bytearray()
 
         # EOF is the buffer and stream are both empty
-        if not self._buffer and self.stream.at_eof():
+        if not self._buffer and not self.sample and self.stream.at_eof():
             self.feed_eof()
 
         return bytes(ret)
 
 
-class ZipLocalFile(MultiStream):
-    """A local file entry in a zip archive. Constructs the local file header,
-    file data stream, and data descriptor.
-
-    Note: This class is tightly coupled to ZipStreamReader and should not be
-    used separately.
+class ZipFileRecords:
+    """The records describing one file of a zip archive, built from its ``zinfo``, its
+    ``original_size`` and ``compressed_size``, and ``need_zip64_data_descriptor``.  Shared by
+    `ZipLocalFile` and `StoredZipEntry`.
     """
-    def __init__(self, file_tuple):
-
-        filename, stream = file_tuple
-        # Build a ZipInfo instance to use for the file's header and footer
-        self.zinfo = zipfile.ZipInfo(
-            filename=filename,
-            date_time=time.localtime(time.time())[:6],
-        )
-
-        already_zipped = False
-        for zip_ext in settings.ZIP_EXTENSIONS:
-            if self.zinfo.filename.endswith(zip_ext):
-                already_zipped = True
-                logger.info('   DONE!')
-                break
-
-        logger.debug('file is already compressed: {}'.format(already_zipped))
-        # If the file is a `.zip`, set permission and turn off compression
-        if already_zipped:
-            self.zinfo.external_attr = 0o600 << 16      # -rw-------
-            self.zinfo.compress_type = zipfile.ZIP_STORED
-            self.compressor = None
-        # If the file is a directory, set the directory flag and turn off compression
-        elif self.zinfo.filename[-1] == '/':
-            self.zinfo.external_attr = 0o40775 << 16    # drwxrwxr-x
-            self.zinfo.external_attr |= 0x10            # Directory flag
-            self.zinfo.compress_type = zipfile.ZIP_STORED
-            self.compressor = None
-        # For other types, set permission and define a compressor
-        else:
-            self.zinfo.external_attr = 0o600 << 16      # -rw-------
-            self.zinfo.compress_type = zipfile.ZIP_DEFLATED
-            self.compressor = zlib.compressobj(
-                settings.ZIP_COMPRESSION_LEVEL,
-                zlib.DEFLATED,
-                -15,
-            )
-
-        self.zinfo.header_offset = 0
-        self.zinfo.flag_bits |= 0x08
-
-        # Initial CRC: value will be updated as file is streamed
-        self.zinfo.CRC = 0
-
-        # meta information - needed to build the footer
-        self.original_size = 0
-        self.compressed_size = 0
-        self.need_zip64_data_descriptor = False
-
-        super().__init__(
-            StringStream(self.local_header),
-            ZipLocalFileData(self, stream),
-            ZipLocalFileDataDescriptor(self),
-        )
 
     @property
     def local_header(self):
@@ -300,6 +304,82 @@ class ZipLocalFile(MultiStream):
         )
 
 
+class ZipLocalFile(ZipFileRecords, MultiStream):
+    """A local file entry in a zip archive. Constructs the local file header,
+    file data stream, and data descriptor.
+
+    Compressed entries are read and compressed in the background, up to
+    ``ZIP_COMPRESSION_BUFFER_SIZE`` bytes ahead, once ``start`` is called.
+
+    Note: This class is tightly coupled to ZipStreamReader and should not be
+    used separately.
+    """
+    def __init__(self, file_tuple, compression_level=None, sample=b''):
+
+        filename, stream = file_tuple
+        if compression_level is None:
+            compression_level = settings.ZIP_COMPRESSION_LEVEL
+
+        # Build a ZipInfo instance to use for the file's header and footer
+        self.zinfo = zipfile.ZipInfo(
+            filename=filename,
+            date_time=time.localtime(time.time())[:6],
+        )
+
+        already_zipped = _is_already_zipped(self.zinfo.filename)
+        logger.debug('file is already compressed: {}'.format(already_zipped))
+        # If the file is a directory, set the directory flag and turn off compression
+        if self.zinfo.filename[-1] == '/':
+            self.zinfo.external_attr = 0o40775 << 16    # drwxrwxr-x
+            self.zinfo.external_attr |= 0x10            # Directory flag
+            self.zinfo.compress_type = zipfile.ZIP_STORED
+            self.compressor = None
+        # If the file is a `.zip` or compression is off, set permission and turn off compression
+        elif already_zipped or compression_level == 0:
+            self.zinfo.external_attr = 0o600 << 16      # -rw-------
+            self.zinfo.compress_type = zipfile.ZIP_STORED
+            self.compressor = None
+        # For other types, set permission and define a compressor
+        else:
+            self.zinfo.external_attr = 0o600 << 16      # -rw-------
+            self.zinfo.compress_type = zipfile.ZIP_DEFLATED
+            self.compressor = zlib.compressobj(
+                compression_level,
+                zlib.DEFLATED,
+                -15,
+            )
+
+        self.zinfo.header_offset = 0
+        self.zinfo.flag_bits |= 0x08
+
+        # Initial CRC: value will be updated as file is streamed
+        self.zinfo.CRC = 0
+
+        # meta information - needed to build the footer
+        self.original_size = 0
+        self.compressed_size = 0
+        self.need_zip64_data_descriptor = False
+
+        self.data = ZipLocalFileData(self, stream, sample=sample)
+        if self.compressor:
+            self.data = ReadAheadStream(self.data, settings.ZIP_COMPRESSION_BUFFER_SIZE)
+
+        super().__init__(
+            StringStream(self.local_header),
+            self.data,
+            ZipLocalFileDataDescriptor(self),
+        )
+
+    def start(self):
+        """Start compressing the file's data ahead of it being read."""
+        if isinstance(self.data, ReadAheadStream):
+            self.data.start()
+
+    def close(self):
+        if isinstance(self.data, ReadAheadStream):
+            self.data.close()
+
+
 class ZipArchiveCentralDirectory(StringStream):
     """The central directory for a zip archive.  Contains the Central Directory File Headers for
     each file.  This class also builds the Zip64 End of Central Directory, the Zip64 End of
@@ -374,24 +454,86 @@ class ZipArchiveCentralDirectory(StringStream):
 
 
 class ZipStreamReader(asyncio.StreamReader):
-    """Combines one or more streams into a single, Zip-compressed stream"""
-    def __init__(self, stream_gen):
+    """Combines one or more streams into a single, Zip-compressed stream.
+
+    Up to ``ZIP_COMPRESSION_WORKERS`` entries are compressed at once: the one being read and the
+    ones following it, which are taken from ``stream_gen`` early.  Their output is still read, and
+    written to the archive, one entry after another.
+
+    ``stream_gen`` yields ``(filename, stream)`` or ``(filename, stream, content_type)`` tuples.
+    Files are deflated at ``compression_level``, defaulting to ``ZIP_COMPRESSION_LEVEL``, unless
+    their content type or a sample of their first bytes shows that they are already compressed.
+    A level of 0 stores every file.
+    """
+    def __init__(self, stream_gen, compression_level=None):
         self._eof = False
         self.stream = None
         self.streams = stream_gen
         self.finished_streams = []
         # Each incoming stream should be wrapped in a _ZipFile instance
+        self.upcoming = collections.deque()  # type: typing.Deque[ZipLocalFile]
+        self._exhausted = False
+        if compression_level is None:
+            compression_level = settings.ZIP_COMPRESSION_LEVEL
+        self.compression_level = compression_level
         super().__init__()
 
+    def close(self):
+        """Stop generating and compressing entries, for when the archive is abandoned before it is
+        finished.
+        """
+        for file in self.upcoming:
+            file.close()
+        self.upcoming.clear()
+        if isinstance(self.stream, ZipLocalFile):
+            self.stream.close()
+        if hasattr(self.streams, 'close'):
+            self.streams.close()
+
+    async def _next_file(self) -> typing.Optional[ZipLocalFile]:
+        """Take entries from the generator until ``ZIP_COMPRESSION_WORKERS`` of them are being
+        compressed, then return the first.
+        """
+        while not self._exhausted and len(self.upcoming) < max(settings.ZIP_COMPRESSION_WORKERS, 1):
+            try:
+                file = await self._open_file(await self.streams.__anext__())
+            except StopAsyncIteration:
+                self._exhausted = True
+                break
+            file.start()
+            self.upcoming.append(file)
+
+        return self.upcoming.popleft() if self.upcoming else None
+
+    async def _open_file(self, entry) -> ZipLocalFile:
+        """Build the archive entry for a tuple from the generator, storing rather than deflating
+        files that are already compressed.
+        """
+        filename, stream = entry[:2]
+        content_type = entry[2] if len(entry) > 2 else getattr(stream, 'content_type', None)
+
+        level, sample = self.compression_level, b''
+        if level != 0 and not filename.endswith('/') and not _is_already_zipped(filename):
+            if _is_compressed_type(content_type):
+                level = 0
+            elif settings.ZIP_SAMPLE_SIZE > 0:
+                sample = await stream.read(settings.ZIP_SAMPLE_SIZE)
+                if not await asyncio.get_event_loop().run_in_executor(
+                    _get_executor(), _compresses_well, sample
+                ):
+                    level = 0
+
+        logger.debug('compression level for {}: {}'.format(filename, level))
+        return ZipLocalFile((filename, stream), compression_level=level, sample=sample)
+
     async def read(self, n=-1):
         if n < 0:
             # Parent class will handle auto chunking for us
             return await super().read(n)
 
         if not self.stream:
-            try:
-                self.stream = ZipLocalFile(await self.streams.__anext__())
-            except StopAsyncIteration:
+            self.stream = await self._next_file()
+            if self.stream is None:
                 if self._eof:
                     return b''
                 self._eof = True
@@ -405,3 +547,207 @@ class ZipStreamReader(asyncio.StreamReader):
             chunk += await self.read(n - len(chunk))
 
         return chunk
+
+
+class StoredZipEntry(ZipFileRecords):
+    """A file of a `StoredZipArchive`.  Its data is stored as is, so all of its records but the CRC
+    are known from its ``size`` before it is read.  ``open_stream`` is a coroutine function
+    returning a stream of the file's data.  ``crc`` may be given if it is already known, e.g. from
+    an earlier download of the same archive.  ``version`` identifies the file's contents, e.g. its
+    etag, and is part of the archive's `etag`.
+    """
+
+    def __init__(self, filename, size, date_time, open_stream=None, crc=None, version=None):
+        self.version = version
+        self.zinfo = zipfile.ZipInfo(filename=filename, date_time=date_time)
+        if filename.endswith('/'):
+            self.zinfo.external_attr = 0o40775 << 16    # drwxrwxr-x
+            self.zinfo.external_attr |= 0x10            # Directory flag
+        else:
+            self.zinfo.external_attr = 0o600 << 16      # -rw-------
+        self.zinfo.compress_type = zipfile.ZIP_STORED
+        self.zinfo.header_offset = 0
+        self.zinfo.flag_bits |= 0x08
+        self.zinfo.CRC = crc or 0
+        self.crc_known = crc is not None or size == 0
+
+        self.open_stream = open_stream
+        self.original_size = self.compressed_size = size
+        self.need_zip64_data_descriptor = size > ZIP64_LIMIT
+
+
+class StoredZipArchive:
+    """A zip archive of files stored without compression.  Because nothing is compressed, the
+    exact layout of the archive (local headers, file data, data descriptors and central directory)
+    follows from the names and sizes of its files, so its ``size`` is known before anything is read
+    and any byte range of it can be streamed, see `stream`.
+
+    The CRC32 of each file is only known once the file has been read.  ``on_crc`` is called with
+    each `StoredZipEntry` whose CRC has been computed, so that it can be saved for later requests.
+
+    :param list entries: the `StoredZipEntry` objects of the archive, in order
+    :param on_crc: optional callable taking a `StoredZipEntry`
+    """
+
+    def __init__(self, entries, on_crc=None):
+        self.entries = entries
+        self.on_crc = on_crc
+
+        # (offset, length, kind, entry) of every record and of every file's data
+        self.segments = []  # type: typing.List[typing.Tuple[int, int, str, StoredZipEntry]]
+        offset = 0
+        for entry in entries:
+            entry.zinfo.header_offset = offset
+            for kind, length in (('header', len(entry.local_header)),
+                                 ('data', entry.original_size),
+                                 ('descriptor', len(entry.descriptor))):
+                self.segments.append((offset, length, kind, entry))
+                offset += length
+
+        # The central directory's length doesn't depend on the CRCs it holds
+        self.segments.append((offset, ZipArchiveCentralDirectory(entries).size, 'directory', None))
+        self.size = offset + self.segments[-1][1]
+
+    @property
+    def etag(self):
+        """Changes whenever the bytes of the archive might, so that a client resuming a download
+        can tell whether it is still the same archive.
+        """
+        digest = hashlib.sha256()
+        for entry in self.entries:
+            digest.update(repr((entry.zinfo.filename, entry.original_size, entry.zinfo.date_time,
+                                entry.version)).encode('utf-8'))
+        return digest.hexdigest()
+
+    def stream(self, start=0, end=None):
+        """A stream of bytes ``start`` through ``end`` (inclusive) of the archive.  ``end`` defaults
+        to the last byte.
+        """
+        if end is None or end >= self.size:
+            end = self.size - 1
+        return StoredZipRangeStream(self, start, end)
+
+
+class StoredZipRangeStream(BaseStream):
+    """Streams a byte range of a `StoredZipArchive`.  Only the files whose data overlaps the range
+    are downloaded.  Of a file whose CRC is known, only the overlapping bytes are downloaded, other
+    files are downloaded from their start so that their CRC can be computed.
+
+    The data descriptors and the central directory hold the CRCs of their files.  If they fall in
+    the range, files with an unknown CRC are read in full first, even when they are outside the
+    range.  A range reaching into the central directory while no CRCs are cached therefore reads
+    every file of the archive.
+
+    A file that turns out to have a different size than its entry raises a `DownloadError`, since
+    the archive's layout would no longer hold.
+    """
+
+    def __init__(self, archive, start, end):
+        super().__init__()
+        self.archive = archive
+        self.start, self.end = start, end
+        self._chunks = self._generate()
+        self._pending = b''
+        self._open_streams = set()  # type: typing.Set[asyncio.StreamReader]
+
+    @property
+    def size(self):
+        return max(self.end - self.start + 1, 0)
+
+    def close(self):
+        for stream in self._open_streams:
+            if hasattr(stream, 'close'):
+                stream.close()
+        self._open_streams.clear()
+
+    async def _read(self, n=-1):
+        chunks, size = [], 0
+        while n < 0 or size < n:
+            if not self._pending:
+                try:
+                    self._pending = await self._chunks.__anext__()
+                except StopAsyncIteration:
+                    break
+            take = len(self._pending) if n < 0 else n - size
+            chunks.append(self._pending[:take])
+            self._pending = self._pending[take:]
+            size += len(chunks[-1])
+
+        if not chunks:
+            self.feed_eof()
+        return b''.join(chunks)
+
+    async def _generate(self):
+        for offset, length, kind, entry in self.archive.segments:
+            if offset > self.end:
+                break
+            if length == 0 or offset + length <= self.start:
+                continue
+            # Part of this segment that falls in the range
+            lo = max(self.start - offset, 0)
+            hi = min(self.end - offset + 1, length)
+
+            if kind == 'header':
+                yield entry.local_header[lo:hi]
+            elif kind == 'data':
+                async for chunk in self._read_entry(entry, lo, hi):
+                    yield chunk
+            elif kind == 'descriptor':
+                if not entry.crc_known:
+                    await self._compute_crc(entry)
+                yield entry.descriptor[lo:hi]
+            else:
+                for file in self.archive.entries:
+                    if not file.crc_known:
+                        await self._compute_crc(file)
+                directory = await ZipArchiveCentralDirectory(self.archive.entries).read()
+                yield directory[lo:hi]
+
+    async def _compute_crc(self, entry):
+        # Reads the whole entry without yielding any of it
+        chunks = self._read_entry(entry, entry.original_size, entry.original_size)
+        try:
+            await chunks.__anext__()
+        except StopAsyncIteration:
+            pass
+
+    async def _read_entry(self, entry, lo, hi):
+        """Yield bytes ``lo`` up to ``hi`` of ``entry``.  If its CRC is known, only those bytes are
+        asked for.  Otherwise the entry is read from its start, and if that reaches the end of the
+        entry, its size is checked and its CRC recorded.
+        """
+        ranged = entry.crc_known and (lo, hi) != (0, entry.original_size)
+        if ranged:
+            stream = await entry.open_stream(range=(lo, hi - 1))
+        else:
+            stream = await entry.open_stream()
+        self._open_streams.add(stream)
+        try:
+            # A provider that can't download ranges sends the whole file instead
+            position = lo if ranged and getattr(stream, 'partial', False) else 0
+            crc = 0
+            while position < hi or hi == entry.original_size:
+                chunk = await stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if not entry.crc_known:
+                    crc = binascii.crc32(chunk, crc)
+                if position < hi and position + len(chunk) > lo:
+                    yield chunk[max(lo - position, 0):hi - position]
+                position += len(chunk)
+                if position > entry.original_size:
+                    break
+
+            if position < hi or position > entry.original_size:
+                raise exceptions.DownloadError(
+                    'Expected {} to be {} bytes long, but received a different amount of '
+                    'data'.format(entry.zinfo.filename, entry.original_size)
+                )
+            if hi == entry.original_size and not entry.crc_known:
+                entry.zinfo.CRC, entry.crc_known = crc, True
+                if self.archive.on_crc is not None:
+                    self.archive.on_crc(entry)
+        finally:
+            self._open_streams.discard(stream)
+            if hasattr(stream, 'close'):
+                stream.close()
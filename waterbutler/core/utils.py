@@ -4,6 +4,7 @@ import pytz
 import asyncio
 import logging
 import functools
+import collections
 import unicodedata
 import dateutil.parser
 from urllib import parse
@@ -16,6 +17,7 @@ from stevedore import driver
 from waterbutler.core import exceptions
 from waterbutler.core.signing import Signer
 from waterbutler.core.streams import EmptyStream
+from waterbutler.core.streams import settings as stream_settings
 from waterbutler.server import settings as server_settings
 
 logger = logging.getLogger(__name__)
@@ -186,33 +188,126 @@ def make_disposition(filename):
 
 
 class ZipStreamGenerator:
-    def __init__(self, provider, parent_path, *metadata_objs):
+    """Yields a ``(name, stream, content_type)`` tuple for every file and a ``(name, stream)`` pair
+    for every empty folder under ``parent_path``, starting from ``metadata_objs``, for
+    `ZipStreamReader`.  Folders are expanded breadth first:
+    their children are queued behind everything already queued, so entries always come out in the
+    same order.
+
+    Work for the queued entries is started before they are reached, so that upstream round trips
+    overlap with streaming the current entry.  Up to ``ZIP_PREFETCH_COUNT`` of the queued folders
+    are listed and as many of the queued files opened for download at once.  Downloads are only
+    opened ahead while their files add up to ``ZIP_PREFETCH_SIZE`` bytes or less; a file of unknown
+    size is only opened once it is next.
+
+    The contents may be given as ``tree`` instead, as ``(metadata, children)`` pairs from
+    `BaseProvider.folder_tree`.  Folders whose children are given aren't listed again.
+
+    Call ``close`` if the generator is abandoned before it is exhausted, to cancel the prefetches.
+    """
+
+    def __init__(self, provider, parent_path, *metadata_objs, tree=None):
         self.provider = provider
         self.parent_path = parent_path
-        self.remaining = [
-            (parent_path, metadata)
-            for metadata in metadata_objs
-        ]
+        self.prefetch_count = max(stream_settings.ZIP_PREFETCH_COUNT, 1)
+        self.prefetch_size = stream_settings.ZIP_PREFETCH_SIZE
+        if tree is None:
+            tree = [(metadata, None) for metadata in metadata_objs]
+        self.remaining = collections.deque()  # type: collections.deque
+        self._queue(parent_path, tree)
+        self._prefetched_size = 0
 
     async def __aiter__(self):
         return self
 
     async def __anext__(self):
-        if not self.remaining:
-            raise StopAsyncIteration
-        current = self.remaining.pop(0)
-        path = self.provider.path_from_metadata(*current)
-        if path.is_dir:
-            items = await self.provider.metadata(path)
-            if items:
-                self.remaining.extend([
-                    (path, item) for item in items
-                ])
-                return await self.__anext__()
+        while self.remaining:
+            self._prefetch()
+            entry = self.remaining.popleft()
+            try:
+                result = await entry.task
+            except BaseException:
+                self.close()
+                raise
+
+            name = entry.path.path.replace(self.parent_path.path, '', 1)
+            if not entry.path.is_dir:
+                self._prefetched_size -= entry.size
+                return name, result, entry.content_type
+            if entry.children is None:
+                result = [(item, None) for item in result]
+            if not result:
+                return name, EmptyStream()
+            self._queue(entry.path, result)
+
+        raise StopAsyncIteration
+
+    def close(self):
+        for entry in self.remaining:
+            if entry.task is None:
+                continue
+            if not entry.task.done():
+                entry.task.cancel()
+            elif not entry.task.cancelled() and entry.task.exception() is None:
+                if hasattr(entry.task.result(), 'close'):
+                    entry.task.result().close()
+        self.remaining.clear()
+        self._prefetched_size = 0
+
+    def _queue(self, parent, tree):
+        for metadata, children in tree:
+            entry = _ZipEntry(self.provider.path_from_metadata(parent, metadata), metadata)
+            if children is not None:
+                entry.children = children
+                entry.task = asyncio.get_event_loop().create_future()
+                entry.task.set_result(children)
+            self.remaining.append(entry)
+
+    def _prefetch(self):
+        """Start listing or downloading the queued entries, front to back, until one of them can't
+        be started yet.  Only looks as far as the entries already started plus one.
+        """
+        listings = downloads = 0
+        for entry in self.remaining:
+            if entry.path.is_dir:
+                if entry.children is not None:
+                    continue
+                if entry.task is None:
+                    if listings >= self.prefetch_count:
+                        break
+                    entry.task = asyncio.ensure_future(self.provider.metadata(entry.path))
+                listings += 1
             else:
-                return path.path.replace(self.parent_path.path, '', 1), EmptyStream()
+                if entry.task is None:
+                    if downloads and (downloads >= self.prefetch_count or
+                                      self._prefetched_size + entry.size > self.prefetch_size):
+                        break
+                    entry.task = asyncio.ensure_future(self.provider.download(entry.path))
+                    self._prefetched_size += entry.size
+                downloads += 1
+
+
+class _ZipEntry:
+    """A file or folder queued by `ZipStreamGenerator`, with the task listing or downloading it
+    once that has been started.  A folder's ``children`` are set if they were listed up front.
+    """
 
-        return path.path.replace(self.parent_path.path, '', 1), await self.provider.download(path)
+    __slots__ = ('path', 'size', 'content_type', 'task', 'children')
+
+    def __init__(self, path, metadata):
+        self.path = path
+        self.task = None  # type: asyncio.Future
+        self.children = None  # type: list
+        self.size = 0
+        self.content_type = None
+        if not path.is_dir:
+            size = getattr(metadata, 'size_as_int', None)
+            self.size = stream_settings.ZIP_PREFETCH_SIZE if size is None else size
+            try:
+                self.content_type = metadata.content_type
+            except (AttributeError, KeyError):
+                # Not every provider's metadata is guaranteed to have one
+                pass
 
 
 class RequestHandlerContext:
@@ -37,6 +37,9 @@ class BitbucketProvider(provider.BaseProvider):
     BASE_URL = pd_settings.BASE_URL
     VIEW_URL = pd_settings.VIEW_URL
     RESP_PAGE_LEN = pd_settings.RESP_PAGE_LEN
+    REQUEST_RATE = pd_settings.REQUEST_RATE
+    REQUEST_BURST = pd_settings.REQUEST_BURST
+    METADATA_CACHE_TTL = pd_settings.METADATA_CACHE_TTL
 
     def __init__(self, auth, credentials, settings, **kwargs):
         super().__init__(auth, credentials, settings, **kwargs)
@@ -14,3 +14,10 @@ UPLOAD_FILE_MESSAGE = config.get('UPLOAD_FILE_MESSAGE', 'File uploaded on behalf
 DELETE_FOLDER_MESSAGE = config.get('DELETE_FOLDER_MESSAGE', 'Folder deleted on behalf of WaterButler')
 
 RESP_PAGE_LEN = int(config.get('RESP_PAGE_LEN', 100))
+
+# Token bucket for requests to the Bitbucket API, see waterbutler.core.scheduler
+REQUEST_RATE = float(config.get('REQUEST_RATE', settings.REQUEST_RATE))  # requests per second
+REQUEST_BURST = int(config.get('REQUEST_BURST', settings.REQUEST_BURST))
+
+# Seconds to cache metadata for, see waterbutler.core.cache.  0 disables caching.
+METADATA_CACHE_TTL = int(config.get('METADATA_CACHE_TTL', settings.METADATA_CACHE_TTL))
@@ -1,16 +1,16 @@
 import json
 import base64
+import asyncio
 import hashlib
 import logging
-import tempfile
 from asyncio import sleep
 from http import HTTPStatus
-from typing import List, Tuple, Union
+from typing import IO, List, Optional, Sequence, Tuple, Union
 
 import aiohttp
 
 from waterbutler.core.path import WaterButlerPath
-from waterbutler.core import exceptions, streams, provider
+from waterbutler.core import buffers, exceptions, streams, provider
 from waterbutler.core.exceptions import RetryChunkedUploadCommit
 
 from waterbutler.providers.box import settings as pd_settings
@@ -30,8 +30,13 @@ class BoxProvider(provider.BaseProvider):
     NAME = 'box'
     BASE_URL = pd_settings.BASE_URL
     NONCHUNKED_UPLOAD_LIMIT = pd_settings.NONCHUNKED_UPLOAD_LIMIT  # 50MB default
-    TEMP_CHUNK_SIZE = pd_settings.TEMP_CHUNK_SIZE  # 32KiB default
+    TEMP_CHUNK_SIZE = pd_settings.TEMP_CHUNK_SIZE  # 1MiB default
+    UPLOAD_PART_CONCURRENCY = pd_settings.UPLOAD_PART_CONCURRENCY
+    UPLOAD_PART_RETRIES = pd_settings.UPLOAD_PART_RETRIES
     UPLOAD_COMMIT_RETRIES = pd_settings.UPLOAD_COMMIT_RETRIES
+    REQUEST_RATE = pd_settings.REQUEST_RATE
+    REQUEST_BURST = pd_settings.REQUEST_BURST
+    METADATA_CACHE_TTL = pd_settings.METADATA_CACHE_TTL
 
     def __init__(self, auth, credentials, settings, **kwargs):
         """Initialize a `BoxProvider` instance
@@ -152,6 +157,14 @@ class BoxProvider(provider.BaseProvider):
 
     async def revalidate_path(self, base: WaterButlerPath, path: str,
                               folder: bool=None) -> WaterButlerPath:
+        return (await self.revalidate_children(base, [(path, folder)]))[0]
+
+    async def revalidate_children(self, base: WaterButlerPath,
+                                  children: Sequence[Tuple[str, Optional[bool]]]) \
+            -> List[WaterButlerPath]:
+        """Look up the ids of all of ``children`` from a single listing of ``base``.  Box names
+        are case-insensitive.  A ``folder`` of ``None`` matches both files and folders.
+        """
         # TODO Research the search api endpoint
         response = await self.make_request(
             'GET',
@@ -161,24 +174,27 @@ class BoxProvider(provider.BaseProvider):
             throws=exceptions.ProviderError,
         )
         data = await response.json()
-        lower_name = path.lower()
 
-        try:
-            item = next(
-                x for x in data['entries']
-                if x['name'].lower() == lower_name and (
-                    folder is None or
-                    (x['type'] == 'folder') == folder
+        entries = {}  # type: dict
+        for entry in data['entries']:
+            entries.setdefault(entry['name'].lower(), []).append(entry)
+
+        paths = []
+        for path, folder in children:
+            try:
+                item = next(
+                    x for x in entries.get(path.lower(), [])
+                    if folder is None or (x['type'] == 'folder') == folder
                 )
-            )
-            name = path  # Use path over x['name'] because of casing issues
-            _id = item['id']
-            folder = item['type'] == 'folder'
-        except StopIteration:
-            _id = None
-            name = path
+                name = path  # Use path over x['name'] because of casing issues
+                _id = item['id']
+                folder = item['type'] == 'folder'
+            except StopIteration:
+                _id = None
+                name = path
 
-        return base.child(name, _id=_id, folder=folder)
+            paths.append(base.child(name, _id=_id, folder=folder))
+        return paths
 
     def can_duplicate_names(self)-> bool:
         return False
@@ -617,6 +633,12 @@ class BoxProvider(provider.BaseProvider):
         """Calculate the partitioning scheme and upload the parts of the stream.  Returns a list
         of metadata objects for each part, as reported by Box.  This list will be used to finialize
         the upload.
+
+        Parts are read from the stream in order and uploaded concurrently, at most
+        ``UPLOAD_PART_CONCURRENCY`` at a time.  Reading stops until a slot is free.  Parts are
+        held in memory shared by all chunked uploads in the process, or written to a tempfile once
+        it runs out (see `waterbutler.core.buffers`).  The manifest is returned in part order
+        regardless of the order the uploads finish in.
         """
 
         part_max_size = session_data['part_size']
@@ -626,64 +648,87 @@ class BoxProvider(provider.BaseProvider):
         logger.debug('Stream will be partitioned into {} with the following '
                      'sizes: {}'.format(len(parts), parts))
 
-        start_offset, manifest = 0, []
-        for part_id, part_size in enumerate(parts):
-            logging.debug('Uploading part {}, with size {} bytes, starting '
-                          'at offset {}'.format(part_id, part_size, start_offset))
-            part_metadata = await self._upload_part(stream, str(part_id), part_size, start_offset,
-                                                    session_data['id'])
-            manifest.append(part_metadata)
-            start_offset += part_size
-
-        return manifest
+        slots = asyncio.Semaphore(self.UPLOAD_PART_CONCURRENCY)
+        failures = []  # type: list
 
-    async def _upload_part(self, stream: streams.BaseStream, part_id: str, part_size: int,
-                           start_offset: int, session_id: str) -> dict:
+        async def send(part_id, part, start_offset):
+            try:
+                logger.debug('Uploading part {}, with size {} bytes, starting '
+                             'at offset {}'.format(part_id, part.size, start_offset))
+                part_sha_b64 = base64.standard_b64encode(part.digest).decode()
+                return await self._upload_part(part.data, str(part_id), part.size, part_sha_b64,
+                                               start_offset, stream.size, session_data['id'])
+            except Exception as exc:
+                failures.append(exc)
+                raise
+            finally:
+                part.close()
+                slots.release()
+
+        start_offset, tasks = 0, []
+        try:
+            for part_id, part_size in enumerate(parts):
+                await slots.acquire()
+                try:
+                    if failures:
+                        raise failures[0]
+                    part = await buffers.read_part(stream, part_size, hash_factory=hashlib.sha1,
+                                                   chunk_size=self.TEMP_CHUNK_SIZE)
+                except BaseException:
+                    slots.release()
+                    raise
+                tasks.append(asyncio.ensure_future(send(part_id, part, start_offset)))
+                start_offset += part_size
+            return await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _upload_part(self, data: Union[bytes, IO], part_id: str, part_size: int,
+                           part_sha_b64: str, start_offset: int, total_size: int,
+                           session_id: str) -> dict:
         """Upload one part/chunk of the given stream to Box.
 
-        Box requires that the sha of the part be sent along in the headers of the request.  To do
-        this WB must write the stream segment to disk before uploading.  The part sha is calculated
-        as the tempfile is written.
+        Box requires that the sha of the part be sent along in the headers of the request, so the
+        part must be read in full, into memory or a tempfile, before it can be uploaded.  The part
+        is retried up to ``UPLOAD_PART_RETRIES`` times before the upload is given up on.
 
         API Docs: https://developer.box.com/reference#upload-part
-        """
 
-        cutoff_stream = streams.CutoffStream(stream, cutoff=part_size)
-        part_hasher_name = 'part-{}-sha1'.format(part_id)
-        stream.add_writer(part_hasher_name, streams.HashStreamWriter(hashlib.sha1))
-
-        f = tempfile.TemporaryFile()
-        chunk = await cutoff_stream.read(self.TEMP_CHUNK_SIZE)
-        while chunk:
-            f.write(chunk)
-            chunk = await cutoff_stream.read(self.TEMP_CHUNK_SIZE)
-        file_stream = streams.FileStreamReader(f)
-
-        part_sha = stream.writers[part_hasher_name].digest
-        part_sha_b64 = base64.standard_b64encode(part_sha).decode()
-        stream.remove_writer(part_hasher_name)
+        :param data: the contents of the part, as bytes or a file
+        :param int part_size: the size of the part
+        :param str part_sha_b64: the base64-encoded sha1 of the part
+        :param int total_size: the size of the whole upload
+        """
 
         byte_range = self._build_range_header((start_offset, start_offset + part_size - 1))
-        content_range = str(byte_range).replace('=', ' ') + '/{}'.format(stream.size)
+        content_range = str(byte_range).replace('=', ' ') + '/{}'.format(total_size)
 
-        response = await self.make_request(
-            'PUT',
-            self._build_upload_url('files', 'upload_sessions', session_id),
-            headers={
-                # ``Content-Length`` is required for ``asyncio`` to use inner chunked stream read
-                'Content-Length': str(part_size),
-                'Content-Range': content_range,
-                'Content-Type:': 'application/octet-stream',
-                'Digest': 'sha={}'.format(part_sha_b64)
-            },
-            data=file_stream,
-            expects=(201, 200),
-            throws=exceptions.UploadError,
-        )
-        data = await response.json()
+        async def send(data):
+            response = await self.make_request(
+                'PUT',
+                self._build_upload_url('files', 'upload_sessions', session_id),
+                headers={
+                    # ``Content-Length`` is required for ``asyncio`` to use inner chunked stream
+                    # read
+                    'Content-Length': str(part_size),
+                    'Content-Range': content_range,
+                    'Content-Type:': 'application/octet-stream',
+                    'Digest': 'sha={}'.format(part_sha_b64)
+                },
+                data=data,
+                retry=0,
+                expects=(201, 200),
+                throws=exceptions.UploadError,
+            )
+            part_metadata = await response.json()
+            return part_metadata['part']
 
-        f.close()
-        return data['part']
+        return await buffers.send_part(send, data, self.UPLOAD_PART_RETRIES,
+                                       metrics=self.provider_metrics,
+                                       description='part {} of upload session {}'.format(
+                                           part_id, session_id))
 
     async def _complete_chunked_upload_session(self, session_data: dict, parts_manifest: list,
                                                data_sha: str) -> dict:
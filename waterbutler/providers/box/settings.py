@@ -7,8 +7,23 @@ BASE_URL = config.get('BASE_URL', 'https://api.box.com/2.0')
 BASE_UPLOAD_URL = config.get('BASE_CONTENT_URL', 'https://upload.box.com/api/2.0')
 NONCHUNKED_UPLOAD_LIMIT = int(config.get('NONCHUNKED_UPLOAD_LIMIT', 50 * 1000 * 1000))  # 50 MB
 
-# The size of the chunks read when writing the upload stream to disk
-TEMP_CHUNK_SIZE = int(config.get('TEMP_CHUNK_SIZE', 32 * 1024))  # 32KiB
+# The size of the chunks read from the upload stream while buffering a part
+TEMP_CHUNK_SIZE = int(config.get('TEMP_CHUNK_SIZE', 1024 * 1024))  # 1MiB
+
+# Number of parts of a chunked upload to send to Box at once.  Parts are held in memory shared by
+# every chunked upload in the process, see UPLOAD_PART_BUFFER_POOL_SIZE in waterbutler.settings, or
+# in a tempfile once that is used up.
+UPLOAD_PART_CONCURRENCY = int(config.get('UPLOAD_PART_CONCURRENCY', 4))
+
+# Times to retry a part that failed to upload before giving up on the whole upload
+UPLOAD_PART_RETRIES = int(config.get('UPLOAD_PART_RETRIES', 3))
 
 # Number of times to retry upload commits before giving up
 UPLOAD_COMMIT_RETRIES = int(config.get('UPLOAD_COMMIT_RETRIES', 10))
+
+# Token bucket for requests to the Box API, see waterbutler.core.scheduler
+REQUEST_RATE = float(config.get('REQUEST_RATE', settings.REQUEST_RATE))  # requests per second
+REQUEST_BURST = int(config.get('REQUEST_BURST', settings.REQUEST_BURST))
+
+# Seconds to cache metadata for, see waterbutler.core.cache.  0 disables caching.
+METADATA_CACHE_TTL = int(config.get('METADATA_CACHE_TTL', settings.METADATA_CACHE_TTL))
@@ -4,10 +4,13 @@ import json
 import time
 import asyncio
 import hashlib
+import datetime
 import functools
+from http import HTTPStatus
 
 import furl
 
+from waterbutler.core.cache import LRUCache
 from waterbutler.core.path import WaterButlerPath
 from waterbutler.core import streams, provider, exceptions
 
@@ -17,6 +20,12 @@ from waterbutler.providers.cloudfiles.metadata import (CloudFilesFileMetadata,
                                                        CloudFilesHeaderMetadata, )
 
 
+# Connection details shared by every CloudFilesProvider in the process, keyed by
+# ``CloudFilesProvider._connection_key``.  Values are dicts with ``token``, ``public_endpoint``,
+# ``internal_endpoint``, and ``temp_url_key`` keys.
+connection_cache = LRUCache(settings.TOKEN_CACHE_MAX_ENTRIES)
+
+
 def ensure_connection(func):
     """Runs ``_ensure_connection`` before continuing to the method
     """
@@ -33,6 +42,10 @@ class CloudFilesProvider(provider.BaseProvider):
     API Docs: https://developer.rackspace.com/docs/cloud-files/v1/developer-guide/#document-developer-guide
     """
     NAME = 'cloudfiles'
+    REQUEST_RATE = settings.REQUEST_RATE
+    REQUEST_BURST = settings.REQUEST_BURST
+    METADATA_CACHE_TTL = settings.METADATA_CACHE_TTL
+    SEGMENTED_DOWNLOADS = True
 
     def __init__(self, auth, credentials, settings, **kwargs):
         super().__init__(auth, credentials, settings, **kwargs)
@@ -238,6 +251,10 @@ class CloudFilesProvider(provider.BaseProvider):
         try:
             return (await super().make_request(*args, **kwargs))
         except exceptions.ProviderError as e:
+            if e.code == HTTPStatus.UNAUTHORIZED:
+                # token was revoked or expired early, make the next request fetch a new one
+                connection_cache.delete(self._connection_key)
+                self.token = None
             if e.code != 408:
                 raise
             await asyncio.sleep(1)
@@ -251,16 +268,33 @@ class CloudFilesProvider(provider.BaseProvider):
         # Currently You must have one for everything however
         self.metrics.add('ensure_connection.has_token_and_endpoint', True)
         self.metrics.add('ensure_connection.has_temp_url_key', True)
+        cached = None
         if not self.token or not self.endpoint:
             self.metrics.add('ensure_connection.has_token_and_endpoint', False)
-            data = await self._get_token()
-            self.token = data['access']['token']['id']
+            cached = connection_cache.get(self._connection_key, '')
+            self.metrics.add('ensure_connection.cached', cached is not None)
+            if cached is None:
+                data = await self._get_token()
+                public_endpoint, internal_endpoint = self._extract_endpoints(data)
+                cached = {
+                    'token': data['access']['token']['id'],
+                    'public_endpoint': public_endpoint,
+                    'internal_endpoint': internal_endpoint,
+                    'temp_url_key': None,
+                }
+                ttl = self._connection_cache_ttl(data['access']['token'].get('expires'))
+                if ttl > 0:
+                    connection_cache.set(self._connection_key, '', cached, ttl)
+
+            self.token = cached['token']
+            self.public_endpoint = cached['public_endpoint']
             self.metrics.add('ensure_connection.use_public', True if self.use_public else False)
             if self.use_public:
-                self.public_endpoint, _ = self._extract_endpoints(data)
                 self.endpoint = self.public_endpoint
             else:
-                self.public_endpoint, self.endpoint = self._extract_endpoints(data)
+                self.endpoint = cached['internal_endpoint']
+            if not self.temp_url_key and cached['temp_url_key']:
+                self.temp_url_key = cached['temp_url_key']
         if not self.temp_url_key:
             self.metrics.add('ensure_connection.has_temp_url_key', False)
             resp = await self.make_request('HEAD', self.endpoint, expects=(204, ))
@@ -268,6 +302,31 @@ class CloudFilesProvider(provider.BaseProvider):
                 self.temp_url_key = resp.headers['X-Account-Meta-Temp-URL-Key'].encode()
             except KeyError:
                 raise exceptions.ProviderError('No temp url key is available', code=503)
+            if cached is not None:
+                cached['temp_url_key'] = self.temp_url_key
+
+    @property
+    def _connection_key(self):
+        """Tokens are cached per account and region.  The api key is hashed into the cache key so
+        that a cached token is only ever handed to a provider holding the key it was issued for.
+        """
+        api_key_hash = hashlib.sha256(self.og_token.encode()).hexdigest()
+        return '{}:{}:{}'.format(self.username, self.region.lower(), api_key_hash)
+
+    def _connection_cache_ttl(self, expires):
+        """Return how long a token expiring at ``expires`` (an ISO 8601 UTC timestamp) may be
+        cached for.  Tokens are dropped ``TOKEN_CACHE_REFRESH_SECS`` before they expire, so that a
+        fresh one is fetched before requests start failing.
+        """
+        ttl = settings.TOKEN_CACHE_TTL
+        if ttl <= 0 or not expires:
+            return ttl
+        try:
+            expires_at = datetime.datetime.strptime(expires[:19], '%Y-%m-%dT%H:%M:%S')
+        except ValueError:
+            return ttl
+        expires_at = expires_at.replace(tzinfo=datetime.timezone.utc).timestamp()
+        return min(ttl, int(expires_at - time.time()) - settings.TOKEN_CACHE_REFRESH_SECS)
 
     def _extract_endpoints(self, data):
         """Pulls both the public and internal cloudfiles urls,
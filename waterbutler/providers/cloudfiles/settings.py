@@ -5,3 +5,16 @@ config = settings.child('CLOUDFILES_PROVIDER_CONFIG')
 
 TEMP_URL_SECS = int(config.get('TEMP_URL_SECS', 100))
 AUTH_URL = config.get('AUTH_URL', 'https://identity.api.rackspacecloud.com/v2.0/tokens')
+
+# Token bucket for requests to the Cloud Files API, see waterbutler.core.scheduler
+REQUEST_RATE = float(config.get('REQUEST_RATE', settings.REQUEST_RATE))  # requests per second
+REQUEST_BURST = int(config.get('REQUEST_BURST', settings.REQUEST_BURST))
+
+# Seconds to cache metadata for, see waterbutler.core.cache.  0 disables caching.
+METADATA_CACHE_TTL = int(config.get('METADATA_CACHE_TTL', settings.METADATA_CACHE_TTL))
+
+# Keystone tokens, endpoints and temp url keys are shared by every CloudFilesProvider in the process
+# until REFRESH_SECS before the token expires, but never for longer than TTL.  0 disables the cache.
+TOKEN_CACHE_TTL = int(config.get('TOKEN_CACHE_TTL', 12 * 60 * 60))
+TOKEN_CACHE_REFRESH_SECS = int(config.get('TOKEN_CACHE_REFRESH_SECS', 5 * 60))
+TOKEN_CACHE_MAX_ENTRIES = int(config.get('TOKEN_CACHE_MAX_ENTRIES', 1000))
@@ -82,6 +82,9 @@ class DataverseProvider(provider.BaseProvider):
     """
 
     NAME = 'dataverse'
+    REQUEST_RATE = pd_settings.REQUEST_RATE
+    REQUEST_BURST = pd_settings.REQUEST_BURST
+    METADATA_CACHE_TTL = pd_settings.METADATA_CACHE_TTL
 
     def __init__(self, auth, credentials, settings, **kwargs):
         """
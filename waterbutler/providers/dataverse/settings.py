@@ -8,3 +8,10 @@ DOWN_BASE_URL = config.get('DOWN_BASE_URL', "/api/access/datafile/")
 # TODO: double check and remove this unused API URL / endpoint
 METADATA_BASE_URL = config.get('METADATA_BASE_URL', "/dvn/api/data-deposit/v1.1/swordv2/statement/study/")
 JSON_BASE_URL = config.get('JSON_BASE_URL', "/api/v1/datasets/{0}/versions/:{1}")
+
+# Token bucket for requests to the Dataverse API, see waterbutler.core.scheduler
+REQUEST_RATE = float(config.get('REQUEST_RATE', settings.REQUEST_RATE))  # requests per second
+REQUEST_BURST = int(config.get('REQUEST_BURST', settings.REQUEST_BURST))
+
+# Seconds to cache metadata for, see waterbutler.core.cache.  0 disables caching.
+METADATA_CACHE_TTL = int(config.get('METADATA_CACHE_TTL', settings.METADATA_CACHE_TTL))
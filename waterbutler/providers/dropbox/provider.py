@@ -60,6 +60,9 @@ class DropboxProvider(provider.BaseProvider):
     BASE_URL = pd_settings.BASE_URL
     CONTIGUOUS_UPLOAD_SIZE_LIMIT = pd_settings.CONTIGUOUS_UPLOAD_SIZE_LIMIT
     CHUNK_SIZE = pd_settings.CHUNK_SIZE
+    REQUEST_RATE = pd_settings.REQUEST_RATE
+    REQUEST_BURST = pd_settings.REQUEST_BURST
+    METADATA_CACHE_TTL = pd_settings.METADATA_CACHE_TTL
 
     def __init__(self, auth, credentials, settings, **kwargs):
         super().__init__(auth, credentials, settings, **kwargs)
@@ -544,6 +547,36 @@ class DropboxProvider(provider.BaseProvider):
 
         return DropboxFileMetadata(data, self.folder)
 
+    async def folder_tree(self,  # type: ignore
+                          path: WaterButlerPath,
+                          **kwargs) -> typing.List[tuple]:
+        """List everything under ``path`` with a single recursive ``list_folder``, paging through
+        the results.  Entries are matched to their folders by their lowercased paths, since only
+        the last part of ``path_display`` is guaranteed to be in the right case.
+        """
+        full_path = path.full_path.rstrip('/')
+        root = full_path.lower() + '/'
+        url = self.build_url('files', 'list_folder')
+        body = {'path': full_path, 'recursive': True}  # type: dict
+
+        entries = []  # type: typing.List[typing.Tuple[str, BaseDropboxMetadata]]
+        has_more = True
+        page_count = 0
+        while has_more:
+            page_count += 1
+            data = await self.dropbox_request(url, body, throws=core_exceptions.MetadataError)
+            for entry in data['entries']:
+                relative = (entry['path_lower'] + '/')[len(root):]
+                if entry['.tag'] == 'folder':
+                    entries.append((relative, DropboxFolderMetadata(entry, self.folder)))
+                elif entry['.tag'] == 'file':
+                    entries.append((relative.rstrip('/'), DropboxFileMetadata(entry, self.folder)))
+            has_more = data['has_more']
+            url = self.build_url('files', 'list_folder', 'continue')
+            body = {'cursor': data['cursor']}
+        self.metrics.add('folder_tree.pages', page_count)
+        return self._nest_folder_tree(entries)
+
     async def revisions(self, path: WaterButlerPath, **kwargs) -> typing.List[DropboxRevision]:
         # Dropbox v2 API limits the number of revisions returned to a maximum
         # of 100, default 10. Previously we had set the limit to 250.
@@ -10,3 +10,10 @@ BASE_CONTENT_URL = config.get('BASE_CONTENT_URL', 'https://content.dropboxapi.co
 CONTIGUOUS_UPLOAD_SIZE_LIMIT = int(config.get('CONTIGUOUS_UPLOAD_SIZE_LIMIT', 150000000))  # 150 MB
 
 CHUNK_SIZE = int(config.get('CHUNK_SIZE', 4000000))  # 4 MB
+
+# Token bucket for requests to the Dropbox API, see waterbutler.core.scheduler
+REQUEST_RATE = float(config.get('REQUEST_RATE', settings.REQUEST_RATE))  # requests per second
+REQUEST_BURST = int(config.get('REQUEST_BURST', settings.REQUEST_BURST))
+
+# Seconds to cache metadata for, see waterbutler.core.cache.  0 disables caching.
+METADATA_CACHE_TTL = int(config.get('METADATA_CACHE_TTL', settings.METADATA_CACHE_TTL))
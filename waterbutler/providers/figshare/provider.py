@@ -99,6 +99,9 @@ class BaseFigshareProvider(provider.BaseProvider):
     DOWNLOAD_URL = pd_settings.DOWNLOAD_URL
     VALID_CONTAINER_TYPES = pd_settings.VALID_CONTAINER_TYPES
     ARTICLE_CONTAINER_TYPES = pd_settings.ARTICLE_CONTAINER_TYPES
+    REQUEST_RATE = pd_settings.REQUEST_RATE
+    REQUEST_BURST = pd_settings.REQUEST_BURST
+    METADATA_CACHE_TTL = pd_settings.METADATA_CACHE_TTL
 
     def __init__(self, auth, credentials, settings, **kwargs):
         super().__init__(auth, credentials, settings, **kwargs)
@@ -547,11 +550,23 @@ class FigshareProjectProvider(BaseFigshareProvider):
         :rtype: ``FigsharePath``
         :return: a FigsharePath object, with ids set if a match was found
         """
-        parent_is_folder = False
+        return (await self.revalidate_children(parent_path, [(child_name, folder)]))[0]
+
+    async def revalidate_children(self, parent_path, children):
+        """Bulk version of ``revalidate_path``.  The parent article, or every article in the
+        project if ``parent_path`` is the root, is fetched only once for all of ``children``.
+
+        :param FigsharePath parent_path: Path of parent
+        :param list children: ``(child_name, folder)`` tuples
+        :rtype: ``list`` of ``FigsharePath``
+        """
+        if not children:
+            return []
+
         urn_parts = (*self.root_path_parts, 'articles')
-        child_id = None
         if not parent_path.is_root:  # parent is fileset or article
-            if not folder:  # child is article/file
+            file_ids = {}  # type: dict
+            if not all(folder for _, folder in children):  # some children are articles/files
                 list_children_response = await self.make_request(
                     'GET',
                     self.build_url(False, *urn_parts, parent_path.identifier),
@@ -559,17 +574,30 @@ class FigshareProjectProvider(BaseFigshareProvider):
                 )
                 article_json = await list_children_response.json()
                 for file in article_json['files']:
-                    if file['name'] == child_name:
-                        child_id = str(file['id'])
-                        break
-            return parent_path.child(child_name, _id=child_id, folder=folder,
-                                     parent_is_folder=parent_is_folder)
+                    file_ids.setdefault(file['name'], str(file['id']))
+            return [
+                parent_path.child(child_name, _id=None if folder else file_ids.get(child_name),
+                                  folder=folder, parent_is_folder=False)
+                for child_name, folder in children
+            ]
+
         # parent is root
-        children = await self._get_all_articles()
+        articles_json = await self._get_all_articles()
         articles = await asyncio.gather(*[
             self._get_url_super(article_json['url'])
-            for article_json in children
+            for article_json in articles_json
         ])
+        return [
+            self._revalidate_root_child(parent_path, articles, child_name, folder)
+            for child_name, folder in children
+        ]
+
+    def _revalidate_root_child(self, parent_path, articles, child_name, folder):
+        """Look for ``child_name`` among ``articles``, the full metadata of every article in the
+        project.  See ``revalidate_path``.
+        """
+        parent_is_folder = False
+        child_id = None
         for article in articles:
             is_folder = article['defined_type'] in pd_settings.FOLDER_TYPES
             article_id = str(article['id'])
@@ -943,15 +971,27 @@ class FigshareArticleProvider(BaseFigshareProvider):
         the correct id of an existing child_name. will return the first id that
         matches the folder and child_name arguments or '' if no match.
         """
-        parent_is_folder = False
+        return (await self.revalidate_children(parent_path, [(child_name, folder)]))[0]
+
+    async def revalidate_children(self, parent_path, children):
+        """Bulk version of ``revalidate_path``.  The article's file list is fetched once and
+        shared by every child.
+
+        :param FigsharePath parent_path: Path of parent
+        :param list children: ``(child_name, folder)`` tuples
+        :rtype: ``list`` of ``FigsharePath``
+        """
+        if not children:
+            return []
+
         urn_parts = self.root_path_parts
         if not parent_path.is_root:
-            if folder:
-                raise exceptions.NotFoundError(
-                    '{} is not a valid parent path of folder={}. Folders can only exist at the '
-                    'root level.'.format(parent_path.identifier_path, str(folder)))
-            else:
-                urn_parts = (*urn_parts, (parent_path.identifier))
+            for _, folder in children:
+                if folder:
+                    raise exceptions.NotFoundError(
+                        '{} is not a valid parent path of folder={}. Folders can only exist at the '
+                        'root level.'.format(parent_path.identifier_path, str(folder)))
+            urn_parts = (*urn_parts, (parent_path.identifier))
 
         list_children_response = await self.make_request(
             'GET',
@@ -959,15 +999,16 @@ class FigshareArticleProvider(BaseFigshareProvider):
             expects=(200, ),
         )
 
-        child_id = ''
+        file_ids = {}  # type: dict
         article_json = await list_children_response.json()
         for file in article_json['files']:
-            if file['name'] == child_name:
-                child_id = str(file['id'])
-                break
+            file_ids.setdefault(file['name'], str(file['id']))
 
-        return parent_path.child(child_name, _id=child_id, folder=folder,
-                                 parent_is_folder=parent_is_folder)
+        return [
+            parent_path.child(child_name, _id=file_ids.get(child_name, ''), folder=folder,
+                              parent_is_folder=False)
+            for child_name, folder in children
+        ]
 
     async def upload(self, stream, path, conflict='replace', **kwargs):
         r"""Upload a file to provider root or to an article whose defined_type is
@@ -19,3 +19,10 @@ FILE_CREATE_WAIT = 0.1   # seconds passed to time.sleep
 
 # project/collection article listings are paginated.  Specify max number of results returned per page.
 MAX_PAGE_SIZE = int(config.get('MAX_PAGE_SIZE', 100))
+
+# Token bucket for requests to the figshare API, see waterbutler.core.scheduler
+REQUEST_RATE = float(config.get('REQUEST_RATE', settings.REQUEST_RATE))  # requests per second
+REQUEST_BURST = int(config.get('REQUEST_BURST', settings.REQUEST_BURST))
+
+# Seconds to cache metadata for, see waterbutler.core.cache.  0 disables caching.
+METADATA_CACHE_TTL = int(config.get('METADATA_CACHE_TTL', settings.METADATA_CACHE_TTL))
@@ -1,5 +1,6 @@
 import os
 import shutil
+import asyncio
 import logging
 import datetime
 import mimetypes
@@ -23,6 +24,7 @@ class FileSystemProvider(provider.BaseProvider):
     case-sensitivity on case-insensitive host filesystems.
     """
     NAME = 'filesystem'
+    SEGMENTED_DOWNLOADS = True
 
     def __init__(self, auth, credentials, settings, **kwargs):
         super().__init__(auth, credentials, settings, **kwargs)
@@ -71,10 +73,11 @@ class FileSystemProvider(provider.BaseProvider):
 
         os.makedirs(os.path.split(path.full_path)[0], exist_ok=True)
 
+        loop = asyncio.get_event_loop()
         with open(path.full_path, 'wb') as file_pointer:
             chunk = await stream.read(pd_settings.CHUNK_SIZE)
             while chunk:
-                file_pointer.write(chunk)
+                await loop.run_in_executor(None, file_pointer.write, chunk)
                 chunk = await stream.read(pd_settings.CHUNK_SIZE)
 
         metadata = await self.metadata(path)
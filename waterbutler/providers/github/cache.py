@@ -0,0 +1,151 @@
+import os
+import json
+import typing
+import asyncio
+import hashlib
+import logging
+import tempfile
+import collections
+
+from waterbutler.providers.github import settings as pd_settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class TreeCache:
+    """A process-local LRU of GitHub tree responses, bounded by the size of the response bodies,
+    with an optional on-disk tier.  Trees are addressed by their SHA and never change, so entries
+    are never invalidated, only evicted.
+
+    Entries are stored as the raw JSON body of the git trees endpoint, so :meth:`get` callers must
+    parse them and are free to modify the result.  A ``{path: entry}`` index of each tree can be
+    built once with :meth:`set_index` and fetched with :meth:`get_index`.  Indexes are shared
+    between callers and must not be modified.  An index is counted as taking up as much memory as
+    the body it was built from.
+
+    :param int max_bytes: max total size of the bodies and indexes held in memory
+    :param str disk_dir: directory to persist bodies in.  ``None`` disables the disk tier.
+    :param int disk_max_bytes: max total size of ``disk_dir``, oldest files are removed first
+    """
+
+    def __init__(self, max_bytes: int, disk_dir: str=None, disk_max_bytes: int=0) -> None:
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.size = 0
+        self._entries = collections.OrderedDict()  # type: collections.OrderedDict
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(owner: str, repo: str, sha: str, recursive: bool) -> str:
+        """Trees are scoped to their repo as well as their SHA, so a tree can only be read back by
+        requests for a repo that GitHub has already served it for.
+        """
+        return '{}/{}:{}:{}'.format(owner, repo, sha, 'recursive' if recursive else 'flat')
+
+    async def get(self, key: str) -> typing.Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry[0]
+
+        if self.disk_dir is None:
+            return None
+
+        loop = asyncio.get_event_loop()
+        body = await loop.run_in_executor(None, self._read_file, key)
+        if body is not None:
+            self._store(key, body)
+        return body
+
+    async def set(self, key: str, body: bytes) -> None:
+        self._store(key, body)
+        if self.disk_dir is not None:
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, self._write_file, key, body)
+
+    def get_index(self, key: str) -> typing.Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None or entry[1] is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set_index(self, key: str, tree: dict) -> dict:
+        """Build the ``{path: entry}`` index of ``tree`` and attach it to the cached body, if there
+        is one.  Returns the index either way.
+        """
+        index = {item['path']: item for item in tree['tree']}
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] is None:
+            entry[1] = index
+            self.size += len(entry[0])
+            self._evict()
+        return index
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+    def _store(self, key: str, body: bytes) -> None:
+        if len(body) > self.max_bytes or key in self._entries:
+            return
+        self._entries[key] = [body, None]
+        self.size += len(body)
+        self._evict()
+
+    def _evict(self) -> None:
+        while self.size > self.max_bytes:
+            body, index = self._entries.popitem(last=False)[1]
+            self.size -= len(body) * (1 if index is None else 2)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, hashlib.sha256(key.encode('utf-8')).hexdigest() + '.json')
+
+    def _read_file(self, key: str) -> typing.Optional[bytes]:
+        try:
+            with open(self._path(key), 'rb') as fp:
+                body = fp.read()
+            json.loads(body.decode('utf-8'))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            logger.warning('Ignoring unreadable tree cache file for {}: {!r}'.format(key, exc))
+            return None
+        return body
+
+    def _write_file(self, key: str, body: bytes) -> None:
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(body)
+            os.replace(tmp_path, self._path(key))
+            self._prune_dir()
+        except OSError as exc:
+            logger.warning('Could not write tree cache file for {}: {!r}'.format(key, exc))
+
+    def _prune_dir(self) -> None:
+        if self.disk_max_bytes <= 0:
+            return
+        files = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith('.json'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+tree_cache = TreeCache(pd_settings.TREE_CACHE_MAX_BYTES, disk_dir=pd_settings.TREE_CACHE_DIR,
+                       disk_max_bytes=pd_settings.TREE_CACHE_DIR_MAX_BYTES)
@@ -12,6 +12,7 @@ import furl
 from aiohttp.client import ClientResponse
 
 from waterbutler.providers.github.path import GitHubPath
+from waterbutler.providers.github.cache import tree_cache
 from waterbutler.core import streams, provider, exceptions
 from waterbutler.providers.github import settings as pd_settings
 from waterbutler.providers.github.metadata import (GitHubRevision,
@@ -94,6 +95,9 @@ class GitHubProvider(provider.BaseProvider):
     NAME = 'github'
     BASE_URL = pd_settings.BASE_URL
     VIEW_URL = pd_settings.VIEW_URL
+    REQUEST_RATE = pd_settings.REQUEST_RATE
+    REQUEST_BURST = pd_settings.REQUEST_BURST
+    METADATA_CACHE_TTL = pd_settings.METADATA_CACHE_TTL
 
     # Load settings for GitHub rate limiting
     RL_TOKEN_ADD_DELAY = pd_settings.RL_TOKEN_ADD_DELAY
@@ -727,6 +731,17 @@ class GitHubProvider(provider.BaseProvider):
         return await resp.json()
 
     async def _fetch_tree(self, sha, recursive=False):
+        """Fetch the tree identified by ``sha``.  Trees are immutable, so responses are kept in
+        ``tree_cache`` and only fetched from GitHub once.  The returned tree is a fresh copy that
+        the caller is free to modify.
+        """
+        key = tree_cache.key(self.owner, self.repo, sha, recursive)
+        body = await tree_cache.get(key)
+        if body is not None:
+            self.metrics.incr('tree_cache.hits')
+            return json.loads(body.decode('utf-8'))
+
+        self.metrics.incr('tree_cache.misses')
         url = furl.furl(self.build_repo_url('git', 'trees', sha))
         if recursive:
             url.args.update({'recursive': 1})
@@ -736,23 +751,35 @@ class GitHubProvider(provider.BaseProvider):
             expects=(200, ),
             throws=exceptions.MetadataError
         )
-        tree = await resp.json()
+        body = await resp.read()
+        tree = json.loads(body.decode('utf-8'))
 
         if tree['truncated']:
             raise GitHubUnsupportedRepoError('')
 
+        await tree_cache.set(key, body)
         return tree
 
+    async def _fetch_tree_index(self, sha):
+        """Fetch the recursive tree identified by ``sha`` as a ``{path: entry}`` dict.  The index
+        is built once per tree and shared between requests, so it must not be modified.
+        """
+        key = tree_cache.key(self.owner, self.repo, sha, True)
+        index = tree_cache.get_index(key)
+        if index is None:
+            index = tree_cache.set_index(key, await self._fetch_tree(sha, recursive=True))
+        return index
+
     async def _search_tree_for_path(self, path, tree_sha, recursive=True):
         """Search through the given tree for an entity matching the name and type of `path`.
         """
-        tree = await self._fetch_tree(tree_sha, recursive=True)
+        index = await self._fetch_tree_index(tree_sha)
 
         implicit_type = 'tree' if path.endswith('/') else 'blob'
 
-        for entity in tree['tree']:
-            if entity['path'] == path.strip('/') and entity['type'] == implicit_type:
-                return entity
+        entity = index.get(path.strip('/'))
+        if entity is not None and entity['type'] == implicit_type:
+            return dict(entity)
 
         raise exceptions.NotFoundError(str(path))
 
@@ -839,6 +866,34 @@ class GitHubProvider(provider.BaseProvider):
 
         return ret
 
+    async def folder_tree(self, path, **kwargs):
+        """List the folder at ``path``, then fetch the recursive git tree of each of its subfolders.
+        Trees are addressed by sha, so they come from ``tree_cache`` once fetched.  Returns `None`
+        if any of them is too large for GitHub to return whole.  Submodules are left out, as they
+        have no content to download.
+        """
+        ref = path.branch_ref
+        contents = await self._metadata_folder(path)
+        folders = [item for item in contents if item.is_folder]
+        try:
+            trees = await asyncio.gather(*[
+                self._fetch_tree(folder.raw['sha'], recursive=True) for folder in folders
+            ])
+        except GitHubUnsupportedRepoError:
+            return None
+
+        entries = [(item.name + ('/' if item.is_folder else ''), item) for item in contents]
+        for folder, tree in zip(folders, trees):
+            for item in tree['tree']:
+                relative = '{}/{}'.format(folder.name, item['path'])
+                item['path'] = '{}/{}'.format(folder.raw['path'], item['path'])
+                if item['type'] == 'tree':
+                    entries.append((relative + '/', GitHubFolderTreeMetadata(item, ref=ref)))
+                elif item['type'] == 'blob':
+                    entries.append((relative, GitHubFileTreeMetadata(item, ref=ref)))
+
+        return self._nest_folder_tree(entries)
+
     async def _metadata_file(self, path, **kwargs):
         resp = await self.make_request(
             'GET',
@@ -853,18 +908,13 @@ class GitHubProvider(provider.BaseProvider):
             raise exceptions.NotFoundError(str(path))
 
         latest = commits[0]
-        tree = await self._fetch_tree(latest['commit']['tree']['sha'], recursive=True)
+        index = await self._fetch_tree_index(latest['commit']['tree']['sha'])
 
-        try:
-            data = next(
-                x for x in tree['tree']
-                if x['path'] == path.path
-            )
-        except StopIteration:
+        if path.path not in index:
             raise exceptions.NotFoundError(str(path))
 
         return GitHubFileTreeMetadata(
-            data, commit=latest['commit'], web_view=self._web_view(path),
+            dict(index[path.path]), commit=latest['commit'], web_view=self._web_view(path),
             ref=path.branch_ref
         )
 
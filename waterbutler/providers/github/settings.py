@@ -40,3 +40,17 @@ RL_RESERVE_RATIO = float(config.get('RL_RESERVE_RATIO', 0.2))
 RL_RESERVE_BASE = int(config.get('RL_RESERVE_BASE', 100))
 # The minimum request rate allowed.  Applies when the provider is near the reserve base.
 RL_MIN_REQ_RATE = float(config.get('RL_MIN_REQ_RATE', 0.01))
+
+# Token bucket for requests to the GitHub API, see waterbutler.core.scheduler
+REQUEST_RATE = float(config.get('REQUEST_RATE', settings.REQUEST_RATE))  # requests per second
+REQUEST_BURST = int(config.get('REQUEST_BURST', settings.REQUEST_BURST))
+
+# Seconds to cache metadata for, see waterbutler.core.cache.  0 disables caching.
+METADATA_CACHE_TTL = int(config.get('METADATA_CACHE_TTL', settings.METADATA_CACHE_TTL))
+
+# Cache for git tree responses, see waterbutler.providers.github.cache.  Trees are immutable, so
+# entries are only ever evicted to stay under these limits.
+TREE_CACHE_MAX_BYTES = int(config.get('TREE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+# Directory to persist fetched trees in.  Unset to keep trees in memory only.
+TREE_CACHE_DIR = config.get('TREE_CACHE_DIR', None)
+TREE_CACHE_DIR_MAX_BYTES = int(config.get('TREE_CACHE_DIR_MAX_BYTES', 1024 * 1024 * 1024))
@@ -8,6 +8,7 @@ from waterbutler.core import provider
 from waterbutler.core import exceptions
 
 from waterbutler.providers.gitlab.path import GitLabPath
+from waterbutler.providers.gitlab import settings as pd_settings
 from waterbutler.providers.gitlab.metadata import (BaseGitLabMetadata,
                                                    GitLabRevision,
                                                    GitLabFileMetadata,
@@ -49,6 +50,9 @@ class GitLabProvider(provider.BaseProvider):
       `GitLabPath` object, so that it will be available in the returned metadata.
     """
     NAME = 'gitlab'
+    REQUEST_RATE = pd_settings.REQUEST_RATE
+    REQUEST_BURST = pd_settings.REQUEST_BURST
+    METADATA_CACHE_TTL = pd_settings.METADATA_CACHE_TTL
 
     MAX_PAGE_SIZE = 100
 
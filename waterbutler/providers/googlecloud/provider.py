@@ -44,6 +44,10 @@ class GoogleCloudProvider(BaseProvider):
 
     # Provider Name
     NAME = 'googlecloud'
+    REQUEST_RATE = pd_settings.REQUEST_RATE
+    REQUEST_BURST = pd_settings.REQUEST_BURST
+    METADATA_CACHE_TTL = pd_settings.METADATA_CACHE_TTL
+    SEGMENTED_DOWNLOADS = True
 
     # BASE URL for XML API
     BASE_URL = pd_settings.BASE_URL
@@ -7,3 +7,10 @@ BASE_URL = config.get('BASE_URL', 'https://storage.googleapis.com')
 
 # The expiration time (in seconds) for a signed request
 SIGNATURE_EXPIRATION = int(config.get('SIGNATURE_EXPIRATION', 60))
+
+# Token bucket for requests to the Google Cloud Storage API, see waterbutler.core.scheduler
+REQUEST_RATE = float(config.get('REQUEST_RATE', settings.REQUEST_RATE))  # requests per second
+REQUEST_BURST = int(config.get('REQUEST_BURST', settings.REQUEST_BURST))
+
+# Seconds to cache metadata for, see waterbutler.core.cache.  0 disables caching.
+METADATA_CACHE_TTL = int(config.get('METADATA_CACHE_TTL', settings.METADATA_CACHE_TTL))
@@ -8,6 +8,7 @@ from typing import List, Sequence, Tuple, Union
 
 import furl
 
+from waterbutler.core.cache import LRUCache
 from waterbutler.core import exceptions, provider, streams
 from waterbutler.core.path import WaterButlerPath, WaterButlerPathPart
 
@@ -20,6 +21,11 @@ from waterbutler.providers.googledrive.metadata import (GoogleDriveRevision,
                                                         GoogleDriveFileRevisionMetadata, )
 
 
+# Shared by every GoogleDriveProvider in the process.  Maps a parent folder id to the items found
+# beneath it by ``_resolve_path_to_ids``, see ``GoogleDriveProvider._cached_child``.
+path_cache = LRUCache(pd_settings.PATH_CACHE_MAX_ENTRIES)
+
+
 def clean_query(query: str):
     # Replace \ with \\ and ' with \'
     # Note only single quotes need to be escaped
@@ -72,8 +78,24 @@ class GoogleDriveProvider(provider.BaseProvider):
     """
     NAME = 'googledrive'
     BASE_URL = pd_settings.BASE_URL
+    REQUEST_RATE = pd_settings.REQUEST_RATE
+    REQUEST_BURST = pd_settings.REQUEST_BURST
+    METADATA_CACHE_TTL = pd_settings.METADATA_CACHE_TTL
+    PATH_CACHE_TTL = pd_settings.PATH_CACHE_TTL
     FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
 
+    # Google docs can only be found by name with their WB extension, see `_resolve_path_to_ids`
+    DOCS_EXTENSIONS = ('.gdoc', '.gdraw', '.gslides', '.gsheet')
+    DOCS_MIME_TYPES = ('application/vnd.google-apps.document',
+                       'application/vnd.google-apps.drawing',
+                       'application/vnd.google-apps.presentation',
+                       'application/vnd.google-apps.spreadsheet')
+    # Google forms and maps can't be downloaded, so they are never listed
+    UNLISTED_MIME_TYPES = ('application/vnd.google-apps.form',
+                           'application/vnd.google-apps.map')
+    # Items of these types are never found by a name without a WB extension
+    EXCLUDED_MIME_TYPES = UNLISTED_MIME_TYPES + DOCS_MIME_TYPES
+
     # https://developers.google.com/drive/v2/web/about-permissions#roles
     # 'reader' and 'commenter' are not authorized to access the revisions list
     ROLES_ALLOWING_REVISIONS = ['owner', 'organizer', 'writer']
@@ -108,6 +130,10 @@ class GoogleDriveProvider(provider.BaseProvider):
                               base: WaterButlerPath,
                               name: str,
                               folder: bool=None) -> WaterButlerPath:
+        """Unlike the other providers with a bulk ``revalidate_children``, this doesn't delegate to
+        it.  A single child is cheaper to find with a title query than by listing its parent.
+        Both go through ``path_cache`` and match titles by the same rules, so they agree.
+        """
         # TODO Redo the logic here folders names ending in /s
         # Will probably break
         if '/' in name.lstrip('/') and '%' not in name:
@@ -126,6 +152,36 @@ class GoogleDriveProvider(provider.BaseProvider):
         _id, name, mime = list(map(parts[-1].__getitem__, ('id', 'title', 'mimeType')))
         return base.child(name, _id=_id, folder='folder' in mime)
 
+    async def revalidate_children(self,
+                                  base: WaterButlerPath,
+                                  children: Sequence[Tuple[str, bool]]) -> List[WaterButlerPath]:
+        """Resolve all of ``children`` from a single listing of ``base``, instead of the two
+        requests per child made by ``revalidate_path``.  Children are matched by the same rules as
+        the title queries in ``_resolve_path_to_ids``.  Children already in ``path_cache`` are
+        taken from it, and the parent is only listed if any are missing.  Found children are added
+        to ``path_cache``.
+        """
+        cached = [self._cached_child(base.identifier, self._path_cache_key(name, folder))
+                  for name, folder in children]
+
+        by_title = {}  # type: dict
+        if any(item is None for item in cached):
+            for item in await self._folder_metadata(base, raw=True):
+                by_title.setdefault(item['title'], []).append(item)  # type: ignore
+
+        paths = []
+        for (name, folder), item in zip(children, cached):
+            if item is None:
+                item = self._match_child(by_title, name, folder)
+            if item is None:
+                paths.append(base.child(name, _id=None, folder=folder))
+                continue
+
+            self._cache_child(base.identifier, self._path_cache_key(name, folder), item)
+            paths.append(base.child(item['title'], _id=item['id'],
+                                    folder=item['mimeType'] == self.FOLDER_MIME_TYPE))
+        return paths
+
     def can_duplicate_names(self) -> bool:
         return True
 
@@ -144,6 +200,7 @@ class GoogleDriveProvider(provider.BaseProvider):
                          dest_provider: provider.BaseProvider,
                          src_path: WaterButlerPath,
                          dest_path: WaterButlerPath) -> Tuple[BaseGoogleDriveMetadata, bool]:
+        dest_path = await self._recheck_cached_path(dest_path)
         self.metrics.add('intra_move.destination_exists', dest_path.identifier is not None)
         if dest_path.identifier:
             await dest_provider.delete(dest_path)
@@ -164,6 +221,7 @@ class GoogleDriveProvider(provider.BaseProvider):
             throws=exceptions.IntraMoveError,
         )
         data = await resp.json()
+        self._forget_children(src_path.parent.identifier, dest_path.parent.identifier)
 
         created = dest_path.identifier is None
         dest_path.parts[-1]._id = data['id']
@@ -179,6 +237,7 @@ class GoogleDriveProvider(provider.BaseProvider):
                          dest_provider: provider.BaseProvider,
                          src_path: WaterButlerPath,
                          dest_path: WaterButlerPath) -> Tuple[GoogleDriveFileMetadata, bool]:
+        dest_path = await self._recheck_cached_path(dest_path)
         self.metrics.add('intra_copy.destination_exists', dest_path.identifier is not None)
         if dest_path.identifier:
             await dest_provider.delete(dest_path)
@@ -197,6 +256,7 @@ class GoogleDriveProvider(provider.BaseProvider):
             throws=exceptions.IntraMoveError,
         )
         data = await resp.json()
+        self._forget_children(dest_path.parent.identifier)
 
         # GoogleDrive doesn't support intra-copy for folders, so dest_path will always
         # be a file.  See can_intra_copy() for type check.
@@ -254,6 +314,7 @@ class GoogleDriveProvider(provider.BaseProvider):
                      **kwargs) -> Tuple[GoogleDriveFileMetadata, bool]:
         assert path.is_file
 
+        path = await self._recheck_cached_path(path)
         if path.identifier:
             segments = [path.identifier]
         else:
@@ -265,6 +326,7 @@ class GoogleDriveProvider(provider.BaseProvider):
         upload_id = await self._start_resumable_upload(not path.identifier, segments, stream.size,
                                                        upload_metadata)
         data = await self._finish_resumable_upload(segments, stream, upload_id)
+        self._forget_children(path.parent.identifier)
 
         if data['md5Checksum'] != stream.writers['md5'].hexdigest:
             raise exceptions.UploadChecksumMismatchError()
@@ -287,6 +349,7 @@ class GoogleDriveProvider(provider.BaseProvider):
             the contents of provider root path will be deleted. But not the
             provider root itself.
         """
+        path = await self._recheck_cached_path(path)
         if not path.identifier:
             raise exceptions.NotFoundError(str(path))
 
@@ -295,6 +358,7 @@ class GoogleDriveProvider(provider.BaseProvider):
             self.metrics.add('delete.root_delete_confirmed', confirm_delete == 1)
             if confirm_delete == 1:
                 await self._delete_folder_contents(path)
+                self._forget_children(path.identifier)
                 return
             else:
                 raise exceptions.DeleteError(
@@ -310,15 +374,15 @@ class GoogleDriveProvider(provider.BaseProvider):
             expects=(200, ),
             throws=exceptions.DeleteError,
         )
+        self._forget_children(path.parent.identifier, path.identifier)
         return
 
     def _build_query(self, folder_id: str, title: str=None) -> str:
         queries = [
             "'{}' in parents".format(folder_id),
             'trashed = false',
-            "mimeType != 'application/vnd.google-apps.form'",
-            "mimeType != 'application/vnd.google-apps.map'",
         ]
+        queries.extend("mimeType != '{}'".format(mime) for mime in self.UNLISTED_MIME_TYPES)
         if title:
             queries.append("title = '{}'".format(clean_query(title)))
         return ' and '.join(queries)
@@ -405,6 +469,7 @@ class GoogleDriveProvider(provider.BaseProvider):
             expects=(200, ),
             throws=exceptions.CreateFolderError,
         )
+        self._forget_children(path.parent.identifier)
         return GoogleDriveFolderMetadata(await resp.json(), path)
 
     def path_from_metadata(self, parent_path, metadata):
@@ -469,6 +534,9 @@ class GoogleDriveProvider(provider.BaseProvider):
         """Takes a path and traverses the file tree (ha!) beginning at ``start_at``, looking for
         something that matches ``path``.  Returns a list of dicts for each part of the path, with
         ``title``, ``mimeType``, and ``id`` keys.
+
+        Found items are cached in ``path_cache`` for ``PATH_CACHE_TTL`` seconds, so a warm lookup
+        of a deep path costs no requests at all.  Missing items are never cached.
         """
         self.metrics.incr('called_resolve_path_to_ids')
         ret = start_at or [{
@@ -485,8 +553,18 @@ class GoogleDriveProvider(provider.BaseProvider):
         while parts:
             current_part = parts.pop(0)
             part_name, part_is_folder = current_part[0], current_part[1]
+
+            cache_key = self._path_cache_key(part_name, part_is_folder)
+            cached = self._cached_child(item_id, cache_key)
+            if cached is not None:
+                self.metrics.incr('resolve_path_to_ids.cache_hits')
+                item_id = cached['id']
+                ret.append(cached)
+                continue
+
+            parent_id = item_id
             name, ext = os.path.splitext(part_name)
-            if not part_is_folder and ext in ('.gdoc', '.gdraw', '.gslides', '.gsheet'):
+            if not part_is_folder and ext in self.DOCS_EXTENSIONS:
                 gd_ext = utils.get_mimetype_from_ext(ext)
                 query = "title = '{}' " \
                         "and trashed = false " \
@@ -494,14 +572,11 @@ class GoogleDriveProvider(provider.BaseProvider):
             else:
                 query = "title = '{}' " \
                         "and trashed = false " \
-                        "and mimeType != 'application/vnd.google-apps.form' " \
-                        "and mimeType != 'application/vnd.google-apps.map' " \
-                        "and mimeType != 'application/vnd.google-apps.document' " \
-                        "and mimeType != 'application/vnd.google-apps.drawing' " \
-                        "and mimeType != 'application/vnd.google-apps.presentation' " \
-                        "and mimeType != 'application/vnd.google-apps.spreadsheet' " \
+                        "{}" \
                         "and mimeType {} '{}'".format(
                             clean_query(part_name),
+                            ''.join("and mimeType != '{}' ".format(mime)
+                                    for mime in self.EXCLUDED_MIME_TYPES),
                             '=' if part_is_folder else '!=',
                             self.FOLDER_MIME_TYPE
                         )
@@ -532,9 +607,82 @@ class GoogleDriveProvider(provider.BaseProvider):
                 expects=(200, ),
                 throws=exceptions.MetadataError,
             )
-            ret.append(await resp.json())
+            item = await resp.json()
+            self._cache_child(parent_id, cache_key, item)
+            ret.append(item)
         return ret
 
+    def _match_child(self, by_title: dict, name: str, is_folder: bool) -> Union[dict, None]:
+        """Find the item named ``name`` in a folder listing grouped by title.  Google docs are
+        listed without their WB extension (e.g. ``.gdoc``) and are only matched when it's given.
+        Other items are matched like the title queries in `_resolve_path_to_ids`, skipping any of
+        the ``EXCLUDED_MIME_TYPES``.
+        """
+        title, ext = os.path.splitext(name)
+        if not is_folder and ext in self.DOCS_EXTENSIONS:
+            mime_type = utils.get_mimetype_from_ext(ext)
+            candidates = [x for x in by_title.get(title, []) if x['mimeType'] == mime_type]
+        else:
+            candidates = [
+                x for x in by_title.get(name, [])
+                if x['mimeType'] not in self.EXCLUDED_MIME_TYPES and
+                (x['mimeType'] == self.FOLDER_MIME_TYPE) == is_folder
+            ]
+        return candidates[0] if candidates else None
+
+    def _path_cache_key(self, name: str, is_folder: bool) -> str:
+        """Items are cached under their parent's id.  The variant also includes the id of the root
+        folder of the provider, since the same Drive folder may be reachable from many roots.
+        """
+        return '{}:{}:{}'.format(self.folder['id'], 'folder' if is_folder else 'file', name)
+
+    def _cached_child(self, parent_id: str, cache_key: str) -> Union[dict, None]:
+        if self.PATH_CACHE_TTL <= 0:
+            return None
+        item = path_cache.get(parent_id, cache_key)
+        return None if item is None else dict(item)
+
+    def _cache_child(self, parent_id: str, cache_key: str, item: dict) -> None:
+        """Cache the ``id``, ``title`` and ``mimeType`` of ``item``, the keys a lookup returns."""
+        if self.PATH_CACHE_TTL > 0:
+            path_cache.set(parent_id, cache_key,
+                           {key: item[key] for key in ('id', 'title', 'mimeType')},
+                           self.PATH_CACHE_TTL)
+
+    def _forget_children(self, *folder_ids: str) -> None:
+        """Drop the cached lookups of every child of ``folder_ids``.  Called after each write."""
+        path_cache.delete(*[folder_id for folder_id in folder_ids if folder_id])
+
+    async def _recheck_cached_path(self, path: WaterButlerPath) -> WaterButlerPath:
+        """Make sure a file or folder about to be written to or deleted is still where ``path``
+        says it is.  ``path_cache`` is only cleared by the process that made a change, so a cached
+        id may belong to an item another process has since trashed or moved.  If the id in ``path``
+        came from the cache and the item is no longer in its parent, the parent's entries are
+        dropped and ``path`` is looked up again.
+        """
+        if self.PATH_CACHE_TTL <= 0 or path.is_root or not path.identifier:
+            return path
+
+        cached = self._cached_child(path.parent.identifier,
+                                    self._path_cache_key(path.name, path.is_dir))
+        if cached is None or cached['id'] != path.identifier:
+            return path
+
+        resp = await self.make_request(
+            'GET',
+            self.build_url('files', path.identifier, fields='labels(trashed),parents(id)'),
+            expects=(200, 404, ),
+            throws=exceptions.MetadataError,
+        )
+        item = await resp.json()
+        if (resp.status == 200 and not item['labels']['trashed'] and
+                path.parent.identifier in [parent['id'] for parent in item['parents']]):
+            return path
+
+        self.metrics.incr('recheck_cached_path.stale')
+        self._forget_children(path.parent.identifier)
+        return await self.revalidate_path(path.parent, path.name, folder=path.is_dir)
+
     async def _handle_docs_versioning(self, path: GoogleDrivePath, item: dict, raw: bool=True):
         """Sends an extra request to GDrive to fetch revision information for Google Docs. Needed
         because Google Docs use a different versioning system from regular files.
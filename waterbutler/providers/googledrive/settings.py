@@ -6,3 +6,17 @@ config = settings.child('GOOGLEDRIVE_PROVIDER_CONFIG')
 BASE_URL = config.get('BASE_URL', 'https://www.googleapis.com/drive/v2')
 BASE_UPLOAD_URL = config.get('BASE_UPLOAD_URL', 'https://www.googleapis.com/upload/drive/v2')
 DRIVE_IGNORE_VERSION = config.get('DRIVE_IGNORE_VERSION', '0000000000000000000000000000000000000')
+
+# Token bucket for requests to the Google Drive API, see waterbutler.core.scheduler
+REQUEST_RATE = float(config.get('REQUEST_RATE', settings.REQUEST_RATE))  # requests per second
+REQUEST_BURST = int(config.get('REQUEST_BURST', settings.REQUEST_BURST))
+
+# Seconds to cache metadata for, see waterbutler.core.cache.  0 disables caching.
+METADATA_CACHE_TTL = int(config.get('METADATA_CACHE_TTL', settings.METADATA_CACHE_TTL))
+
+# Seconds to cache path part -> Drive id lookups made by ``_resolve_path_to_ids``.  0 disables the
+# cache.  Entries are dropped when this process writes to their parent folder, but changes made in
+# Drive directly or by another process (e.g. a celery copy or move) will only be picked up once the
+# entry expires.  Uploads and deletes re-check a cached target before writing to it.
+PATH_CACHE_TTL = int(config.get('PATH_CACHE_TTL', 0))
+PATH_CACHE_MAX_ENTRIES = int(config.get('PATH_CACHE_MAX_ENTRIES', 10000))
@@ -49,6 +49,10 @@ class OneDriveProvider(provider.BaseProvider):
 
     """
     NAME = 'onedrive'
+    REQUEST_RATE = settings.REQUEST_RATE
+    REQUEST_BURST = settings.REQUEST_BURST
+    METADATA_CACHE_TTL = settings.METADATA_CACHE_TTL
+    SEGMENTED_DOWNLOADS = True
 
     MAX_REVISIONS = 250
 
@@ -159,14 +163,23 @@ class OneDriveProvider(provider.BaseProvider):
                               path: str,
                               folder: bool=None) -> OneDrivePath:
         """Take a string file/folder name ``path`` and return a OneDrivePath object
-        representing this file under ``base``.
+        representing this file under ``base``.  See ``revalidate_children``.
+        """
+        return (await self.revalidate_children(base, [(path, folder)]))[0]
+
+    async def revalidate_children(self,  # type: ignore
+                                  base: OneDrivePath,
+                                  children: typing.Sequence[typing.Tuple[str, bool]]) \
+            -> typing.List[OneDrivePath]:
+        """Take a list of ``(name, folder)`` tuples and return a OneDrivePath object representing
+        each child under ``base``, from a single listing of ``base``.
 
         We hit the ``/$parent_id/children`` endpoint instead of the
         ``/$parent_id/?expand=children`` endpoint b/c the parent has already been validated and we
         don't need its metadata.
         """
-        logger.debug('revalidate_path base::{} path::{} base.id::{} '
-                     'folder::{}'.format(base, path, base.identifier, folder))
+        logger.debug('revalidate_children base::{} base.id::{} '
+                     'children::{}'.format(base, base.identifier, children))
 
         assert isinstance(base, OneDrivePath), 'Base path should be validated'
         assert base.identifier, 'Base path should be validated'
@@ -178,21 +191,23 @@ class OneDriveProvider(provider.BaseProvider):
         )
 
         # Prior request is for the contents of the folder `base`.  We now need to search to see if
-        # we can find `path` within the contents of `base`.  `revalidate_path` supports both extant
-        # and non-extant paths.  If either `base` or `path` does not exist, then return a putative
-        # path with the appropriate path parts but without the not-yet-created identifiers.
-        path_id = None
-        is_folder = folder
+        # we can find each child within the contents of `base`.  `revalidate_path` supports both
+        # extant and non-extant paths.  If either `base` or a child does not exist, then return a
+        # putative path with the appropriate path parts but without the not-yet-created identifiers.
+        listing = {}  # type: dict
         if resp.status != HTTPStatus.NOT_FOUND:
             data = await resp.json()
             for child in data['value']:
-                child_is_folder = 'folder' in child
-                if (child['name'] == path) and (folder == child_is_folder):
-                    path_id = child['id']
-                    is_folder = child_is_folder
-                    break
+                listing.setdefault((child['name'], 'folder' in child), child)
+        else:
+            await resp.release()
 
-        return base.child(path, _id=path_id, folder=is_folder)
+        paths = []
+        for path, folder in children:
+            child = listing.get((path, folder))
+            path_id = child['id'] if child is not None else None
+            paths.append(base.child(path, _id=path_id, folder=folder))
+        return paths
 
     async def metadata(self, path: OneDrivePath, **kwargs):  # type: ignore
         """Fetch metadata for the file or folder identified by ``path``.
@@ -12,3 +12,10 @@ ONEDRIVE_CHUNKED_UPLOAD_CHUNK_SIZE = int(config.get('ONEDRIVE_CHUNKED_UPLOAD_CHU
 # 4mb
 ONEDRIVE_CHUNKED_UPLOAD_FILE_SIZE = int(config.get('ONEDRIVE_CHUNKED_UPLOAD_FILE_SIZE',
                                                    1024 * 1024 * 4))
+
+# Token bucket for requests to the OneDrive API, see waterbutler.core.scheduler
+REQUEST_RATE = float(config.get('REQUEST_RATE', settings.REQUEST_RATE))  # requests per second
+REQUEST_BURST = int(config.get('REQUEST_BURST', settings.REQUEST_BURST))
+
+# Seconds to cache metadata for, see waterbutler.core.cache.  0 disables caching.
+METADATA_CACHE_TTL = int(config.get('METADATA_CACHE_TTL', settings.METADATA_CACHE_TTL))
@@ -40,6 +40,9 @@ class OSFStorageProvider(provider.BaseProvider):
     __version__ = '0.0.1'
 
     NAME = 'osfstorage'
+    REQUEST_RATE = settings.REQUEST_RATE
+    REQUEST_BURST = settings.REQUEST_BURST
+    METADATA_CACHE_TTL = settings.METADATA_CACHE_TTL
 
     def __init__(self, auth, credentials, settings, **kwargs):
         super().__init__(auth, credentials, settings, **kwargs)
@@ -112,19 +115,24 @@ class OSFStorageProvider(provider.BaseProvider):
         return WaterButlerPath('/'.join(names), _ids=ids, folder=is_folder)
 
     async def revalidate_path(self, base, path, folder=False):
+        return (await self.revalidate_children(base, [(path, folder)]))[0]
+
+    async def revalidate_children(self, base, children):
+        """Look up the ids of all of ``children`` from a single listing of ``base``."""
         assert base.is_dir
 
-        try:
-            data = next(
-                x for x in
-                await self.metadata(base)
-                if x.name == path and
-                x.kind == ('folder' if folder else 'file')
-            )
+        listing = {}  # type: dict
+        for item in await self.metadata(base):
+            listing.setdefault((item.name, item.kind), item)
 
-            return base.child(data.name, _id=data.path.strip('/'), folder=folder)
-        except StopIteration:
-            return base.child(path, folder=folder)
+        paths = []
+        for name, folder in children:
+            data = listing.get((name, 'folder' if folder else 'file'))
+            if data is None:
+                paths.append(base.child(name, folder=folder))
+            else:
+                paths.append(base.child(data.name, _id=data.path.strip('/'), folder=folder))
+        return paths
 
     def make_provider(self, settings):
         """Requests on different files may need to use different providers,
@@ -409,7 +417,9 @@ class OSFStorageProvider(provider.BaseProvider):
             return await self.intra_move(*args)
 
         if src_path.is_dir:
-            meta_data, created = await self._folder_file_op(self.move, *args, **kwargs)  # type: ignore
+            meta_data, created = await self._folder_file_op(self.move, *args,  # type: ignore
+                                                            can_intra=self.can_intra_move,
+                                                            **kwargs)
             await self.delete(src_path)
         else:
             # Check whether the destination project is over its quota.  If so, reject the request.
@@ -490,7 +500,9 @@ class OSFStorageProvider(provider.BaseProvider):
             return await self.intra_copy(*args)
 
         if src_path.is_dir:
-            meta_data, created = await self._folder_file_op(self.copy, *args, **kwargs)  # type: ignore
+            meta_data, created = await self._folder_file_op(self.copy, *args,  # type: ignore
+                                                            can_intra=self.can_intra_copy,
+                                                            **kwargs)
         else:
             # Check whether the destination project is over its quota.  If so, reject the request.
             # This path only occurs when both source and dest are osfstorage but are located in
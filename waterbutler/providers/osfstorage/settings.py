@@ -19,3 +19,10 @@ QUOTA_RETRIES = int(config.get('QUOTA_RETRIES', 2))
 # base time in seconds to wait between each quota request.  This is multiplied by the current
 # number of retries attempted.
 QUOTA_RETRIES_DELAY = int(config.get('QUOTA_RETRIES_DELAY', 1))
+
+# Token bucket for requests to the OSF API, see waterbutler.core.scheduler
+REQUEST_RATE = float(config.get('REQUEST_RATE', settings.REQUEST_RATE))  # requests per second
+REQUEST_BURST = int(config.get('REQUEST_BURST', settings.REQUEST_BURST))
+
+# Seconds to cache metadata for, see waterbutler.core.cache.  0 disables caching.
+METADATA_CACHE_TTL = int(config.get('METADATA_CACHE_TTL', settings.METADATA_CACHE_TTL))
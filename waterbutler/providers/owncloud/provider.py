@@ -239,6 +239,34 @@ class OwnCloudProvider(provider.BaseProvider):
         await response.release()
         return items
 
+    async def folder_tree(self, path, **kwargs):
+        """List everything under ``path`` with a single ``Depth: infinity`` PROPFIND.  Servers may
+        refuse infinite depth, in which case `None` is returned and folders are listed one by one.
+        """
+        try:
+            response = await self.make_request('PROPFIND',
+                self._webdav_url_ + path.full_path,
+                expects=(207, ),
+                throws=exceptions.MetadataError,
+                auth=self._auth,
+                headers={'Depth': 'infinity'},
+                connector=self.connector(),
+            )
+        except exceptions.MetadataError:
+            return None
+
+        content = await response.content.read()
+        await response.release()
+        items = await utils.parse_dav_response(content, self.folder)
+        if not items:
+            return None
+
+        # The queried folder comes first, and every other path is under its own
+        root = items[0].path
+        return self._nest_folder_tree(
+            (item.path[len(root):], item) for item in items[1:] if item.path.startswith(root)
+        )
+
     async def create_folder(self, path, **kwargs):
         """Create a folder in the current provider at ``path``. Returns an
         `.metadata.OwnCloudFolderMetadata` object if successful.
@@ -1,8 +1,10 @@
 import os
+import asyncio
 import hashlib
 import logging
 import functools
 from urllib import parse
+from http import HTTPStatus
 
 import xmltodict
 import xml.sax.saxutils
@@ -13,9 +15,10 @@ from boto import config as boto_config
 from boto.s3.connection import S3Connection, OrdinaryCallingFormat
 
 from waterbutler.providers.s3 import settings
+from waterbutler.core.cache import LRUCache
 from waterbutler.core.path import WaterButlerPath
 from waterbutler.core.utils import make_disposition
-from waterbutler.core import streams, provider, exceptions
+from waterbutler.core import buffers, streams, provider, exceptions
 from waterbutler.providers.s3.metadata import (S3Revision,
                                                S3FileMetadata,
                                                S3FolderMetadata,
@@ -25,6 +28,13 @@ from waterbutler.providers.s3.metadata import (S3Revision,
 
 logger = logging.getLogger(__name__)
 
+# Bucket name -> region, shared by every S3Provider in the process.  See ``S3Provider._check_region``
+region_cache = LRUCache(settings.REGION_CACHE_MAX_ENTRIES)
+
+# Error codes S3 returns when a request was sent to the wrong regional endpoint
+REGION_ERROR_CODES = ('PermanentRedirect', 'TemporaryRedirect', 'AuthorizationHeaderMalformed',
+                      'IllegalLocationConstraintException')
+
 
 class S3Provider(provider.BaseProvider):
     """Provider for Amazon's S3 cloud storage service.
@@ -45,6 +55,11 @@ class S3Provider(provider.BaseProvider):
     NAME = 's3'
     CHUNK_SIZE = settings.CHUNK_SIZE
     CONTIGUOUS_UPLOAD_SIZE_LIMIT = settings.CONTIGUOUS_UPLOAD_SIZE_LIMIT
+    CHUNKED_UPLOAD_CONCURRENCY = settings.CHUNKED_UPLOAD_CONCURRENCY
+    REQUEST_RATE = settings.REQUEST_RATE
+    REQUEST_BURST = settings.REQUEST_BURST
+    METADATA_CACHE_TTL = settings.METADATA_CACHE_TTL
+    SEGMENTED_DOWNLOADS = True
 
     def __init__(self, auth, credentials, settings, **kwargs):
         """
@@ -66,6 +81,16 @@ class S3Provider(provider.BaseProvider):
         self.encrypt_uploads = self.settings.get('encrypt_uploads', False)
         self.region = None
 
+    async def make_request(self, method, url, *args, **kwargs):
+        """Drop the cached region of the bucket if S3 says the request went to the wrong region."""
+        try:
+            return await super().make_request(method, url, *args, **kwargs)
+        except exceptions.ProviderError as exc:
+            if exc.code in (HTTPStatus.MOVED_PERMANENTLY, HTTPStatus.TEMPORARY_REDIRECT) or \
+                    any(code in str(exc.message) for code in REGION_ERROR_CODES):
+                region_cache.delete(self.bucket.name)
+            raise
+
     async def validate_v1_path(self, path, **kwargs):
         await self._check_region()
 
@@ -244,7 +269,7 @@ class S3Provider(provider.BaseProvider):
         session_upload_id = await self._create_upload_session(path)
 
         try:
-            # Step 2. Break stream into chunks and upload them one by one
+            # Step 2. Break stream into chunks and upload them concurrently
             parts_metadata = await self._upload_parts(stream, path, session_upload_id)
             # Step 3. Commit the parts and end the upload session
             await self._complete_multipart_upload(path, session_upload_id, parts_metadata)
@@ -293,28 +318,64 @@ class S3Provider(provider.BaseProvider):
         return session_data['InitiateMultipartUploadResult']['UploadId']
 
     async def _upload_parts(self, stream, path, session_upload_id):
-        """Uploads all parts/chunks of the given stream to S3 one by one.
+        """Uploads all parts/chunks of the given stream to S3.  Parts are read from the stream in
+        order and sent concurrently, ``CHUNKED_UPLOAD_CONCURRENCY`` at a time, with at most one
+        more read ahead of those.  Parts are held in memory shared by all chunked uploads in the
+        process, or written to a tempfile once it runs out (see `waterbutler.core.buffers`).
+
+        :rtype: `list`
+        :return: the response headers of each part, in part order
         """
 
-        metadata = []
         parts = [self.CHUNK_SIZE for i in range(0, stream.size // self.CHUNK_SIZE)]
         if stream.size % self.CHUNK_SIZE:
             parts.append(stream.size - (len(parts) * self.CHUNK_SIZE))
         logger.debug('Multipart upload segment sizes: {}'.format(parts))
-        for chunk_number, chunk_size in enumerate(parts):
-            logger.debug('  uploading part {} with size {}'.format(chunk_number + 1, chunk_size))
-            metadata.append(await self._upload_part(stream, path, session_upload_id,
-                                                    chunk_number + 1, chunk_size))
-        return metadata
-
-    async def _upload_part(self, stream, path, session_upload_id, chunk_number, chunk_size):
-        """Uploads a single part/chunk of the given stream to S3.
 
+        buffered = asyncio.Semaphore(self.CHUNKED_UPLOAD_CONCURRENCY + 1)
+        senders = asyncio.Semaphore(self.CHUNKED_UPLOAD_CONCURRENCY)
+        failures = []  # type: list
+
+        async def send(part, chunk_number):
+            try:
+                async with senders:
+                    logger.debug('  uploading part {} with size {}'.format(chunk_number, part.size))
+                    return await self._upload_part(part.data, path, session_upload_id,
+                                                   chunk_number, part.size)
+            except Exception as exc:
+                failures.append(exc)
+                raise
+            finally:
+                part.close()
+                buffered.release()
+
+        tasks = []
+        try:
+            for chunk_number, chunk_size in enumerate(parts, 1):
+                await buffered.acquire()
+                try:
+                    if failures:
+                        raise failures[0]
+                    part = await buffers.read_part(stream, chunk_size)
+                except BaseException:
+                    buffered.release()
+                    raise
+                tasks.append(asyncio.ensure_future(send(part, chunk_number)))
+            return await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _upload_part(self, data, path, session_upload_id, chunk_number, chunk_size):
+        """Uploads a single part/chunk of the upload to S3.  The part is retried up to
+        ``CHUNKED_UPLOAD_MAX_PART_RETRIES`` times before the upload is given up on.
+
+        :param data: the contents of the part, as bytes or a file
         :param int chunk_number: sequence number of chunk. 1-indexed.
+        :param int chunk_size: the size of the part
         """
 
-        cutoff_stream = streams.CutoffStream(stream, cutoff=chunk_size)
-
         headers = {'Content-Length': str(chunk_size)}
         params = {
             'partNumber': str(chunk_number),
@@ -327,18 +388,26 @@ class S3Provider(provider.BaseProvider):
             query_parameters=params,
             headers=headers
         )
-        resp = await self.make_request(
-            'PUT',
-            upload_url,
-            data=cutoff_stream,
-            skip_auto_headers={'CONTENT-TYPE'},
-            headers=headers,
-            params=params,
-            expects=(200, 201, ),
-            throws=exceptions.UploadError,
+
+        async def send(data):
+            resp = await self.make_request(
+                'PUT',
+                upload_url,
+                data=data,
+                skip_auto_headers={'CONTENT-TYPE'},
+                headers=headers,
+                params=params,
+                retry=0,
+                expects=(200, 201, ),
+                throws=exceptions.UploadError,
+            )
+            await resp.release()
+            return resp.headers
+
+        return await buffers.send_part(
+            send, data, settings.CHUNKED_UPLOAD_MAX_PART_RETRIES, metrics=self.provider_metrics,
+            description='part {} of upload {}'.format(chunk_number, session_upload_id),
         )
-        await resp.release()
-        return resp.headers
 
     async def _abort_chunked_upload(self, path, session_upload_id):
         """This operation aborts a multipart upload. After a multipart upload is aborted, no
@@ -648,6 +717,60 @@ class S3Provider(provider.BaseProvider):
 
         return metadata
 
+    async def folder_tree(self, path, **kwargs):
+        """List every key under ``path`` by its prefix alone, without a delimiter, a thousand keys
+        per request.  Folders that only exist as the prefix of their children are filled in.
+        """
+        await self._check_region()
+
+        entries, folders = [], set()
+        query_params = {'prefix': path.path}
+        more_to_come = True
+
+        while more_to_come:
+            resp = await self.make_request(
+                'GET',
+                self.bucket.generate_url(settings.TEMP_URL_SECS, 'GET', query_parameters=query_params),
+                params=query_params,
+                expects=(200, ),
+                throws=exceptions.MetadataError,
+            )
+
+            contents = await resp.read()
+            parsed = xmltodict.parse(contents, strip_whitespace=False)['ListBucketResult']
+            more_to_come = parsed.get('IsTruncated') == 'true'
+            contents = parsed.get('Contents', [])
+
+            if isinstance(contents, dict):
+                contents = [contents]
+
+            for content in contents:
+                relative = content['Key'][len(path.path):]
+                content['base_folder'] = self.base_folder
+                if relative.endswith('/'):
+                    folders.add(relative)
+                    entries.append((relative, S3FolderKeyMetadata(content)))
+                else:
+                    entries.append((relative, S3FileMetadata(content)))
+
+            if contents:
+                query_params['marker'] = contents[-1]['Key']
+            else:
+                more_to_come = False
+
+        for relative, _ in list(entries):
+            parts = relative.rstrip('/').split('/')[:-1]
+            for i in range(1, len(parts) + 1):
+                prefix = '/'.join(parts[:i]) + '/'
+                if prefix not in folders:
+                    folders.add(prefix)
+                    entries.append((prefix, S3FolderMetadata({
+                        'Prefix': path.path + prefix,
+                        'base_folder': self.base_folder,
+                    })))
+
+        return self._nest_folder_tree(entries)
+
     async def create_folder(self, path, folder_precheck=True, **kwargs):
         """
         :param str path: The path to create a folder at
@@ -755,19 +878,32 @@ class S3Provider(provider.BaseProvider):
         parameter 'eu-west-1'.  All other regions return the host parameter as the region name.
 
         Region Naming: http://docs.aws.amazon.com/general/latest/gr/rande.html#s3_region
+
+        Regions are cached in ``region_cache`` for ``REGION_CACHE_TTL`` seconds, so the lookup is
+        only made by the first provider to touch a bucket.
         """
         if self.region is None:
-            self.region = await self._get_bucket_region()
-            if self.region == 'EU':
-                self.region = 'eu-west-1'
+            region = region_cache.get(self.bucket.name, '')
+            self.metrics.add('region_cached', region is not None)
+            if region is None:
+                region = await self._get_bucket_region()
+                if region == 'EU':
+                    region = 'eu-west-1'
+                if settings.REGION_CACHE_TTL > 0:
+                    region_cache.set(self.bucket.name, '', region, settings.REGION_CACHE_TTL)
 
-            if self.region != '':
-                self.connection.host = self.connection.host.replace('s3.', 's3-' + self.region + '.', 1)
-                self.connection._auth_handler = get_auth_handler(
-                    self.connection.host, boto_config, self.connection.provider, self.connection._required_auth_capability())
+            self._set_region(region)
 
         self.metrics.add('region', self.region)
 
+    def _set_region(self, region):
+        """Point the connection at the endpoint for ``region``.  Must only be called once."""
+        self.region = region
+        if self.region != '':
+            self.connection.host = self.connection.host.replace('s3.', 's3-' + self.region + '.', 1)
+            self.connection._auth_handler = get_auth_handler(
+                self.connection.host, boto_config, self.connection.provider, self.connection._required_auth_capability())
+
     async def _get_bucket_region(self):
         """Bucket names are unique across all regions.
 
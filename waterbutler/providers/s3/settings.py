@@ -9,4 +9,25 @@ CONTIGUOUS_UPLOAD_SIZE_LIMIT = int(config.get('CONTIGUOUS_UPLOAD_SIZE_LIMIT', 12
 
 CHUNK_SIZE = int(config.get('CHUNK_SIZE', 64000000))  # 64 MB
 
+# Multipart uploads read parts ahead of sending them.  Up to CHUNKED_UPLOAD_CONCURRENCY parts of one
+# upload are sent at once, and each upload reads at most one part ahead of those.  Parts are held
+# in memory shared by every chunked upload in the process, see UPLOAD_PART_BUFFER_POOL_SIZE in
+# waterbutler.settings, or in a tempfile once that is used up.
+CHUNKED_UPLOAD_CONCURRENCY = int(config.get('CHUNKED_UPLOAD_CONCURRENCY', 4))
+
+# Times to retry a part that failed to upload before giving up on the whole upload
+CHUNKED_UPLOAD_MAX_PART_RETRIES = int(config.get('CHUNKED_UPLOAD_MAX_PART_RETRIES', 3))
+
 CHUNKED_UPLOAD_MAX_ABORT_RETRIES = int(config.get('CHUNKED_UPLOAD_MAX_ABORT_RETRIES', 2))
+
+# Token bucket for requests to the S3 API, see waterbutler.core.scheduler
+REQUEST_RATE = float(config.get('REQUEST_RATE', settings.REQUEST_RATE))  # requests per second
+REQUEST_BURST = int(config.get('REQUEST_BURST', settings.REQUEST_BURST))
+
+# Seconds to cache metadata for, see waterbutler.core.cache.  0 disables caching.
+METADATA_CACHE_TTL = int(config.get('METADATA_CACHE_TTL', settings.METADATA_CACHE_TTL))
+
+# Seconds to cache bucket regions for.  Regions are shared by every S3Provider in the process and
+# are dropped early if S3 tells us a bucket has moved.  0 disables the cache.
+REGION_CACHE_TTL = int(config.get('REGION_CACHE_TTL', 24 * 60 * 60))
+REGION_CACHE_MAX_ENTRIES = int(config.get('REGION_CACHE_MAX_ENTRIES', 10000))
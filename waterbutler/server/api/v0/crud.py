@@ -1,5 +1,4 @@
 import os
-import socket
 import asyncio
 from http import HTTPStatus
 
@@ -9,9 +8,10 @@ import tornado.platform.asyncio
 
 from waterbutler.core import mime_types
 from waterbutler.server import utils
+from waterbutler.server import settings
 from waterbutler.server.api.v0 import core
 from waterbutler.core.utils import make_disposition
-from waterbutler.core.streams import RequestStreamReader
+from waterbutler.core.streams import BytePipe, RequestStreamReader
 
 TRUTH_MAP = {
     'true': True,
@@ -36,24 +36,30 @@ class CRUDHandler(core.BaseProviderHandler):
 
     async def prepare_stream(self):
         if self.request.method in self.STREAM_METHODS:
-            self.rsock, self.wsock = socket.socketpair()
-
-            self.reader, _ = await asyncio.open_unix_connection(sock=self.rsock)
-            _, self.writer = await asyncio.open_unix_connection(sock=self.wsock)
-
-            self.stream = RequestStreamReader(self.request, self.reader)
+            self.pipe = BytePipe(settings.UPLOAD_PIPE_HIGH_WATER_MARK)
+            self.stream = RequestStreamReader(self.request, self.pipe)
 
             self.uploader = asyncio.ensure_future(self.provider.upload(self.stream,
                                                  **self.arguments))
+            self.uploader.add_done_callback(self._upload_done)
         else:
             self.stream = None
 
+    def _upload_done(self, uploader):
+        self.pipe.close_reader()
+        if not uploader.cancelled():
+            uploader.exception()
+
+    def on_connection_close(self):
+        super().on_connection_close()
+        if getattr(self, 'stream', None) is not None:
+            self.pipe.abort(ConnectionAbortedError('The client closed the connection'))
+
     async def data_received(self, chunk):
         """Note: Only called during uploads."""
         self.bytes_uploaded += len(chunk)
         if self.stream:
-            self.writer.write(chunk)
-            await self.writer.drain()
+            await self.pipe.write(chunk)
 
     async def get(self):
         """Download a file."""
@@ -111,7 +117,7 @@ class CRUDHandler(core.BaseProviderHandler):
 
     async def put(self):
         """Upload a file."""
-        self.writer.write_eof()
+        self.pipe.write_eof()
 
         metadata, created = await self.uploader
 
@@ -119,9 +125,6 @@ class CRUDHandler(core.BaseProviderHandler):
             self.set_status(201)
         self.write(metadata.serialized())
 
-        self.writer.close()
-        self.wsock.close()
-
         self._send_hook(
             'create' if created else 'update',
             metadata,
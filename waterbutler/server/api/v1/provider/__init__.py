@@ -1,5 +1,4 @@
 import uuid
-import socket
 import asyncio
 import logging
 from http import HTTPStatus
@@ -15,7 +14,7 @@ from waterbutler.core import remote_logging
 from waterbutler.server.auth import AuthHandler
 from waterbutler.core.log_payload import LogPayload
 from waterbutler.core.exceptions import TooManyRequests
-from waterbutler.core.streams import RequestStreamReader
+from waterbutler.core.streams import BytePipe, RequestStreamReader
 from waterbutler.server.settings import ENABLE_RATE_LIMITING
 from waterbutler.server.api.v1.provider.create import CreateMixin
 from waterbutler.server.api.v1.provider.metadata import MetadataMixin
@@ -143,22 +142,33 @@ class ProviderHandler(core.BaseHandler, CreateMixin, MetadataMixin, MoveCopyMixi
         """Note: Only called during uploads."""
         self.bytes_uploaded += len(chunk)
         if self.stream:
-            self.writer.write(chunk)
-            await self.writer.drain()
+            await self.pipe.write(chunk)
         else:
             self.body += chunk
 
     async def prepare_stream(self):
-        """Sets up an asyncio pipe from client to server
+        """Sets up an in-memory pipe from client to provider
         Only called on PUT when path is to a file
         """
-        self.rsock, self.wsock = socket.socketpair()
-
-        self.reader, _ = await asyncio.open_unix_connection(sock=self.rsock)
-        _, self.writer = await asyncio.open_unix_connection(sock=self.wsock)
-
-        self.stream = RequestStreamReader(self.request, self.reader)
+        self.pipe = BytePipe(settings.UPLOAD_PIPE_HIGH_WATER_MARK)
+        self.stream = RequestStreamReader(self.request, self.pipe)
         self.uploader = asyncio.ensure_future(self.provider.upload(self.stream, self.target_path))
+        self.uploader.add_done_callback(self._upload_done)
+
+    def _upload_done(self, uploader):
+        # If the upload failed early, the rest of the body is read and dropped so that the error
+        # can be returned once it has arrived.
+        self.pipe.close_reader()
+        if not uploader.cancelled():
+            uploader.exception()  # put() never runs to retrieve it if the client went away
+
+    def on_connection_close(self):
+        """If the client goes away mid-upload, fail the provider's reads of the rest of the body
+        instead of leaving it waiting forever.
+        """
+        super().on_connection_close()
+        if getattr(self, 'stream', None) is not None:
+            self.pipe.abort(ConnectionAbortedError('The client closed the connection'))
 
     def on_finish(self):
         status, method = self.get_status(), self.request.method.upper()
@@ -7,6 +7,7 @@ import pytz
 from dateutil.parser import parse as datetime_parser
 
 from waterbutler.server import utils
+from waterbutler.core import exceptions
 from waterbutler.core import mime_types
 from waterbutler.core.utils import make_disposition
 from waterbutler.core.streams import ResponseStreamReader
@@ -126,11 +127,66 @@ class MetadataMixin:
 
         return self.write({'data': [r.json_api_serialized() for r in result]})
 
+    @property
+    def requested_zip_level(self):
+        """The zlib level given by the ``zip_level`` query parameter, from -1 to 9, or `None`."""
+        zip_level = self.get_query_argument('zip_level', default=None)
+        if zip_level is None:
+            return None
+        try:
+            level = int(zip_level)
+        except ValueError:
+            level = None
+        if level is None or not -1 <= level <= 9:
+            raise exceptions.InvalidParameters('"zip_level" must be an integer from -1 to 9')
+        return level
+
     async def download_folder_as_zip(self):
         zipfile_name = self.path.name or '{}-archive'.format(self.provider.NAME)
         self.set_header('Content-Type', 'application/zip')
         self.set_header('Content-Disposition', make_disposition(zipfile_name + '.zip'))
 
-        result = await self.provider.zip(self.path)
+        compression_level = self.requested_zip_level
+        if compression_level == 0:
+            archive = await self.provider.stored_zip(self.path)
+            if archive is not None:
+                return (await self.write_stored_zip(archive))
+
+        result = await self.provider.zip(self.path, compression_level=compression_level)
 
         await self.write_stream(result)
+
+    async def write_stored_zip(self, archive):
+        """Send a store-only archive, whose length is known up front, so it can be sent with a
+        ``Content-Length`` and downloaded in ranges.  A ``Range`` header is ignored if the request
+        has an ``If-Range`` header other than the archive's etag.
+
+        Ranges are cheap once the CRCs of the archive's files are cached, which they are after the
+        archive has been downloaded.  Until then, a range covering a file's data descriptor reads
+        that whole file, and a range covering any of the central directory reads every file in the
+        archive, without sending them.
+        """
+        etag = '"{}"'.format(archive.etag)
+        self.set_header('Accept-Ranges', 'bytes')
+        self.set_header('Etag', etag)
+
+        request_range = None
+        if 'Range' in self.request.headers and self.request.headers.get('If-Range', etag) == etag:
+            request_range = utils.parse_request_range(self.request.headers['Range'])
+            logger.debug('Range header parsed as: {}'.format(request_range))
+
+        start, end = 0, archive.size - 1
+        if request_range is not None:
+            if request_range[0] >= archive.size:
+                self.set_status(416)
+                self.set_header('Content-Range', 'bytes */{}'.format(archive.size))
+                return
+            start = request_range[0]
+            if request_range[1] is not None:
+                end = min(request_range[1], end)
+            self.set_status(206)
+            self.set_header('Content-Range', 'bytes {}-{}/{}'.format(start, end, archive.size))
+
+        stream = archive.stream(start, end)
+        self.set_header('Content-Length', str(stream.size))
+        await self.write_stream(stream)
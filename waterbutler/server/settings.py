@@ -18,6 +18,24 @@ XHEADERS = config.get_bool('XHEADERS', False)
 CORS_ALLOW_ORIGIN = config.get('CORS_ALLOW_ORIGIN', '*')
 
 CHUNK_SIZE = int(config.get('CHUNK_SIZE', 65536))  # 64KB
+# Downloads are read CHUNK_SIZE bytes at a time and written to the client in blocks of up to
+# WRITE_COALESCE_SIZE bytes.  Reading only stops to wait for the client once more than
+# WRITE_HIGH_WATER_MARK bytes are queued to be sent.
+WRITE_COALESCE_SIZE = int(config.get('WRITE_COALESCE_SIZE', 256 * 1024))  # 256KB
+WRITE_HIGH_WATER_MARK = int(config.get('WRITE_HIGH_WATER_MARK', 1024 * 1024))  # 1MB
+
+# Downloads are read up to READ_AHEAD_SIZE bytes ahead of what has been sent to the client, so
+# that waiting on the upstream provider overlaps with waiting on the client.  0 disables this.
+READ_AHEAD_SIZE = int(config.get('READ_AHEAD_SIZE', 1024 * 1024))  # 1MB
+
+# Downloads of local files (see UtilMixin.write_stream) are copied to the socket with sendfile,
+# SENDFILE_CHUNK_SIZE bytes per call.  0 sends them through the stream, CHUNK_SIZE bytes at a time.
+SENDFILE_CHUNK_SIZE = int(config.get('SENDFILE_CHUNK_SIZE', 1024 * 1024))  # 1MB
+# Seconds a local file download waits for the client to accept more data before giving up
+SENDFILE_TIMEOUT = int(config.get('SENDFILE_TIMEOUT', 60))
+# Bytes of an upload's request body that may be waiting for the provider to read them before
+# Tornado stops reading from the client
+UPLOAD_PIPE_HIGH_WATER_MARK = int(config.get('UPLOAD_PIPE_HIGH_WATER_MARK', 1024 * 1024))  # 1MB
 MAX_BODY_SIZE = int(config.get('MAX_BODY_SIZE', int(4.9 * (1024 ** 3))))  # 4.9 GB
 
 AUTH_HANDLERS = config.get('AUTH_HANDLERS', [
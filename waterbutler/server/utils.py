@@ -1,6 +1,11 @@
+import os
+import asyncio
+import selectors
+
 import tornado.iostream
 
 from waterbutler.server import settings
+from waterbutler.core.streams import ReadAheadStream
 
 CORS_ACCEPT_HEADERS = [
     'Range',
@@ -122,19 +127,147 @@ class UtilMixin:
         return super().set_status(code, reason or HTTP_REASONS.get(code))
 
     async def write_stream(self, stream):
+        """Write the contents of ``stream`` to the client.  Chunks read from the stream are joined
+        into blocks of up to ``WRITE_COALESCE_SIZE`` bytes and handed to the connection without
+        being converted to `bytes` first.  Only once more than ``WRITE_HIGH_WATER_MARK`` bytes have
+        been queued without the connection catching up does this wait for the client.
+
+        Unless ``READ_AHEAD_SIZE`` is 0, the stream is read in the background up to that many bytes
+        ahead of what has been written, see `ReadAheadStream`.
+        """
         try:
-            while True:
-                chunk = await stream.read(settings.CHUNK_SIZE)
-                if not chunk:
-                    break
-                # Temp fix, write does not accept bytearrays currently
-                if isinstance(chunk, bytearray):
-                    chunk = bytes(chunk)
-                self.write(chunk)
-                self.bytes_downloaded += len(chunk)
-                del chunk
-                await self.flush()
+            if await self._write_local_file(stream):
+                return
+            if settings.READ_AHEAD_SIZE > 0:
+                stream = ReadAheadStream(stream, settings.READ_AHEAD_SIZE)
+            await self._write_blocks(stream)
         except tornado.iostream.StreamClosedError:
             # Client has disconnected early.
             # No need for any exception to be raised
             return
+        finally:
+            if isinstance(stream, ReadAheadStream):
+                stream.close()
+
+    async def _write_blocks(self, stream):
+        blocks, size, queued = [], 0, None
+        while True:
+            chunk = await stream.read(settings.CHUNK_SIZE)
+            if chunk:
+                blocks.append(chunk)
+                size += len(chunk)
+                if size < settings.WRITE_COALESCE_SIZE:
+                    continue
+            elif not blocks:
+                break
+
+            if queued is None:
+                # Headers are only sent once the first block has been read, so a failed first
+                # read can still be reported with an error status
+                await self.flush()
+                queued = 0
+            block = blocks[0] if len(blocks) == 1 else b''.join(blocks)
+            queued = await self._write_block(block, queued)
+            blocks, size = [], 0
+
+    async def _write_block(self, block, queued):
+        """Queue ``block`` on the connection.  ``queued`` is the number of bytes written since the
+        connection was last seen with nothing left to send.  If that passes the high-water mark,
+        wait until everything has been sent.
+
+        :rtype: `int`
+        :return: the new value of ``queued``
+        """
+        connection = self.request.connection
+        future = connection.write(block)
+        self.bytes_downloaded += len(block)
+
+        iostream = getattr(connection, 'stream', None)
+        if iostream is None:
+            await future
+            return 0
+        if not iostream.writing():
+            return 0  # it all went straight to the socket
+
+        queued += len(block)
+        if queued <= settings.WRITE_HIGH_WATER_MARK:
+            return queued
+        while iostream.writing():
+            # resolves each time one of the queued writes is done
+            await self.flush()
+        return 0
+
+    async def _write_local_file(self, stream):
+        """Send a stream backed by a local file without reading it into Python.  The file (or the
+        requested range of it) is copied to the socket with ``os.sendfile`` in a worker thread, so
+        neither the copy nor reading the file from disk holds up the event loop.
+
+        This is only done for plain HTTP/1 connections whose response has a Content-Length, as the
+        bytes go around Tornado: TLS and chunked responses are sent through the stream instead.
+        If the file is truncated while it is being sent, the connection is closed early.
+
+        :rtype: `bool`
+        :return: ``False`` if ``stream`` isn't backed by a local file and must be read instead
+        """
+        local_range = getattr(stream, 'local_range', None)
+        if local_range is None or settings.SENDFILE_CHUNK_SIZE <= 0 or not hasattr(os, 'sendfile'):
+            return False
+
+        connection = self.request.connection
+        iostream = getattr(connection, 'stream', None)
+        if (
+            type(iostream) is not tornado.iostream.IOStream or
+            'Content-Length' not in self._headers or
+            not hasattr(connection, '_expected_content_remaining')
+        ):
+            return False
+
+        source = local_range()
+        if source is None or source[2] == 0:
+            return False
+
+        fd, offset, length = source
+        await self.flush()  # headers, once they are sent nothing else is queued on the socket
+        try:
+            sent = await asyncio.get_event_loop().run_in_executor(
+                None, _sendfile, iostream.socket.fileno(), fd, offset, length,
+            )
+        except OSError:
+            sent = None
+        if sent is not None:
+            self.bytes_downloaded += sent
+            # Tell the connection the body was written, or it will refuse to finish the response
+            connection._expected_content_remaining -= sent
+        if sent != length:
+            # The client went away, or the file got shorter.  Either way the response can't be
+            # completed, and closing the connection is the only way to tell the client so.
+            iostream.close()
+            raise tornado.iostream.StreamClosedError()
+        return True
+
+
+def _sendfile(out_fd, in_fd, offset, count):
+    """Copy ``count`` bytes of ``in_fd`` from ``offset`` on to the non-blocking socket ``out_fd``,
+    waiting up to ``SENDFILE_TIMEOUT`` seconds at a time for the client to accept more.  Runs in a
+    worker thread.
+
+    :rtype: `int`
+    :return: the number of bytes sent, less than ``count`` if the file ended first
+    """
+    sent = 0
+    with selectors.DefaultSelector() as selector:
+        selector.register(out_fd, selectors.EVENT_WRITE)
+        while sent < count:
+            try:
+                n = os.sendfile(out_fd, in_fd, offset + sent,
+                                min(count - sent, settings.SENDFILE_CHUNK_SIZE))
+            except BlockingIOError:
+                if not selector.select(settings.SENDFILE_TIMEOUT):
+                    raise TimeoutError('Client did not accept data for {} seconds'.format(
+                        settings.SENDFILE_TIMEOUT
+                    ))
+                continue
+            if n == 0:
+                break  # end of file
+            sent += n
+    return sent
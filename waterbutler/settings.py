@@ -184,3 +184,44 @@ KEEN_PUBLIC_LOG_ACTIONS = keen_public_config.get_bool('LOG_ACTIONS', True)
 WEBDAV_METHODS = {'PROPFIND', 'MKCOL', 'MOVE', 'COPY'}
 
 AIOHTTP_TIMEOUT = int(config.get('AIOHTTP_TIMEOUT', 3600))  # time in seconds
+
+# Process-wide pool of upstream HTTP connections, see waterbutler.core.connections.  The per-host
+# limit is shared by every user and request in the process, and streamed transfers hold their
+# connection until they finish, so it defaults to 0 (no limit).
+HTTP_POOL_LIMIT_PER_HOST = int(config.get('HTTP_POOL_LIMIT_PER_HOST', 0))
+HTTP_POOL_KEEPALIVE_TIMEOUT = int(config.get('HTTP_POOL_KEEPALIVE_TIMEOUT', 30))  # time in seconds
+HTTP_POOL_IDLE_TIMEOUT = int(config.get('HTTP_POOL_IDLE_TIMEOUT', 300))  # time in seconds
+
+# Default token bucket for upstream requests, see waterbutler.core.scheduler.  Providers may
+# override these in their own settings.  A rate of 0 disables request scheduling.
+REQUEST_RATE = float(config.get('REQUEST_RATE', 10.0))  # requests per second
+REQUEST_BURST = int(config.get('REQUEST_BURST', 10))
+
+# Memory shared by the buffered parts of every chunked upload in the process, see
+# waterbutler.core.buffers.  Parts that don't fit are written to a tempfile instead.  Parts are
+# read from the upload UPLOAD_PART_READ_SIZE bytes at a time.
+UPLOAD_PART_BUFFER_POOL_SIZE = int(config.get('UPLOAD_PART_BUFFER_POOL_SIZE', 256 * 1024 * 1024))  # 256MiB
+UPLOAD_PART_READ_SIZE = int(config.get('UPLOAD_PART_READ_SIZE', 1024 * 1024))  # 1MiB
+
+# Let concurrent identical metadata and path validation requests share one upstream call, see
+# waterbutler.core.singleflight
+COALESCE_REQUESTS = config.get_bool('COALESCE_REQUESTS', False)
+
+# Provider metadata cache, see waterbutler.core.cache.  Providers may override the TTL in their own
+# settings.  A TTL of 0 disables caching.
+METADATA_CACHE_TTL = int(config.get('METADATA_CACHE_TTL', 0))  # time in seconds
+METADATA_CACHE_MAX_ENTRIES = int(config.get('METADATA_CACHE_MAX_ENTRIES', 10000))
+METADATA_CACHE_USE_REDIS = config.get_bool('METADATA_CACHE_USE_REDIS', False)
+
+# CRC32s of the files in store-only zip downloads are kept in the metadata cache for this long, so
+# that resuming the download doesn't need to read the files it skips again.  0 disables this.
+ZIP_CRC_CACHE_TTL = int(config.get('ZIP_CRC_CACHE_TTL', 24 * 60 * 60))  # time in seconds
+
+# Copies and moves run by celery download files of at least SEGMENTED_DOWNLOAD_THRESHOLD bytes
+# from providers that support it as SEGMENTED_DOWNLOAD_CONCURRENCY concurrent ranged requests of
+# SEGMENTED_DOWNLOAD_SEGMENT_SIZE bytes, see waterbutler.core.streams.SegmentedStream.  Each copy
+# holds up to SEGMENTED_DOWNLOAD_CONCURRENCY + 1 segments in memory.  A threshold of 0 disables it.
+SEGMENTED_DOWNLOAD_THRESHOLD = int(config.get('SEGMENTED_DOWNLOAD_THRESHOLD', 256 * 1024 * 1024))
+SEGMENTED_DOWNLOAD_SEGMENT_SIZE = int(config.get('SEGMENTED_DOWNLOAD_SEGMENT_SIZE',
+                                                 8 * 1024 * 1024))
+SEGMENTED_DOWNLOAD_CONCURRENCY = int(config.get('SEGMENTED_DOWNLOAD_CONCURRENCY', 4))